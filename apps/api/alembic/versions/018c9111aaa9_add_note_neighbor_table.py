@@ -0,0 +1,43 @@
+"""add_note_neighbor_table
+
+Revision ID: 018c9111aaa9
+Revises: a1923a8ae229
+Create Date: 2026-10-17 07:41:12.518304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '018c9111aaa9'
+down_revision: Union[str, Sequence[str], None] = 'a1923a8ae229'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # The table may already exist if it was created by SQLModel.metadata.create_all.
+    # Existing notes get their lists from python -m app.backfill_note_neighbors.
+    if 'noteneighbor' not in inspector.get_table_names():
+        op.create_table('noteneighbor',
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.Column('neighbor_id', sa.Integer(), nullable=False),
+        sa.Column('distance', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['neighbor_id'], ['note.id'], ),
+        sa.ForeignKeyConstraint(['note_id'], ['note.id'], ),
+        sa.PrimaryKeyConstraint('note_id', 'neighbor_id')
+        )
+        op.create_index('idx_note_neighbor_neighbor', 'noteneighbor', ['neighbor_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_note_neighbor_neighbor', table_name='noteneighbor')
+    op.drop_table('noteneighbor')
@@ -0,0 +1,64 @@
+"""add_sqlite_note_fts_table
+
+Revision ID: 2797743dfa07
+Revises: 919be0df08cf
+Create Date: 2026-10-17 06:12:09.531877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2797743dfa07'
+down_revision: Union[str, Sequence[str], None] = '919be0df08cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRANSLATION_TEXT = (
+    "coalesce((SELECT group_concat(value, ' ') FROM json_tree({row}.translation) "
+    "WHERE key IN ('translation', 'explanation', 'sentence') AND type = 'text'), '')"
+)
+INSERT_NEW_ROW = (
+    "INSERT INTO note_fts (rowid, text, corrected_text, translation_text) VALUES "
+    f"(new.id, new.text, coalesce(new.corrected_text, ''), {TRANSLATION_TEXT.format(row='new')});"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # The FTS5 keyword search is the SQLite fallback of the PostgreSQL full-text index
+    if bind.dialect.name != 'sqlite':
+        return
+
+    inspector = sa.inspect(bind)
+    if 'note_fts' in inspector.get_table_names():
+        return
+
+    op.execute("CREATE VIRTUAL TABLE note_fts USING fts5(text, corrected_text, translation_text, tokenize = 'trigram')")
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS note_fts_insert AFTER INSERT ON note BEGIN {INSERT_NEW_ROW} END")
+    op.execute("CREATE TRIGGER IF NOT EXISTS note_fts_delete AFTER DELETE ON note BEGIN DELETE FROM note_fts WHERE rowid = old.id; END")
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS note_fts_update AFTER UPDATE OF text, corrected_text, translation ON note "
+        f"BEGIN DELETE FROM note_fts WHERE rowid = old.id; {INSERT_NEW_ROW} END"
+    )
+    op.execute(
+        "INSERT INTO note_fts (rowid, text, corrected_text, translation_text) "
+        f"SELECT note.id, note.text, coalesce(note.corrected_text, ''), {TRANSLATION_TEXT.format(row='note')} FROM note"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS note_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS note_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS note_fts_insert")
+    op.execute("DROP TABLE IF EXISTS note_fts")
@@ -0,0 +1,42 @@
+"""add_embedding_cache_table
+
+Revision ID: 2e083f8f76d0
+Revises: 43839b0b193d
+Create Date: 2026-10-17 04:12:55.270419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e083f8f76d0'
+down_revision: Union[str, Sequence[str], None] = '43839b0b193d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # The table may already exist if it was created by SQLModel.metadata.create_all
+    if 'embeddingcacheentry' not in inspector.get_table_names():
+        op.create_table('embeddingcacheentry',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=150), nullable=False),
+        sa.Column('vector', Vector(768), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+        )
+        op.create_index('idx_embedding_cache_created', 'embeddingcacheentry', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_embedding_cache_created', table_name='embeddingcacheentry')
+    op.drop_table('embeddingcacheentry')
@@ -0,0 +1,46 @@
+"""add_note_vector_hnsw_index
+
+Revision ID: 43839b0b193d
+Revises: d834a22ecc30
+Create Date: 2026-10-17 03:48:33.906154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43839b0b193d'
+down_revision: Union[str, Sequence[str], None] = 'd834a22ecc30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # HNSW indexes are provided by pgvector, other databases search exactly
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Build without blocking writes to the note table; this needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_note_vector_hnsw ON note "
+            "USING hnsw (vector vector_l2_ops) "
+            f"WITH (m = {settings.VECTOR_INDEX_HNSW_M}, ef_construction = {settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION})"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_note_vector_hnsw")
@@ -0,0 +1,47 @@
+"""add_note_embedding_model
+
+Revision ID: 7480360804c2
+Revises: e23dc20fe283
+Create Date: 2026-10-17 02:52:19.203641
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7480360804c2'
+down_revision: Union[str, Sequence[str], None] = 'e23dc20fe283'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    note_columns = [column['name'] for column in inspector.get_columns('note')]
+    if 'embedding_model' not in note_columns:
+        op.add_column('note', sa.Column('embedding_model', sa.String(length=150), nullable=True))
+
+    # Existing vectors were produced by the currently configured embedding model.
+    # Run the backfill (python -m app.backfill_embeddings) after changing models.
+    # Mirrors ai_service.embedding_model_name() without importing the AI client.
+    if settings.EMBEDDING_BACKEND == "local":
+        model = f"local:{settings.LOCAL_EMBEDDING_MODEL}"
+    else:
+        model = settings.EMBEDDING_MODEL
+    op.execute(
+        sa.text("UPDATE note SET embedding_model = :model WHERE vector IS NOT NULL AND embedding_model IS NULL")
+        .bindparams(model=model)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('note', 'embedding_model')
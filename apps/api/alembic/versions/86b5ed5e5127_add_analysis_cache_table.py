@@ -0,0 +1,41 @@
+"""add_analysis_cache_table
+
+Revision ID: 86b5ed5e5127
+Revises: 86b49ba15460
+Create Date: 2026-10-17 02:10:41.512307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '86b5ed5e5127'
+down_revision: Union[str, Sequence[str], None] = '86b49ba15460'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # The table may already exist if it was created by SQLModel.metadata.create_all
+    if 'analysiscacheentry' not in inspector.get_table_names():
+        op.create_table('analysiscacheentry',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+        )
+        op.create_index('idx_analysis_cache_created', 'analysiscacheentry', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_cache_created', table_name='analysiscacheentry')
+    op.drop_table('analysiscacheentry')
@@ -0,0 +1,56 @@
+"""add_note_search_vector
+
+Revision ID: 8c0ac4e301a0
+Revises: 2e083f8f76d0
+Create Date: 2026-10-17 04:51:18.663047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c0ac4e301a0'
+down_revision: Union[str, Sequence[str], None] = '2e083f8f76d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{settings.SEARCH_FULLTEXT_CONFIG}', coalesce(text, '') || ' ' || coalesce(corrected_text, '')), 'A') || "
+    f"setweight(jsonb_to_tsvector('{settings.SEARCH_FULLTEXT_CONFIG}', "
+    "coalesce(jsonb_path_query_array(translation::jsonb, 'strict $.**.explanation'), '[]'::jsonb), '[\"string\"]'), 'B') || "
+    "setweight(jsonb_to_tsvector('simple', "
+    "coalesce(jsonb_path_query_array(translation::jsonb, 'strict $.**.translation'), '[]'::jsonb), '[\"string\"]'), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Full-text search columns are PostgreSQL only, other databases use substring matching
+    if bind.dialect.name != 'postgresql':
+        return
+
+    inspector = sa.inspect(bind)
+    note_columns = [column['name'] for column in inspector.get_columns('note')]
+    if 'search_vector' not in note_columns:
+        op.execute(f"ALTER TABLE note ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED")
+
+    # Build without blocking writes to the note table; this needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_note_search_vector ON note USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS idx_note_search_vector")
+    op.execute("ALTER TABLE note DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,97 @@
+"""store_note_translation_as_jsonb
+
+Revision ID: 919be0df08cf
+Revises: 8c0ac4e301a0
+Create Date: 2026-10-17 05:37:42.190418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '919be0df08cf'
+down_revision: Union[str, Sequence[str], None] = '8c0ac4e301a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{settings.SEARCH_FULLTEXT_CONFIG}', coalesce(text, '') || ' ' || coalesce(corrected_text, '')), 'A') || "
+    f"setweight(jsonb_to_tsvector('{settings.SEARCH_FULLTEXT_CONFIG}', "
+    "coalesce(jsonb_path_query_array(translation::jsonb, 'strict $.**.explanation'), '[]'::jsonb), '[\"string\"]'), 'B') || "
+    "setweight(jsonb_to_tsvector('simple', "
+    "coalesce(jsonb_path_query_array(translation::jsonb, 'strict $.**.translation'), '[]'::jsonb), '[\"string\"]'), 'C')"
+)
+
+TRANSLATION_TEXT_EXPRESSION = (
+    "(coalesce(jsonb_path_query_array(translation, 'strict $.**.translation'), '[]'::jsonb) || "
+    "coalesce(jsonb_path_query_array(translation, 'strict $.**.explanation'), '[]'::jsonb) || "
+    "coalesce(jsonb_path_query_array(translation, 'strict $.**.sentence'), '[]'::jsonb))::text"
+)
+
+
+def _drop_search_vector() -> None:
+    # The generated column depends on translation, so it has to be dropped to change the type
+    op.execute("DROP INDEX IF EXISTS idx_note_search_vector")
+    op.execute("ALTER TABLE note DROP COLUMN IF EXISTS search_vector")
+
+
+def _add_search_vector() -> None:
+    op.execute(f"ALTER TABLE note ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Other databases keep translation as JSON text
+    if bind.dialect.name != 'postgresql':
+        return
+
+    inspector = sa.inspect(bind)
+    note_columns = {column['name']: column for column in inspector.get_columns('note')}
+    if not isinstance(note_columns['translation']['type'], postgresql.JSONB):
+        _drop_search_vector()
+        op.alter_column(
+            'note',
+            'translation',
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using='translation::jsonb',
+        )
+        _add_search_vector()
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    if 'translation_text' not in note_columns:
+        op.execute(f"ALTER TABLE note ADD COLUMN translation_text text GENERATED ALWAYS AS ({TRANSLATION_TEXT_EXPRESSION}) STORED")
+
+    # Build without blocking writes to the note table; this needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_note_search_vector ON note USING gin (search_vector)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_note_translation_text_trgm ON note USING gin (translation_text gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS idx_note_translation_text_trgm")
+    op.execute("ALTER TABLE note DROP COLUMN IF EXISTS translation_text")
+
+    _drop_search_vector()
+    op.alter_column(
+        'note',
+        'translation',
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using='translation::json',
+    )
+    _add_search_vector()
+    op.execute("CREATE INDEX IF NOT EXISTS idx_note_search_vector ON note USING gin (search_vector)")
@@ -0,0 +1,42 @@
+"""restore_note_trigram_indexes
+
+Revision ID: a1923a8ae229
+Revises: 2797743dfa07
+Create Date: 2026-10-17 06:58:31.402716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1923a8ae229'
+down_revision: Union[str, Sequence[str], None] = '2797743dfa07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Trigram indexes are PostgreSQL only; they were dropped in bda96fdc12e8 and serve fuzzy search now
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Build without blocking writes to the note table; this needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_note_text_trgm ON note USING gin (text gin_trgm_ops)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_note_corrected_text_trgm ON note USING gin (corrected_text gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_note_corrected_text_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_note_text_trgm")
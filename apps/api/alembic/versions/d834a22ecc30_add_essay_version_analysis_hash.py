@@ -0,0 +1,38 @@
+"""add_essay_version_analysis_hash
+
+Revision ID: d834a22ecc30
+Revises: 7480360804c2
+Create Date: 2026-10-17 03:21:07.418822
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd834a22ecc30'
+down_revision: Union[str, Sequence[str], None] = '7480360804c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    version_columns = [column['name'] for column in inspector.get_columns('essayversion')]
+    if 'analysis_hash' not in version_columns:
+        op.add_column('essayversion', sa.Column('analysis_hash', sa.String(length=64), nullable=True))
+
+    version_indexes = [index['name'] for index in inspector.get_indexes('essayversion')]
+    if 'idx_essay_version_analysis_hash' not in version_indexes:
+        op.create_index('idx_essay_version_analysis_hash', 'essayversion', ['analysis_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_essay_version_analysis_hash', table_name='essayversion')
+    op.drop_column('essayversion', 'analysis_hash')
@@ -0,0 +1,53 @@
+"""add_note_enrichment_jobs
+
+Revision ID: e23dc20fe283
+Revises: 86b5ed5e5127
+Create Date: 2026-10-17 02:31:07.884163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e23dc20fe283'
+down_revision: Union[str, Sequence[str], None] = '86b5ed5e5127'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    note_columns = [column['name'] for column in inspector.get_columns('note')]
+    if 'enrichment_status' not in note_columns:
+        # Existing notes were enriched synchronously
+        op.add_column('note', sa.Column('enrichment_status', sa.String(length=20), nullable=False, server_default='done'))
+
+    if 'enrichmentjob' not in inspector.get_table_names():
+        op.create_table('enrichmentjob',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.String(length=500), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['note_id'], ['note.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_enrichmentjob_note_id'), 'enrichmentjob', ['note_id'], unique=False)
+        op.create_index('idx_enrichment_job_status_next_attempt', 'enrichmentjob', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_enrichment_job_status_next_attempt', table_name='enrichmentjob')
+    op.drop_index(op.f('ix_enrichmentjob_note_id'), table_name='enrichmentjob')
+    op.drop_table('enrichmentjob')
+    op.drop_column('note', 'enrichment_status')
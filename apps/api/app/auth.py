@@ -1,9 +1,11 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import timedelta, datetime, timezone
-from .db import engine
+from .db import get_session
 from .models import User, Folder
 from .schemas import UserCreate, UserRead, Token
 
@@ -37,13 +39,9 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 # --- Dependency ---
-def get_session():
-    with Session(engine) as session:
-        yield session
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -56,15 +54,15 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = session.exec(select(User).where(User.username == username)).first()
+    user = (await session.exec(select(User).where(User.username == username))).first()
     if user is None:
         raise credentials_exception
     return user
 
 # --- API Endpoints ---
 @router.post("/register", response_model=UserRead)
-def register(user: UserCreate, session: Session = Depends(get_session)):
-    hashed_password = get_password_hash(user.password)
+async def register(user: UserCreate, session: AsyncSession = Depends(get_session)):
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -73,25 +71,25 @@ def register(user: UserCreate, session: Session = Depends(get_session)):
 
     try:
         session.add(db_user)
-        session.flush() # Use flush to get the db_user.id before commit
+        await session.flush() # Use flush to get the db_user.id before commit
 
         # Create a default folder for the new user in the same transaction
         default_folder = Folder(name="default", owner_id=db_user.id)
         session.add(default_folder)
         
-        session.commit()
-        session.refresh(db_user)
+        await session.commit()
+        await session.refresh(db_user)
         
         return db_user
 
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         # Check which constraint was violated
-        existing_user_by_username = session.exec(select(User).where(User.username == user.username)).first()
+        existing_user_by_username = (await session.exec(select(User).where(User.username == user.username))).first()
         if existing_user_by_username:
             raise HTTPException(status_code=400, detail="Username already registered")
         
-        existing_user_by_email = session.exec(select(User).where(User.email == user.email)).first()
+        existing_user_by_email = (await session.exec(select(User).where(User.email == user.email))).first()
         if existing_user_by_email:
             raise HTTPException(status_code=400, detail="Email already registered")
         
@@ -99,13 +97,13 @@ def register(user: UserCreate, session: Session = Depends(get_session)):
         raise HTTPException(status_code=500, detail="An unexpected error occurred during registration.")
 
 @router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    user = session.exec(
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_session)):
+    user = (await session.exec(
         select(User).where(
             (User.username == form_data.username) | (User.email == form_data.username)
         )
-    ).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    )).first()
+    if not user or not await asyncio.to_thread(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -120,5 +118,5 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = D
     return Token(access_token=access_token, token_type="bearer", user=user)
 
 @router.get("/users/me", response_model=UserRead)
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Embeds notes without a vector and re-embeds notes whose vector was produced by
+another model than the one currently configured.
+
+The run is resumable: progress is checkpointed to a JSON file after every
+batch, so an interrupted run continues where it stopped. The checkpoint never
+moves past a note whose embedding failed, so a rerun retries it; notes embedded
+since then are skipped because they no longer need an embedding. Notes are
+read in primary-key order with streamed (server-side cursor) queries and
+written back with bulk updates in short transactions, so the API can keep
+serving traffic.
+
+Usage:
+    python -m app.backfill_embeddings [--batch-size 100] [--max-per-minute 3000]
+                                      [--checkpoint-file embedding_backfill.json] [--restart]
+"""
+import argparse
+import json
+import os
+import time
+
+from sqlalchemy import or_, update
+from sqlmodel import Session, select
+
+from .config import logger
+from .db import engine
+from .models import Note
+from .services import ai_service
+
+
+def _load_checkpoint(path: str, model: str) -> int:
+    """
+    Returns the last processed note id for the given model, or 0.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("model") != model:
+        logger.info("Checkpoint belongs to another embedding model, starting from the beginning.")
+        return 0
+    return checkpoint.get("last_id", 0)
+
+
+def _save_checkpoint(path: str, model: str, last_id: int, processed: int) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"model": model, "last_id": last_id, "processed": processed}, f)
+    os.replace(tmp_path, path)
+
+
+def _stale_notes_page(last_id: int, model: str, batch_size: int) -> list[tuple[int, str]]:
+    """
+    Fetches the next page of notes that need an embedding, in primary-key order.
+    """
+    statement = (
+        select(Note.id, Note.text)
+        .where(
+            Note.id > last_id,
+            or_(Note.vector.is_(None), Note.embedding_model.is_(None), Note.embedding_model != model),
+        )
+        .order_by(Note.id)
+        .limit(batch_size)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    with Session(engine) as session:
+        return [tuple(row) for row in session.exec(statement)]
+
+
+def backfill_embeddings(*, batch_size: int, max_per_minute: int, checkpoint_file: str, restart: bool = False) -> int:
+    """
+    Runs the backfill and returns the number of notes that received a new embedding.
+    """
+    model = ai_service.embedding_model_name()
+    last_id = 0 if restart else _load_checkpoint(checkpoint_file, model)
+    min_batch_seconds = 60 * batch_size / max_per_minute if max_per_minute > 0 else 0
+    processed = 0
+    failed_ids: list[int] = []
+
+    logger.info(f"Backfilling embeddings with model {model}, starting after note id {last_id}.")
+    while True:
+        started_at = time.monotonic()
+        page = _stale_notes_page(last_id, model, batch_size)
+        if not page:
+            break
+
+        embeddings = ai_service.get_embeddings([text for _, text in page])
+        rows = [
+            {"id": note_id, "vector": embedding, "embedding_model": model}
+            for (note_id, _), embedding in zip(page, embeddings)
+            if embedding is not None
+        ]
+        if rows:
+            with Session(engine) as session:
+                # Bulk UPDATE by primary key
+                session.execute(update(Note), rows)
+                session.commit()
+
+        page_failed_ids = [note_id for (note_id, _), embedding in zip(page, embeddings) if embedding is None]
+        if page_failed_ids:
+            logger.warning(f"Failed to embed notes {page_failed_ids}.")
+        failed_ids.extend(page_failed_ids)
+        processed += len(rows)
+        last_id = page[-1][0]
+        # Resume just before the first failed note so a rerun retries it
+        resume_id = failed_ids[0] - 1 if failed_ids else last_id
+        _save_checkpoint(checkpoint_file, model, resume_id, processed)
+        logger.info(f"Embedded {processed} notes so far ({len(failed_ids)} failed), last note id {last_id}.")
+
+        # Rate cap: never exceed max_per_minute embeddings
+        elapsed = time.monotonic() - started_at
+        if elapsed < min_batch_seconds:
+            time.sleep(min_batch_seconds - elapsed)
+
+    logger.info(f"Embedding backfill finished: {processed} notes embedded, {len(failed_ids)} failed.")
+    if failed_ids:
+        logger.warning(f"Notes without a current embedding: {failed_ids}. Rerun the backfill to retry them.")
+    return processed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embed notes without a vector or with a vector from another model.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Notes embedded per batch.")
+    parser.add_argument("--max-per-minute", type=int, default=3000, help="Maximum notes embedded per minute (0 = unlimited).")
+    parser.add_argument("--checkpoint-file", default="embedding_backfill.json", help="File used to resume an interrupted run.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first note.")
+    args = parser.parse_args()
+
+    engine.echo = False
+    backfill_embeddings(
+        batch_size=args.batch_size,
+        max_per_minute=args.max_per_minute,
+        checkpoint_file=args.checkpoint_file,
+        restart=args.restart,
+    )
+
+
+if __name__ == "__main__":
+    main()
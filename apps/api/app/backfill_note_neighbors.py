@@ -0,0 +1,69 @@
+"""
+Computes the precomputed similar-note lists (see GET /notes/{id}/similar) of
+embedded notes, e.g. after the note neighbor table was added or after notes were
+re-embedded in bulk by app.backfill_embeddings.
+
+Notes are processed in primary-key order in short transactions, and every list
+is recomputed from scratch, so the run can be repeated or restarted with
+--after-id at any time.
+
+Usage:
+    python -m app.backfill_note_neighbors [--owner-id 1] [--batch-size 200] [--after-id 0]
+"""
+import argparse
+
+from sqlmodel import Session, select
+
+from .config import logger
+from .db import engine
+from .models import Note
+from .services import note_neighbor_service
+
+
+def _embedded_notes_page(last_id: int, owner_id: int | None, batch_size: int) -> list[int]:
+    """
+    Fetches the ids of the next page of embedded notes, in primary-key order.
+    """
+    statement = select(Note.id).where(Note.id > last_id, Note.vector.is_not(None))
+    if owner_id is not None:
+        statement = statement.where(Note.owner_id == owner_id)
+    with Session(engine) as session:
+        return list(session.exec(statement.order_by(Note.id).limit(batch_size)).all())
+
+
+def backfill_note_neighbors(*, owner_id: int | None, batch_size: int, after_id: int = 0) -> int:
+    """
+    Runs the backfill and returns the number of notes whose list was recomputed.
+    """
+    last_id = after_id
+    processed = 0
+    while True:
+        note_ids = _embedded_notes_page(last_id, owner_id, batch_size)
+        if not note_ids:
+            break
+
+        with Session(engine) as session:
+            note_neighbor_service.refresh_neighbors(session=session, note_ids=note_ids)
+            session.commit()
+
+        processed += len(note_ids)
+        last_id = note_ids[-1]
+        logger.info(f"Computed the similar notes of {processed} notes so far, last note id {last_id}.")
+
+    logger.info(f"Note neighbor backfill finished: {processed} notes processed.")
+    return processed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute the similar-note lists of embedded notes.")
+    parser.add_argument("--owner-id", type=int, default=None, help="Only process the notes of this user.")
+    parser.add_argument("--batch-size", type=int, default=200, help="Notes processed per transaction.")
+    parser.add_argument("--after-id", type=int, default=0, help="Resume after this note id.")
+    args = parser.parse_args()
+
+    engine.echo = False
+    backfill_note_neighbors(owner_id=args.owner_id, batch_size=args.batch_size, after_id=args.after_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares the latency of semantic searches answered by the database (pgvector,
+or the NumPy scan on SQLite) with the in-memory vector index, and reports how
+many of the database results the index returns as well.
+
+Stored note vectors of the user are used as query embeddings, so no embedding
+API calls are made.
+
+Usage:
+    python -m app.benchmark_vector_search --owner-id 1 [--queries 200] [--similarity 0.5]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+from sqlmodel import Session, select
+
+from .config import settings, logger
+from .db import engine
+from .models import Note
+from .crud import note_crud
+from .services.vector_search_service import VectorIndex
+
+
+def _percentile(timings: list[float], percentile: float) -> float:
+    return float(np.percentile(timings, percentile)) * 1000
+
+
+def _summary(name: str, timings: list[float]) -> str:
+    return (
+        f"{name:<10} mean {statistics.mean(timings) * 1000:8.3f} ms   "
+        f"p50 {_percentile(timings, 50):8.3f} ms   p95 {_percentile(timings, 95):8.3f} ms"
+    )
+
+
+def benchmark_vector_search(*, owner_id: int, queries: int, similarity: float) -> None:
+    max_distance = 2 * (1 - similarity)
+    limit = settings.VECTOR_SEARCH_LIMIT
+    index = VectorIndex(
+        memory_budget_bytes=settings.VECTOR_INDEX_MEMORY_BUDGET_MB * 1024 * 1024,
+        ttl_seconds=settings.VECTOR_INDEX_MEMORY_TTL_SECONDS,
+    )
+
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Note.vector, Note.embedding_model)
+            .where(Note.owner_id == owner_id, Note.vector.is_not(None), Note.embedding_model.is_not(None))
+            .limit(queries)
+        ).all()
+        if not rows:
+            logger.error(f"User {owner_id} has no embedded notes.")
+            return
+        embedding_model = rows[0][1]
+        query_vectors = [np.asarray(vector, dtype=np.float32).tolist() for vector, model in rows if model == embedding_model]
+
+        started_at = time.perf_counter()
+        index.nearest(
+            session=session, owner_id=owner_id, search_embedding=query_vectors[0],
+            embedding_model=embedding_model, max_distance=max_distance, limit=limit,
+        )
+        load_seconds = time.perf_counter() - started_at
+        stats = index.stats()
+
+        # The database path is what search_notes runs with the in-memory index disabled
+        memory_enabled = settings.VECTOR_INDEX_MEMORY_ENABLED
+        settings.VECTOR_INDEX_MEMORY_ENABLED = False
+        database_timings, memory_timings, overlaps = [], [], []
+        try:
+            for query_vector in query_vectors:
+                started_at = time.perf_counter()
+                ranks = note_crud._semantic_ranks(
+                    session=session,
+                    owner_id=owner_id,
+                    filters=[Note.owner_id == owner_id],
+                    filtered=False,
+                    search_embedding=query_vector,
+                    embedding_model=embedding_model,
+                    max_distance=max_distance,
+                )
+                database_ids = [row.id for row in session.exec(ranks).all()] if ranks is not None else []
+                database_timings.append(time.perf_counter() - started_at)
+
+                started_at = time.perf_counter()
+                memory_ids = index.nearest(
+                    session=session, owner_id=owner_id, search_embedding=query_vector,
+                    embedding_model=embedding_model, max_distance=max_distance, limit=limit,
+                )
+                memory_timings.append(time.perf_counter() - started_at)
+
+                if database_ids:
+                    overlaps.append(len(set(database_ids) & set(memory_ids)) / len(database_ids))
+        finally:
+            settings.VECTOR_INDEX_MEMORY_ENABLED = memory_enabled
+
+    print(f"User {owner_id}: {stats['vectors']} vectors ({stats['bytes'] / 1024 / 1024:.1f} MB), "
+          f"{len(query_vectors)} queries, top {limit}, {engine.dialect.name}")
+    print(f"Index load {load_seconds * 1000:.1f} ms")
+    print(_summary("database", database_timings))
+    print(_summary("in-memory", memory_timings))
+    if overlaps:
+        print(f"Database results also returned by the index: {statistics.mean(overlaps) * 100:.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare database and in-memory semantic search latency.")
+    parser.add_argument("--owner-id", type=int, required=True, help="User whose notes are searched.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of stored note vectors used as queries.")
+    parser.add_argument("--similarity", type=float, default=0.5, help="Minimum similarity, as in GET /notes/search.")
+    args = parser.parse_args()
+
+    engine.echo = False
+    benchmark_vector_search(owner_id=args.owner_id, queries=args.queries, similarity=args.similarity)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,9 +16,77 @@ class Settings(BaseSettings):
     AI_MODEL: str
     ESSAY_AI_MODEL: str | None = None  # Specific model for essay analysis
     EMBEDDING_MODEL: str
+    EMBEDDING_BATCH_SIZE: int = 100  # Maximum number of texts per embeddings request
+    EMBEDDING_BATCH_MAX_TOKENS: int = 20000  # Approximate token budget per embeddings request
+    EMBEDDING_MAX_CONCURRENT_REQUESTS: int = 4  # Embeddings requests one async call keeps in flight at once
+    AI_THREAD_POOL_SIZE: int = 16  # Worker threads for running blocking AI calls in parallel
+
+    # --- Embedding Backend (Optional) ---
+    EMBEDDING_BACKEND: str = "remote"  # 'remote' (OpenAI-compatible API) or 'local' (sentence-transformers)
+    LOCAL_EMBEDDING_MODEL: str = "sentence-transformers/all-mpnet-base-v2"  # Must produce 768-dim vectors
+    LOCAL_EMBEDDING_WORKERS: int = 1  # Threads encoding micro-batches
+    LOCAL_EMBEDDING_MAX_BATCH_SIZE: int = 64
+    LOCAL_EMBEDDING_BATCH_WAIT_MS: int = 5  # How long to wait for more requests before encoding a batch
 
     # --- Database (Optional) ---
     DATABASE_URL: str | None = None
+    DATABASE_POOL_SIZE: int = 10  # Connections of the async engine kept open per worker
+    DATABASE_MAX_OVERFLOW: int = 10  # Extra async connections opened under load
+    DATABASE_ECHO: bool = False  # Log every SQL statement (for debugging)
+    DATABASE_READ_URL: str | None = None  # Comma-separated read replica URLs for read-only routes (PostgreSQL only)
+    DATABASE_READ_MAX_LAG_SECONDS: float = 5.0  # Replicas further behind the primary are skipped
+    DATABASE_READ_LAG_CHECK_SECONDS: float = 5.0  # Interval between replica lag measurements
+    DATABASE_READ_STICKY_SECONDS: float = 5.0  # Reads of a client that just wrote go to the primary for this long
+
+    # --- Search (Optional) ---
+    SEARCH_DEFAULT_LIMIT: int = 50  # Page size of note listings and searches
+    SEARCH_MAX_LIMIT: int = 200  # Largest `limit` accepted by GET /notes and GET /notes/search
+    SEARCH_COUNT_CAP: int = 10000  # Total counts of listings and searches stop at this number
+    SEARCH_RRF_K: int = 60  # Reciprocal rank fusion constant; larger values flatten the rank weights
+    SEARCH_FULLTEXT_CONFIG: str = "english"  # PostgreSQL text search configuration of the search_vector column
+    SEARCH_FULLTEXT_MIN_LENGTH: int = 3  # Shorter queries use substring matching instead of full-text search
+    SEARCH_FUZZY_THRESHOLD: float = 0.3  # Minimum trigram similarity of fuzzy search matches (pg_trgm.similarity_threshold)
+
+    # --- Vector Search (Optional, PostgreSQL) ---
+    VECTOR_INDEX_HNSW_M: int = 16  # Graph connectivity of the HNSW index, read when the index is built
+    VECTOR_INDEX_HNSW_EF_CONSTRUCTION: int = 64  # Build-time candidate list size of the HNSW index
+    VECTOR_SEARCH_LIMIT: int = 20  # Number of semantic matches returned per search
+    VECTOR_SEARCH_EF_SEARCH: int = 100  # Query-time candidate list size (hnsw.ef_search)
+    VECTOR_SEARCH_ITERATIVE_SCAN: str = "relaxed_order"  # 'off', 'strict_order' or 'relaxed_order'; off below pgvector 0.8
+    VECTOR_SEARCH_OVERFETCH: int = 4  # Candidate multiplier for searches when iterative scans are off
+
+    # --- In-Memory Vector Index (Optional) ---
+    VECTOR_INDEX_MEMORY_ENABLED: bool = False  # Answer semantic searches from per-user vector matrices in process memory
+    VECTOR_INDEX_MEMORY_BUDGET_MB: int = 512  # Least recently searched users are evicted beyond this size
+    VECTOR_INDEX_MEMORY_TTL_SECONDS: int = 600  # Reload the vectors of a user after this long
+
+    # --- Similar Notes (Optional) ---
+    SIMILAR_NOTES_COUNT: int = 10  # Nearest notes stored per note for GET /notes/{id}/similar
+
+    # --- Analysis Cache (Optional) ---
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_TTL_SECONDS: int = 30 * 24 * 3600  # Cached analyses expire after 30 days
+    ANALYSIS_CACHE_MEMORY_ENTRIES: int = 2048  # Size of the in-process LRU cache
+    ANALYSIS_CACHE_DB_MAX_ENTRIES: int = 100000  # Oldest rows beyond this are evicted from the shared table
+
+    # --- Embedding Cache (Optional) ---
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_TTL_SECONDS: int = 30 * 24 * 3600  # Cached embeddings expire after 30 days
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 4096  # Size of the in-process LRU cache
+    EMBEDDING_CACHE_DB_ENABLED: bool = False  # Share embeddings between processes through a database table
+    EMBEDDING_CACHE_DB_MAX_ENTRIES: int = 100000  # Oldest rows beyond this are evicted from the shared table
+
+    # --- Note Enrichment (Optional) ---
+    NOTE_ENRICHMENT_MODE: str = "sync"  # 'sync' enriches during the request, 'background' queues a job
+    ENRICHMENT_WORKERS: int = 2  # In-process worker threads processing enrichment jobs (0 disables them and background mode)
+    ENRICHMENT_POLL_INTERVAL_SECONDS: float = 5.0
+    ENRICHMENT_MAX_ATTEMPTS: int = 5
+    ENRICHMENT_RETRY_BASE_SECONDS: float = 30.0  # Delay before the first retry, doubled on each attempt
+    ENRICHMENT_JOB_TIMEOUT_SECONDS: int = 600  # Running jobs older than this are requeued at startup
+
+    # --- Batch Note Creation (Optional) ---
+    NOTE_BATCH_MAX_ITEMS: int = 500  # Maximum number of notes accepted by POST /notes/batch
+    NOTE_BATCH_CONCURRENCY: int = 8  # Maximum number of concurrent AI enrichment calls per batch
     
     # --- CORS (Optional) ---
     CORS_ORIGINS: str = "*"  # Comma-separated list of origins or "*" for all
@@ -1,11 +1,23 @@
+import base64
+import json
+import re
+from datetime import datetime
 import sqlalchemy as sa
 from sqlmodel import Session, select
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, defer
 from sqlalchemy import or_
 from pgvector.sqlalchemy import Vector
-from ..models import Note, User, Tag
+from ..models import Note, NoteTagLink, User, Tag
 from ..schemas import NoteUpdate
-from ..services import tag_service
+from ..services import tag_service, ai_service, vector_search_service
+from ..config import settings, logger
+
+# The SQLite FTS5 trigram tokenizer only matches queries of at least this many characters
+FTS_TRIGRAM_LENGTH = 3
+
+# pgvector added iterative index scans in 0.8; older versions reject the hnsw.iterative_scan setting
+PGVECTOR_ITERATIVE_SCAN_VERSION = (0, 8)
+_pgvector_version: tuple[int, ...] | None = None  # Read from the database once per process
 
 def get_note(*, session: Session, note_id: int) -> Note | None:
     """
@@ -36,6 +48,13 @@ def create_note_db(*, session: Session, note: Note) -> Note:
     session.refresh(note)
     return note
 
+def set_note_vector(*, note: Note, vector: list[float] | None) -> None:
+    """
+    Set the embedding of a note together with the model that produced it.
+    """
+    note.vector = vector
+    note.embedding_model = ai_service.embedding_model_name() if vector is not None else None
+
 def update_note_db(*, session: Session, db_note: Note, note_in: NoteUpdate) -> Note:
     """
     Update an existing note in the database.
@@ -64,6 +83,439 @@ def delete_note_db(*, session: Session, note: Note):
     session.flush()
     return
 
+def _iterative_scan(session: Session) -> str:
+    """
+    The configured VECTOR_SEARCH_ITERATIVE_SCAN mode, or 'off' if the installed
+    pgvector does not support iterative index scans yet.
+    """
+    global _pgvector_version
+    iterative_scan = settings.VECTOR_SEARCH_ITERATIVE_SCAN
+    if iterative_scan == "off":
+        return iterative_scan
+    if _pgvector_version is None:
+        extversion = session.execute(
+            sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar()
+        _pgvector_version = tuple(int(part) for part in re.findall(r"\d+", extversion or "0"))
+        if _pgvector_version < PGVECTOR_ITERATIVE_SCAN_VERSION:
+            logger.warning(
+                f"pgvector {extversion} does not support iterative index scans; "
+                "semantic searches over-fetch candidates instead."
+            )
+    if _pgvector_version < PGVECTOR_ITERATIVE_SCAN_VERSION:
+        return "off"
+    return iterative_scan
+
+def _configure_vector_search(session: Session, limit: int) -> None:
+    """
+    Sets the pgvector HNSW query parameters for the current transaction.
+    """
+    ef_search = max(settings.VECTOR_SEARCH_EF_SEARCH, limit)
+    iterative_scan = _iterative_scan(session)
+    if iterative_scan != "off":
+        session.execute(
+            sa.text("SELECT set_config('hnsw.ef_search', :ef_search, true), set_config('hnsw.iterative_scan', :iterative_scan, true)"),
+            {"ef_search": str(ef_search), "iterative_scan": iterative_scan},
+        )
+    else:
+        session.execute(sa.text("SELECT set_config('hnsw.ef_search', :ef_search, true)"), {"ef_search": str(ef_search)})
+
+def _vector_fetch_limit(session: Session, limit: int) -> int:
+    """
+    Number of candidates to fetch from the HNSW index for `limit` results. The
+    index is shared by all users, so even the owner predicate is applied after the
+    scan; without iterative scans, extra candidates are needed to fill the limit.
+    """
+    if _iterative_scan(session) == "off":
+        return limit * settings.VECTOR_SEARCH_OVERFETCH
+    return limit
+
+def _semantic_ranks(
+    *,
+    session: Session,
+    owner_id: int,
+    filters: list,
+    filtered: bool,
+    search_embedding: list[float],
+    embedding_model: str | None,
+    max_distance: float,
+):
+    """
+    Builds a CTE ranking the nearest notes to the embedding, closest first.
+
+    The nearest ids are selected with a plain ORDER BY distance LIMIT subquery so
+    PostgreSQL can serve it from the HNSW index. An approximate index scan applies
+    the owner, folder, type and tag filters after it found its candidates, so
+    searches either continue the scan iteratively or fetch extra candidates to
+    still fill the limit.
+
+    With the in-memory vector index enabled, or without pgvector, the nearest
+    notes are found in NumPy instead. Returns None if there are none.
+    """
+    limit = settings.VECTOR_SEARCH_LIMIT
+    nearest_ids = None
+    if settings.VECTOR_INDEX_MEMORY_ENABLED:
+        nearest_ids = vector_search_service.vector_index.nearest(
+            session=session,
+            owner_id=owner_id,
+            search_embedding=search_embedding,
+            embedding_model=embedding_model,
+            max_distance=max_distance,
+            limit=limit,
+            candidate_ids=session.exec(select(Note.id).where(*filters)).all() if filtered else None,
+        )
+    elif session.get_bind().dialect.name != "postgresql":
+        nearest_ids = vector_search_service.nearest_notes(
+            session=session,
+            filters=filters,
+            search_embedding=search_embedding,
+            embedding_model=embedding_model,
+            max_distance=max_distance,
+            limit=limit,
+        )
+    if nearest_ids is not None:
+        if not nearest_ids:
+            return None
+        ranks = {note_id: rank for rank, note_id in enumerate(nearest_ids, start=1)}
+        return select(Note.id.label("id"), sa.case(ranks, value=Note.id).label("rank")).where(Note.id.in_(nearest_ids))
+
+    fetch_limit = _vector_fetch_limit(session, limit)
+    _configure_vector_search(session, fetch_limit)
+
+    distance = Note.vector.l2_distance(search_embedding)
+    nearest = (
+        select(Note.id.label("id"), distance.label("distance"))
+        .where(
+            *filters,
+            # Only compare against vectors produced by the same model as the query embedding
+            Note.embedding_model == embedding_model,
+            distance < max_distance,
+        )
+        .order_by(distance)
+        .limit(fetch_limit)
+        .subquery("nearest")
+    )
+
+    # Ranking again also restores the order of relaxed iterative scans
+    ranked = select(
+        nearest.c.id,
+        sa.func.row_number().over(order_by=nearest.c.distance).label("rank"),
+    ).cte("semantic_ranks")
+    return select(ranked.c.id, ranked.c.rank).where(ranked.c.rank <= limit)
+
+def get_nearest_notes(
+    *, session: Session, note_id: int, owner_id: int, vector, embedding_model: str | None, limit: int
+) -> list[tuple[int, float]]:
+    """
+    Get the notes of the owner nearest to a note's vector, as (note id, distance)
+    pairs, closest first. Only notes embedded by the same model are compared.
+    """
+    filters = [Note.owner_id == owner_id, Note.id != note_id]
+    if session.get_bind().dialect.name != "postgresql":
+        return vector_search_service.nearest_note_distances(
+            session=session,
+            filters=filters,
+            search_embedding=vector,
+            embedding_model=embedding_model,
+            max_distance=float("inf"),
+            limit=limit,
+        )
+
+    # The owner filter is applied after the HNSW scan found its candidates
+    fetch_limit = _vector_fetch_limit(session, limit)
+    _configure_vector_search(session, fetch_limit)
+    distance = Note.vector.l2_distance(vector)
+    statement = (
+        select(Note.id, distance.label("distance"))
+        .where(*filters, Note.embedding_model == embedding_model)
+        .order_by(distance)
+        .limit(fetch_limit)
+    )
+    # Sorting again also restores the order of relaxed iterative scans
+    rows = sorted(session.exec(statement).all(), key=lambda row: row.distance)
+    return [(row.id, float(row.distance)) for row in rows[:limit]]
+
+def get_similar_notes(
+    *, session: Session, neighbors: list[tuple[int, float]], summary: bool = False
+) -> list[tuple[Note, float]]:
+    """
+    Get the notes of (note id, distance) pairs in the given order, each with its
+    similarity (1 - distance / 2, the scale of the search `similarity`).
+    With `summary`, rows of the summary columns are returned instead of notes.
+    """
+    if not neighbors:
+        return []
+    statement = (
+        select(*_summary_columns()) if summary else
+        select(Note).options(selectinload(Note.tags), joinedload(Note.folder), defer(Note.vector))
+    )
+    rows = session.exec(statement.where(Note.id.in_([note_id for note_id, _ in neighbors]))).all()
+    rows_by_id = {row.id: row for row in rows}
+    return [
+        (rows_by_id[note_id], 1 - distance / 2)
+        for note_id, distance in neighbors
+        if note_id in rows_by_id
+    ]
+
+def _configure_fuzzy_search(session: Session) -> None:
+    """
+    Sets the similarity threshold of the pg_trgm % operator for the current transaction.
+    """
+    session.execute(
+        sa.text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+        {"threshold": str(settings.SEARCH_FUZZY_THRESHOLD)},
+    )
+
+def _fuzzy_ranks(*, filters: list, search_query: str):
+    """
+    Builds a query ranking the notes whose text is similar to the search query
+    by trigram similarity, so misspelled queries still match. The % conditions
+    are served by the trigram indexes on text and corrected_text.
+    """
+    similarity = sa.func.greatest(
+        sa.func.similarity(Note.text, search_query),
+        sa.func.coalesce(sa.func.similarity(Note.corrected_text, search_query), 0),
+    )
+    rank = sa.func.row_number().over(order_by=(similarity.desc(), Note.created_at.desc(), Note.id.desc()))
+    ranked = (
+        select(Note.id.label("id"), rank.label("rank"))
+        .where(*filters, or_(Note.text.op("%")(search_query), Note.corrected_text.op("%")(search_query)))
+        .cte("keyword_ranks")
+    )
+    return select(ranked.c.id, ranked.c.rank)
+
+def _escape_like(value: str) -> str:
+    """
+    Escapes the LIKE wildcards in user input, to be used with escape="\\".
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _translation_matches(*, dialect_name: str, search_query: str):
+    """
+    Condition matching notes whose translation content contains the search query.
+    On PostgreSQL it is served by the trigram index on the generated translation_text,
+    other databases search the stored JSON text.
+    """
+    pattern = f"%{_escape_like(search_query)}%"
+    if dialect_name == "postgresql":
+        return sa.literal_column("note.translation_text").ilike(pattern, escape="\\")
+    return sa.cast(Note.translation, sa.String).ilike(pattern, escape="\\")
+
+def _fulltext_ranks(*, filters: list, search_query: str, search_in_content: bool):
+    """
+    Builds a query ranking the notes matching the search query in the full-text
+    index by ts_rank_cd, then newer notes. Words match after stemming in the
+    configured language and also as written, e.g. for translations.
+    """
+    search_vector = sa.literal_column("note.search_vector")
+    tsquery = sa.func.websearch_to_tsquery(
+        sa.literal_column(f"'{settings.SEARCH_FULLTEXT_CONFIG}'::regconfig"), search_query
+    ).op("||")(sa.func.websearch_to_tsquery(sa.literal_column("'simple'::regconfig"), search_query))
+
+    if search_in_content:
+        # Chinese translations are not split into words, so also match them as substrings
+        conditions = [or_(
+            search_vector.op("@@")(tsquery),
+            _translation_matches(dialect_name="postgresql", search_query=search_query),
+        )]
+    else:
+        # Only the note text itself has weight A; the first condition is served by the index
+        conditions = [
+            search_vector.op("@@")(tsquery),
+            sa.func.ts_filter(search_vector, sa.literal_column("'{a}'::\"char\"[]")).op("@@")(tsquery),
+        ]
+
+    rank = sa.func.row_number().over(
+        order_by=(sa.func.ts_rank_cd(search_vector, tsquery).desc(), Note.created_at.desc(), Note.id.desc())
+    )
+    ranked = (
+        select(Note.id.label("id"), rank.label("rank"))
+        .where(*filters, *conditions)
+        .cte("keyword_ranks")
+    )
+    return select(ranked.c.id, ranked.c.rank)
+
+def _fts_ranks(*, filters: list, search_query: str, search_in_content: bool, fuzzy: bool = False):
+    """
+    Builds a query ranking the notes matching the search query in the SQLite
+    FTS5 table by bm25, then newer notes.
+
+    Fuzzy searches match notes sharing any trigram with the query instead, so
+    the notes sharing the most trigrams rank first.
+    """
+    if fuzzy:
+        trigrams = dict.fromkeys(search_query[idx:idx + 3].lower() for idx in range(len(search_query) - 2))
+        match_query = "{text corrected_text} : (" + " OR ".join(
+            '"' + trigram.replace('"', '""') + '"' for trigram in trigrams
+        ) + ")"
+    else:
+        # Searched as one phrase, which the trigram tokenizer matches as a substring
+        match_query = '"' + search_query.replace('"', '""') + '"'
+        if not search_in_content:
+            match_query = "{text corrected_text} : " + match_query
+    matches = (
+        select(
+            sa.literal_column("note_fts.rowid").label("id"),
+            sa.func.bm25(sa.literal_column("note_fts")).label("score"),
+        )
+        .select_from(sa.table("note_fts"))
+        .where(sa.literal_column("note_fts").op("MATCH")(match_query))
+        .subquery("fts_matches")
+    )
+    rank = sa.func.row_number().over(order_by=(matches.c.score, Note.created_at.desc(), Note.id.desc()))
+    ranked = (
+        select(Note.id.label("id"), rank.label("rank"))
+        .join(matches, matches.c.id == Note.id)
+        .where(*filters)
+        .cte("keyword_ranks")
+    )
+    return select(ranked.c.id, ranked.c.rank)
+
+def _keyword_ranks(
+    *, session: Session, filters: list, search_query: str, search_in_content: bool, fuzzy: bool = False
+):
+    """
+    Builds a query ranking the notes that contain the search query.
+
+    Queries of SEARCH_FULLTEXT_MIN_LENGTH characters or more use the full-text
+    index on PostgreSQL and, from three characters, the FTS5 table on SQLite.
+    Shorter queries fall back to substring matching: exact matches first, then
+    prefix matches, then shorter notes, then newer notes.
+
+    Fuzzy searches rank the notes by the trigram similarity of their text instead.
+    """
+    dialect_name = session.get_bind().dialect.name
+    if fuzzy and dialect_name == "postgresql":
+        _configure_fuzzy_search(session)
+        return _fuzzy_ranks(filters=filters, search_query=search_query)
+    if len(search_query) >= settings.SEARCH_FULLTEXT_MIN_LENGTH:
+        if dialect_name == "postgresql":
+            return _fulltext_ranks(filters=filters, search_query=search_query, search_in_content=search_in_content)
+        # Shorter queries have no trigrams to match, so they use substring matching below
+        if dialect_name == "sqlite" and len(search_query) >= FTS_TRIGRAM_LENGTH:
+            return _fts_ranks(
+                filters=filters, search_query=search_query, search_in_content=search_in_content, fuzzy=fuzzy
+            )
+
+    escaped_query = _escape_like(search_query)
+    pattern = f"%{escaped_query}%"
+    conditions = [
+        Note.text.ilike(pattern, escape="\\"),
+        Note.corrected_text.ilike(pattern, escape="\\"),
+    ]
+    if search_in_content:
+        # Also search the translation content
+        conditions.append(_translation_matches(dialect_name=dialect_name, search_query=search_query))
+
+    match_quality = sa.case(
+        (sa.func.lower(Note.text) == search_query.lower(), 0),
+        (Note.text.ilike(f"{escaped_query}%", escape="\\"), 1),
+        else_=2,
+    )
+    rank = sa.func.row_number().over(
+        order_by=(match_quality, sa.func.length(Note.text), Note.created_at.desc(), Note.id.desc())
+    )
+    ranked = (
+        select(Note.id.label("id"), rank.label("rank"))
+        .where(*filters, or_(*conditions))
+        .cte("keyword_ranks")
+    )
+    return select(ranked.c.id, ranked.c.rank)
+
+def encode_cursor(position: dict) -> str:
+    """
+    Encodes the position after the last returned note into an opaque cursor.
+    """
+    payload = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decodes a cursor created by encode_cursor. Raises ValueError if it is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(payload)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if not isinstance(position, dict) or not isinstance(position.get("i"), int):
+        raise ValueError("Invalid cursor.")
+    return position
+
+def _count_capped(session: Session, statement) -> int:
+    """
+    Counts the rows of a statement, but stops counting at SEARCH_COUNT_CAP so the
+    estimate stays cheap for very large libraries.
+    """
+    capped = statement.limit(settings.SEARCH_COUNT_CAP).subquery()
+    return session.exec(select(sa.func.count()).select_from(capped)).one()
+
+def _facet_counts(session: Session, statement) -> dict:
+    """
+    Counts the notes selected by an id statement per type, folder and tag in a
+    single UNION ALL query over the same (capped) set of matches.
+
+    Only the first SEARCH_COUNT_CAP matches in no particular order are counted,
+    so `capped` is set when the cap was reached and the counts are lower bounds.
+    """
+    matched = statement.limit(settings.SEARCH_COUNT_CAP).cte("matched")
+    count = sa.func.count().label("count")
+    counts = sa.union_all(
+        select(sa.literal("matched").label("facet"), sa.cast(sa.null(), sa.String).label("value"), count)
+        .select_from(matched),
+        select(sa.literal("type").label("facet"), sa.cast(Note.type, sa.String).label("value"), count)
+        .join(matched, matched.c.id == Note.id)
+        .group_by(Note.type),
+        select(sa.literal("folder_id"), sa.cast(Note.folder_id, sa.String), count)
+        .join(matched, matched.c.id == Note.id)
+        .where(Note.folder_id.is_not(None))
+        .group_by(Note.folder_id),
+        select(sa.literal("tag_id"), sa.cast(NoteTagLink.tag_id, sa.String), count)
+        .join(matched, matched.c.id == NoteTagLink.note_id)
+        .group_by(NoteTagLink.tag_id),
+    )
+    facets = {"type": {}, "folder_id": {}, "tag_id": {}, "capped": False}
+    for facet, value, value_count in session.exec(counts).all():
+        if facet == "matched":
+            facets["capped"] = value_count >= settings.SEARCH_COUNT_CAP
+        else:
+            facets[facet][value if facet == "type" else int(value)] = value_count
+    return facets
+
+def _summary_columns() -> list:
+    """
+    Columns of a note summary. The analysis is reduced to a short gloss in SQL,
+    so neither it nor the vector or the relationships are loaded.
+    """
+    gloss = sa.func.coalesce(
+        Note.translation["translation"].as_string(),  # phrases and sentences
+        Note.translation[("definitions", 0, "translation")].as_string(),  # words
+    )
+    return [
+        Note.id,
+        Note.text,
+        Note.type,
+        gloss.label("gloss"),
+        Note.folder_id,
+        Note.enrichment_status,
+        Note.created_at,
+    ]
+
+def get_tag_ids(*, session: Session, note_ids: list[int]) -> dict[int, list[int]]:
+    """
+    Get the tag ids of many notes with one query.
+    """
+    tag_ids = {note_id: [] for note_id in note_ids}
+    if note_ids:
+        links = session.exec(
+            select(NoteTagLink.note_id, NoteTagLink.tag_id)
+            .where(NoteTagLink.note_id.in_(note_ids))
+            .order_by(NoteTagLink.tag_id)
+        ).all()
+        for note_id, tag_id in links:
+            tag_ids[note_id].append(tag_id)
+    return tag_ids
+
 def search_notes(
     *,
     session: Session,
@@ -75,91 +527,129 @@ def search_notes(
     tags: list[str] | None = None,
     note_type: str | None = None,
     search_embedding: list[float] | None = None,
-    search_in_content: bool = True
-) -> list[Note]:
+    embedding_model: str | None = None,
+    search_in_content: bool = True,
+    fuzzy: bool = False,
+    limit: int = 50,
+    after: dict | None = None,
+    include_total: bool = False,
+    include_facets: bool = False,
+    summary: bool = False
+) -> tuple[list[tuple[Note, float | None]], dict | None, int | None, dict | None]:
     """
     Performs a hybrid search with advanced filtering for notes.
     Filters by owner, folder, note type, and tags.
     Then, performs keyword and/or semantic search on the filtered results.
-    """
-    # Base query with owner and necessary joins/loads
-    base_query = (
-        select(Note)
-        .where(Note.owner_id == owner_id)
-        .options(selectinload(Note.tags), joinedload(Note.folder))
-    )
+    Semantic search only considers notes embedded with `embedding_model`.
+    Fuzzy keyword search tolerates typos in the query.
 
-    # Base query for filtering note IDs
-    id_query = select(Note.id).where(Note.owner_id == owner_id)
+    Keyword and semantic rankings are combined with reciprocal rank fusion in a
+    single query. Without a search query, notes are ordered by creation date.
 
-    # Apply filters to the ID query
+    Returns one page of (note, score) pairs, the position to pass as `after` for
+    the next page (None on the last page) and, if requested, a capped total count
+    and the capped counts of all matches per type, folder and tag.
+    With `summary`, rows of the summary columns are returned instead of notes.
+    Raises ValueError if `after` belongs to a different ordering.
+    """
+    filters = [Note.owner_id == owner_id]
     if folder_id is not None:
-        id_query = id_query.where(Note.folder_id == folder_id)
+        filters.append(Note.folder_id == folder_id)
     if note_type:
-        id_query = id_query.where(Note.type == note_type)
+        filters.append(Note.type == note_type)
     if tags:
-        id_query = id_query.join(Note.tags).where(Tag.name.in_(tags))
-
-    # Use a subquery to get distinct note IDs that match all filters
-    subquery = id_query.distinct().subquery()
-    
-    # Main query to fetch full note objects
-    base_query = (
-        select(Note)
-        .where(Note.id.in_(select(subquery)))
-        .options(selectinload(Note.tags), joinedload(Note.folder))
-    )
+        tagged_ids = select(NoteTagLink.note_id).join(Tag, Tag.id == NoteTagLink.tag_id).where(Tag.name.in_(tags))
+        filters.append(Note.id.in_(tagged_ids))
 
-    # If no search query, return filtered results, ordered by creation date
+    # If no search query, page through filtered results by creation date.
+    # The keyset (created_at, id) is served by idx_note_owner_created.
     if not search_query:
-        final_query = base_query.order_by(Note.created_at.desc())
-        return session.exec(final_query).all()
+        total = _count_capped(session, select(Note.id).where(*filters)) if include_total else None
+        facets = _facet_counts(session, select(Note.id).where(*filters)) if include_facets else None
+        page_query = (
+            select(*_summary_columns()) if summary else
+            select(Note).options(selectinload(Note.tags), joinedload(Note.folder), defer(Note.vector))
+        )
+        page_query = (
+            page_query
+            .where(*filters)
+            .order_by(Note.created_at.desc(), Note.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            if after.get("k") != "created" or not isinstance(after.get("c"), str):
+                raise ValueError("The cursor belongs to a different search.")
+            created_at = datetime.fromisoformat(after["c"])
+            page_query = page_query.where(sa.tuple_(Note.created_at, Note.id) < (created_at, after["i"]))
+
+        notes = session.exec(page_query).all()
+        next_position = None
+        if len(notes) > limit:
+            notes = notes[:limit]
+            next_position = {"k": "created", "c": notes[-1].created_at.isoformat(), "i": notes[-1].id}
+        return [(note, None) for note in notes], next_position, total, facets
 
     # --- Hybrid Search Logic ---
-    if search_in_content:
-        # Search in text, corrected_text, and translation content
-        keyword_query = base_query.where(
-            or_(
-                Note.text.ilike(f"%{search_query}%"),
-                Note.corrected_text.ilike(f"%{search_query}%"),
-                sa.func.jsonb_path_exists(
-                    sa.cast(Note.translation, sa.dialects.postgresql.JSONB),
-                    f'$.**.translation ? (@ like_regex "{search_query}")'
-                ),
-            )
-        )
-    else:
-        # Search only in text and corrected_text (not in translation content)
-        keyword_query = base_query.where(
-            or_(
-                Note.text.ilike(f"%{search_query}%"),
-                Note.corrected_text.ilike(f"%{search_query}%"),
-            )
+    rankings = [
+        _keyword_ranks(
+            session=session,
+            filters=filters,
+            search_query=search_query,
+            search_in_content=search_in_content,
+            fuzzy=fuzzy,
         )
-    
-    # Execute keyword search first
-    keyword_search_results = session.exec(keyword_query).all()
-    
-    semantic_search_results = []
+    ]
     if semantic and search_embedding:
-        # Semantic search on the filtered results
-        # Use l2_distance for better performance with ivfflat indexes
         # Convert similarity (0-1) to max L2 distance threshold
         # For normalized vectors, L2 distance ranges from 0 to 2
         max_distance = 2 * (1 - similarity)
-        
-        semantic_query = (
-            base_query
-            .filter(Note.vector.l2_distance(search_embedding) < max_distance)
-            .order_by(Note.vector.l2_distance(search_embedding))
-            .limit(20)
+        semantic_ranks = _semantic_ranks(
+            session=session,
+            owner_id=owner_id,
+            filters=filters,
+            filtered=len(filters) > 1,
+            search_embedding=search_embedding,
+            embedding_model=embedding_model,
+            max_distance=max_distance,
         )
-        semantic_search_results = session.exec(semantic_query).all()
-
-    # Combine and de-duplicate results, preserving order from semantic search if applicable
-    combined_results = {note.id: note for note in semantic_search_results}
-    for note in keyword_search_results:
-        if note.id not in combined_results:
-            combined_results[note.id] = note
-            
-    return list(combined_results.values())
\ No newline at end of file
+        if semantic_ranks is not None:
+            rankings.append(semantic_ranks)
+
+    # Reciprocal rank fusion: every ranking contributes 1 / (k + rank)
+    ranks = sa.union_all(*rankings).subquery("ranks")
+    fused = (
+        select(
+            ranks.c.id,
+            sa.cast(sa.func.sum(sa.literal(1.0) / (settings.SEARCH_RRF_K + ranks.c.rank)), sa.Float).label("score"),
+        )
+        .group_by(ranks.c.id)
+        .cte("fused")
+    )
+    total = _count_capped(session, select(fused.c.id)) if include_total else None
+    facets = _facet_counts(session, select(fused.c.id)) if include_facets else None
+
+    # Pages are cut by the keyset (score, id)
+    page_query = (
+        select(*_summary_columns(), fused.c.score) if summary else
+        select(Note, fused.c.score).options(selectinload(Note.tags), joinedload(Note.folder), defer(Note.vector))
+    )
+    page_query = (
+        page_query
+        .join(fused, Note.id == fused.c.id)
+        .order_by(fused.c.score.desc(), Note.id.desc())
+        .limit(limit + 1)
+    )
+    if after is not None:
+        if after.get("k") != "score" or not isinstance(after.get("s"), (int, float)):
+            raise ValueError("The cursor belongs to a different search.")
+        page_query = page_query.where(
+            or_(fused.c.score < after["s"], sa.and_(fused.c.score == after["s"], Note.id < after["i"]))
+        )
+
+    results = [(row if summary else row[0], row.score) for row in session.exec(page_query).all()]
+    next_position = None
+    if len(results) > limit:
+        results = results[:limit]
+        last_note, last_score = results[-1]
+        next_position = {"k": "score", "s": last_score, "i": last_note.id}
+    return results, next_position, total, facets
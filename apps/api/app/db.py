@@ -1,20 +1,197 @@
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+import itertools
+import json
 import os
-from .config import settings
+import threading
+import time
+from .config import settings, logger
+
+
+def _async_postgres_engine(url: str) -> AsyncEngine:
+    """
+    Async engine for a PostgreSQL URL, connecting through asyncpg whatever driver the URL names.
+    """
+    return create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        echo=settings.DATABASE_ECHO,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    )
+
 
 # Determine the database URL
 if settings.DATABASE_URL:
     # Use PostgreSQL if DATABASE_URL is set
     connect_args = {}
-    engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, echo=True)
+    engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, echo=settings.DATABASE_ECHO)
+    async_engine = _async_postgres_engine(settings.DATABASE_URL)
 else:
     # Fallback to SQLite for local development
     DATABASE_FILE = "database.db"
     DATABASE_PATH = f"./data/{DATABASE_FILE}"
     sqlite_url = f"sqlite:///{DATABASE_PATH}"
-    
+
     # Create the directory if it doesn't exist
     os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    
+
     connect_args = {"check_same_thread": False} # Needed for SQLite
-    engine = create_engine(sqlite_url, connect_args=connect_args, echo=True)
\ No newline at end of file
+    # Keep non-ASCII characters readable in JSON columns, so translations can be searched as text
+    engine = create_engine(
+        sqlite_url,
+        connect_args=connect_args,
+        echo=settings.DATABASE_ECHO,
+        json_serializer=lambda value: json.dumps(value, ensure_ascii=False),
+    )
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{DATABASE_PATH}",
+        echo=settings.DATABASE_ECHO,
+        json_serializer=lambda value: json.dumps(value, ensure_ascii=False),
+    )
+
+
+# --- Read replicas ---
+
+# Set on responses to writes; its timestamp keeps the client's reads on the primary
+LAST_WRITE_COOKIE = "db_last_write"
+
+# Requests with these methods do not write, so they may read from a replica
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Seconds the replica is behind the primary. A replica that replayed everything it
+# received is up to date, even if the primary has been idle for a while.
+_REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReadReplica:
+    """
+    Engines of a read replica with its last measured replication lag.
+    """
+
+    def __init__(self, engine: Engine, async_engine: AsyncEngine | None = None):
+        self.engine = engine
+        self.async_engine = async_engine
+        self.lag: float | None = None  # None while unknown or unreachable
+
+    def measure_lag(self) -> float | None:
+        """
+        Measures the replication lag, or None if the replica cannot be reached.
+        """
+        try:
+            with self.engine.connect() as connection:
+                lag = connection.execute(_REPLICA_LAG_QUERY).scalar()
+            self.lag = None if lag is None else float(lag)
+        except Exception as e:
+            logger.warning(f"Could not measure the lag of read replica {self.engine.url.host}: {e}")
+            self.lag = None
+        return self.lag
+
+
+class ReadRouter:
+    """
+    Spreads read-only sessions round-robin over the replicas that are not
+    lagging, falling back to the primary if none is.
+
+    Lags are measured by a background thread every check_interval_seconds, so
+    picking a replica never waits on a slow or unreachable one.
+    """
+
+    def __init__(self, replicas: list[ReadReplica], max_lag_seconds: float, check_interval_seconds: float):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._turns = itertools.count()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="read-replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            for replica in self.replicas:
+                replica.measure_lag()
+            self._stopping.wait(self.check_interval_seconds)
+
+    def read_replica(self) -> ReadReplica | None:
+        """
+        The next replica within the allowed lag, or None to read from the primary.
+        """
+        start = next(self._turns)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.lag is not None and replica.lag <= self.max_lag_seconds:
+                return replica
+        return None
+
+
+read_router = None
+if settings.DATABASE_URL and settings.DATABASE_READ_URL:
+    read_router = ReadRouter(
+        replicas=[
+            ReadReplica(
+                create_engine(url.strip(), connect_args=connect_args, echo=settings.DATABASE_ECHO),
+                _async_postgres_engine(url.strip()),
+            )
+            for url in settings.DATABASE_READ_URL.split(",") if url.strip()
+        ],
+        max_lag_seconds=settings.DATABASE_READ_MAX_LAG_SECONDS,
+        check_interval_seconds=settings.DATABASE_READ_LAG_CHECK_SECONDS,
+    )
+
+
+def wrote_recently(request: Request) -> bool:
+    """
+    Whether the client made a write within DATABASE_READ_STICKY_SECONDS.
+    """
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - last_write < settings.DATABASE_READ_STICKY_SECONDS
+
+
+# --- Request session ---
+
+async def get_session(request: Request):
+    """
+    The session of a request, shared by get_current_user and the route, as
+    FastAPI resolves a dependency once per request. It checks out a connection
+    on its first query and holds it until its transaction ends; work a route
+    did not commit, e.g. because it failed, is rolled back when it closes.
+
+    Queries wait on the event loop instead of holding a worker thread, so
+    concurrent requests are bounded by the pool. Read-only requests use a read
+    replica if any are configured, except for clients that just wrote, so they
+    read their own writes.
+    """
+    replica = None
+    if read_router and request.method in READ_ONLY_METHODS and not wrote_recently(request):
+        replica = read_router.read_replica()
+    async with AsyncSession(replica.async_engine if replica else async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    Ends the session's transaction so its connection goes back to the pool, e.g.
+    after the auth lookup of a route that is about to wait on an AI call. Call it
+    only when nothing is left to commit; objects already loaded stay usable, and
+    the next query checks a connection out again.
+    """
+    await session.commit()
@@ -1,9 +1,12 @@
+import json
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
-from .db import engine
+from .db import async_engine, get_session, release_connection
 from .auth import get_current_user
 from .models import User, Essay, EssayVersion, SuggestionCard
 from .schemas import (
@@ -12,18 +15,16 @@ from .schemas import (
     EssayVersionSummary
 )
 from .services.ai_service import AIService
-from .config import settings
+from .services import essay_service
+from .services.json_stream import IncrementalJSONParser
+from .config import settings, logger
 
 router = APIRouter()
 
-def get_session():
-    with Session(engine) as session:
-        yield session
-
 @router.post("", response_model=EssayResponse)
 async def create_essay(
     essay_data: EssayCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new essay"""
@@ -37,17 +38,17 @@ async def create_essay(
     )
     
     session.add(essay)
-    session.commit()
-    session.refresh(essay)
-    
-    return essay
+    await session.commit()
+
+    # A new essay has no versions yet; validating the model would load them
+    return EssayResponse(**essay.model_dump(), versions=[])
 
 @router.get("", response_model=List[EssayResponse])
 async def get_essays(
     skip: int = 0,
     limit: int = 100,
     essay_type: Optional[str] = None,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get user's essays with their versions"""
@@ -58,7 +59,7 @@ async def get_essays(
 
     query = query.offset(skip).limit(limit).order_by(Essay.created_at.desc())
 
-    essays = session.exec(query).all()
+    essays = (await session.exec(query)).all()
 
     # Build response with versions
     essay_responses = []
@@ -68,7 +69,7 @@ async def get_essays(
             EssayVersion.essay_id == essay.id
         ).order_by(EssayVersion.version_number.desc())
 
-        versions = session.exec(versions_query).all()
+        versions = (await session.exec(versions_query)).all()
 
         # Convert to response format
         version_summaries = [
@@ -107,11 +108,11 @@ async def get_essay_config(current_user: User = Depends(get_current_user)):
 @router.get("/{essay_id}", response_model=EssayResponse)
 async def get_essay(
     essay_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific essay with its versions"""
-    essay = session.get(Essay, essay_id)
+    essay = await session.get(Essay, essay_id)
 
     if not essay:
         raise HTTPException(
@@ -130,7 +131,7 @@ async def get_essay(
         EssayVersion.essay_id == essay_id
     ).order_by(EssayVersion.version_number.desc())
 
-    versions = session.exec(versions_query).all()
+    versions = (await session.exec(versions_query)).all()
 
     # Convert to response format
     version_summaries = [
@@ -158,11 +159,11 @@ async def get_essay(
 async def create_essay_version(
     essay_id: int,
     version_data: EssayVersionCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new version of an essay"""
-    essay = session.get(Essay, essay_id)
+    essay = await session.get(Essay, essay_id)
     
     if not essay:
         raise HTTPException(
@@ -177,12 +178,12 @@ async def create_essay_version(
         )
     
     # Get the next version number
-    latest_version = session.exec(
+    latest_version = (await session.exec(
         select(EssayVersion)
         .where(EssayVersion.essay_id == essay_id)
         .order_by(EssayVersion.version_number.desc())
         .limit(1)
-    ).first()
+    )).first()
     
     next_version_number = (latest_version.version_number + 1) if latest_version else 1
     
@@ -197,24 +198,24 @@ async def create_essay_version(
     )
     
     session.add(essay_version)
-    session.commit()
-    session.refresh(essay_version)
+    await session.commit()
+    await session.refresh(essay_version)
     
     # Update essay's updated_at timestamp
     essay.updated_at = datetime.now(timezone.utc)
     session.add(essay)
-    session.commit()
+    await session.commit()
     
     return essay_version
 
 @router.get("/{essay_id}/versions", response_model=List[EssayVersionResponse])
 async def get_essay_versions(
     essay_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get all versions of an essay"""
-    essay = session.get(Essay, essay_id)
+    essay = await session.get(Essay, essay_id)
     
     if not essay:
         raise HTTPException(
@@ -228,22 +229,22 @@ async def get_essay_versions(
             detail="Not authorized to access this essay"
         )
     
-    versions = session.exec(
+    versions = (await session.exec(
         select(EssayVersion)
         .where(EssayVersion.essay_id == essay_id)
         .order_by(EssayVersion.version_number.desc())
-    ).all()
+    )).all()
     
     return versions
 
 @router.get("/versions/{version_id}/suggestions", response_model=List[SuggestionCardResponse])
 async def get_version_suggestions(
     version_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get suggestion cards for a specific version"""
-    version = session.get(EssayVersion, version_id)
+    version = await session.get(EssayVersion, version_id)
     
     if not version:
         raise HTTPException(
@@ -252,59 +253,173 @@ async def get_version_suggestions(
         )
     
     # Check if user owns the essay
-    essay = session.get(Essay, version.essay_id)
+    essay = await session.get(Essay, version.essay_id)
     if essay.owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this essay"
         )
     
-    suggestions = session.exec(
+    suggestions = (await session.exec(
         select(SuggestionCard)
         .where(SuggestionCard.version_id == version_id)
         .order_by(SuggestionCard.priority.desc())
-    ).all()
+    )).all()
     
     return suggestions
 
 @router.post("/analyze", response_model=EssayAnalysisResponse)
 async def analyze_essay(
     analysis_request: EssayAnalysisRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Analyze an essay and generate scores and suggestions"""
+    """
+    Analyze an essay and generate scores and suggestions.
+
+    The result is stored as a new essay version with its suggestion cards. An
+    identical earlier analysis of the user is returned without calling the model.
+    """
     ai_service = AIService()
-    
+    if analysis_request.essay_id is not None:
+        await essay_service.get_owned_essay(session=session, essay_id=analysis_request.essay_id, owner=current_user)
+
+    analysis_hash = essay_service.essay_analysis_hash(
+        question=analysis_request.question,
+        content=analysis_request.content,
+        essay_type=analysis_request.type,
+        model=ai_service.model
+    )
+    stored_analysis = await essay_service.get_stored_analysis(
+        session=session, analysis_hash=analysis_hash, owner=current_user, essay_id=analysis_request.essay_id
+    )
+    if stored_analysis:
+        return stored_analysis
+
+    await release_connection(session)
     try:
         # Get AI analysis
-        analysis_result = await ai_service.analyze_essay(
+        analysis = essay_service.parse_analysis(await ai_service.analyze_essay(
             question=analysis_request.question,
             content=analysis_request.content,
             essay_type=analysis_request.type
-        )
-        
-        return EssayAnalysisResponse(
-            scores=analysis_result["scores"],
-            total_score=analysis_result["total_score"],
-            max_score=analysis_result["max_score"],
-            suggestion_cards=analysis_result["suggestion_cards"]
-        )
-
+        ))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}"
         )
 
+    # Errors while storing are not analysis failures, so they are not wrapped
+    return await essay_service.store_analysis(
+        session=session,
+        analysis_request=analysis_request,
+        analysis=analysis,
+        analysis_hash=analysis_hash,
+        owner=current_user
+    )
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/analyze/stream")
+async def analyze_essay_stream(
+    analysis_request: EssayAnalysisRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Analyze an essay and stream the results as server-sent events.
+
+    Emits a `score` event per completed score category and a `suggestion` event
+    per completed suggestion card while the model is still generating, followed
+    by a `complete` event with the stored analysis, or an `error` event. An
+    identical earlier analysis is sent as a single `complete` event.
+    """
+    ai_service = AIService()
+    if analysis_request.essay_id is not None:
+        await essay_service.get_owned_essay(session=session, essay_id=analysis_request.essay_id, owner=current_user)
+
+    analysis_hash = essay_service.essay_analysis_hash(
+        question=analysis_request.question,
+        content=analysis_request.content,
+        essay_type=analysis_request.type,
+        model=ai_service.model
+    )
+    stored_analysis = await essay_service.get_stored_analysis(
+        session=session, analysis_hash=analysis_hash, owner=current_user, essay_id=analysis_request.essay_id
+    )
+    if not stored_analysis and not ai_service.client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service is not available"
+        )
+
+    async def event_stream():
+        if stored_analysis:
+            yield _sse_event("complete", stored_analysis.model_dump(mode="json"))
+            return
+
+        parser = IncrementalJSONParser()
+        try:
+            async for chunk in ai_service.stream_essay_analysis(
+                question=analysis_request.question,
+                content=analysis_request.content,
+                essay_type=analysis_request.type
+            ):
+                for path, value in parser.feed(chunk):
+                    if len(path) != 2 or not isinstance(value, dict):
+                        continue
+                    if path[0] == "scores":
+                        yield _sse_event("score", {"category": path[1], **value})
+                    elif path[0] == "suggestion_cards":
+                        yield _sse_event("suggestion", value)
+            analysis = essay_service.parse_analysis(json.loads(parser.buffer))
+        except Exception as e:
+            logger.error(f"Streaming essay analysis failed: {e}")
+            yield _sse_event("error", {"detail": f"Analysis failed: {str(e)}"})
+            return
+
+        # The response has started, so storage errors can only be reported as an event
+        try:
+            # The request session is closed once streaming starts, so store with a new one
+            async with AsyncSession(async_engine, expire_on_commit=False) as store_session:
+                owner = await store_session.get(User, current_user.id)
+                response = await essay_service.store_analysis(
+                    session=store_session,
+                    analysis_request=analysis_request,
+                    analysis=analysis,
+                    analysis_hash=analysis_hash,
+                    owner=owner
+                )
+        except HTTPException as e:
+            yield _sse_event("error", {"detail": e.detail})
+            return
+        except Exception:
+            logger.exception("Could not store the streamed essay analysis")
+            yield _sse_event("error", {"detail": "The analysis could not be saved"})
+            return
+        yield _sse_event("complete", response.model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
+
 @router.put("/suggestions/{suggestion_id}/apply")
 async def apply_suggestion(
     suggestion_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Mark a suggestion as applied"""
-    suggestion = session.get(SuggestionCard, suggestion_id)
+    suggestion = await session.get(SuggestionCard, suggestion_id)
     
     if not suggestion:
         raise HTTPException(
@@ -313,8 +428,8 @@ async def apply_suggestion(
         )
     
     # Check if user owns the essay
-    version = session.get(EssayVersion, suggestion.version_id)
-    essay = session.get(Essay, version.essay_id)
+    version = await session.get(EssayVersion, suggestion.version_id)
+    essay = await session.get(Essay, version.essay_id)
     
     if essay.owner_id != current_user.id:
         raise HTTPException(
@@ -326,18 +441,18 @@ async def apply_suggestion(
     suggestion.applied_at = datetime.now(timezone.utc)
     
     session.add(suggestion)
-    session.commit()
+    await session.commit()
     
     return {"message": "Suggestion applied successfully"}
 
 @router.delete("/{essay_id}")
 async def delete_essay(
     essay_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an essay and all its versions"""
-    essay = session.get(Essay, essay_id)
+    essay = await session.get(Essay, essay_id)
     
     if not essay:
         raise HTTPException(
@@ -351,7 +466,7 @@ async def delete_essay(
             detail="Not authorized to delete this essay"
         )
     
-    session.delete(essay)
-    session.commit()
+    await session.delete(essay)
+    await session.commit()
     
     return {"message": "Essay deleted successfully"}
@@ -1,22 +1,40 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from . import auth, notes, parser, folders, tags, practice_lists, essays
-from .db import engine
+from .db import engine, async_engine, read_router
 from .models import SQLModel
 from .config import settings, logger
-from .middleware import RateLimitMiddleware
+from .middleware import RateLimitMiddleware, ReadYourWritesMiddleware
+from .services import cache_service, enrichment_service, local_embedding_service
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.NOTE_ENRICHMENT_MODE == "background" and settings.ENRICHMENT_WORKERS <= 0:
+        raise RuntimeError("NOTE_ENRICHMENT_MODE=background needs ENRICHMENT_WORKERS > 0 to enrich the queued notes.")
     logger.info("Creating database tables...")
     create_db_and_tables()
     logger.info("Database tables created successfully.")
+    if settings.EMBEDDING_BACKEND == "local":
+        logger.info("Warming up the local embedding model...")
+        try:
+            await asyncio.to_thread(local_embedding_service.backend.warm_up)
+        except Exception as e:
+            logger.error(f"Failed to load the local embedding model: {e}")
+    if settings.ENRICHMENT_WORKERS > 0:
+        enrichment_service.worker_pool.start()
+    if read_router:
+        read_router.start()
     yield
+    enrichment_service.worker_pool.stop()
+    if read_router:
+        read_router.stop()
+    await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan, redirect_slashes=False)
 
@@ -42,6 +60,10 @@ app.add_middleware(
     window_seconds=900  # per 15 minutes
 )
 
+# Keep the reads of clients that just wrote on the primary while replicas catch up
+if read_router:
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.DATABASE_READ_STICKY_SECONDS)
+
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(notes.router, prefix="/notes", tags=["notes"])
 app.include_router(parser.router, prefix="/parser", tags=["parser"])
@@ -53,3 +75,10 @@ app.include_router(essays.router, prefix="/essays", tags=["essays"])
 @app.get("/")
 def read_root():
     return {"message": "Welcome to WordNest API"}
+
+@app.get("/cache/stats")
+def read_cache_stats(current_user=Depends(auth.get_current_user)):
+    """
+    Entry counts and hit/miss counters of the analysis and embedding caches of this process.
+    """
+    return cache_service.cache_stats()
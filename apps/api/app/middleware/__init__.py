@@ -3,5 +3,6 @@ Middleware package for WordNest API
 """
 
 from .rate_limit import RateLimitMiddleware
+from .read_your_writes import ReadYourWritesMiddleware
 
-__all__ = ["RateLimitMiddleware"]
\ No newline at end of file
+__all__ = ["RateLimitMiddleware", "ReadYourWritesMiddleware"]
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Read-your-writes middleware for read replica routing
+"""
+import math
+import time
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..db import LAST_WRITE_COOKIE, READ_ONLY_METHODS
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """
+    Marks clients that sent a write request with a short-lived cookie holding
+    the time of the write. While it is fresh, get_session sends their reads to
+    the primary instead of a replica that may not have the write yet.
+
+    The cookie travels with the client, so this works across API processes.
+    """
+
+    def __init__(self, app, sticky_seconds: float):
+        super().__init__(app)
+        self.sticky_seconds = sticky_seconds
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in READ_ONLY_METHODS:
+            response.set_cookie(
+                LAST_WRITE_COOKIE,
+                str(time.time()),
+                max_age=max(1, math.ceil(self.sticky_seconds)),
+                httponly=True,
+                samesite="lax",
+            )
+        return response
@@ -1,12 +1,39 @@
 from typing import Union, Any, List
 from pydantic import ConfigDict
 from sqlmodel import Field, SQLModel, Relationship, Column, UniqueConstraint
-from sqlalchemy import Index
-from sqlalchemy.types import JSON
+from sqlalchemy import DDL, Index, event
+from sqlalchemy.types import JSON, LargeBinary, TypeDecorator
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime, timezone
 from pgvector.sqlalchemy import Vector
+import json
+import numpy as np
 from numpy import ndarray
 
+from .config import settings
+
+
+class Float32Vector(TypeDecorator):
+    """
+    Stores an embedding as packed float32 values, on databases without pgvector.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return np.asarray(value, dtype=np.float32).tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Written as text by earlier versions
+            return np.asarray(json.loads(value), dtype=np.float32)
+        return np.frombuffer(value, dtype=np.float32)
+
 
 class NoteTagLink(SQLModel, table=True):
     note_id: int | None = Field(default=None, foreign_key="note.id", primary_key=True)
@@ -69,10 +96,13 @@ class Note(SQLModel, table=True):
     text: str = Field(max_length=2000)
     corrected_text: str | None = Field(default=None, max_length=2000)
     type: str = Field(index=True, max_length=20)  # AI-classified type: 'word', 'phrase', or 'sentence'
-    translation: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+    translation: dict[str, Any] | None = Field(
+        default=None, sa_column=Column(JSON().with_variant(JSONB(), "postgresql"))
+    )
     vector: ndarray | None = Field(
-        default=None, sa_column=Column(Vector(768))
+        default=None, sa_column=Column(Vector(768).with_variant(Float32Vector(), "sqlite"))
     )  # Vector for semantic search
+    embedding_model: str | None = Field(default=None, max_length=150)  # Model that produced `vector`
 
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
 
@@ -87,6 +117,9 @@ class Note(SQLModel, table=True):
     state: str = Field(default="new", max_length=20)
     last_review: datetime | None = Field(default=None)
 
+    # Background enrichment: 'pending', 'done' or 'failed'
+    enrichment_status: str = Field(default="done", max_length=20)
+
     owner_id: int | None = Field(default=None, foreign_key="user.id")
     owner: Union["User", None] = Relationship(back_populates="notes")
 
@@ -95,6 +128,140 @@ class Note(SQLModel, table=True):
 
     tags: List[Tag] = Relationship(back_populates="notes", link_model=NoteTagLink)
     practice_list_items: List["PracticeListItem"] = Relationship(back_populates="note")
+    enrichment_jobs: List["EnrichmentJob"] = Relationship(back_populates="note", cascade_delete=True)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+# Approximate nearest neighbour index for semantic search. It only exists on
+# PostgreSQL, so it is created here instead of in __table_args__.
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS idx_note_vector_hnsw ON note USING hnsw (vector vector_l2_ops) "
+        f"WITH (m = {settings.VECTOR_INDEX_HNSW_M}, ef_construction = {settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION})"
+    ).execute_if(dialect="postgresql"),
+)
+
+# Full-text search document of a note: its text (weight A), the explanations
+# (weight B) and the translations (weight C) of the AI analysis. Translations are
+# mostly Chinese, so they are indexed without stemming.
+NOTE_SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{settings.SEARCH_FULLTEXT_CONFIG}', coalesce(text, '') || ' ' || coalesce(corrected_text, '')), 'A') || "
+    f"setweight(jsonb_to_tsvector('{settings.SEARCH_FULLTEXT_CONFIG}', "
+    "coalesce(jsonb_path_query_array(translation, 'strict $.**.explanation'), '[]'::jsonb), '[\"string\"]'), 'B') || "
+    "setweight(jsonb_to_tsvector('simple', "
+    "coalesce(jsonb_path_query_array(translation, 'strict $.**.translation'), '[]'::jsonb), '[\"string\"]'), 'C')"
+)
+
+# Searchable strings of the AI analysis (translations, explanations and example
+# sentences) flattened into one text, so substring search inside translations is
+# served by a trigram index instead of evaluating a JSON path on every row
+NOTE_TRANSLATION_TEXT_EXPRESSION = (
+    "(coalesce(jsonb_path_query_array(translation, 'strict $.**.translation'), '[]'::jsonb) || "
+    "coalesce(jsonb_path_query_array(translation, 'strict $.**.explanation'), '[]'::jsonb) || "
+    "coalesce(jsonb_path_query_array(translation, 'strict $.**.sentence'), '[]'::jsonb))::text"
+)
+
+# Like the HNSW index, the generated columns only exist on PostgreSQL
+event.listen(
+    Note.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE note ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({NOTE_SEARCH_VECTOR_EXPRESSION}) STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS idx_note_search_vector ON note USING gin (search_vector)"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE note ADD COLUMN IF NOT EXISTS translation_text text GENERATED ALWAYS AS ({NOTE_TRANSLATION_TEXT_EXPRESSION}) STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS idx_note_translation_text_trgm ON note USING gin (translation_text gin_trgm_ops)"
+    ).execute_if(dialect="postgresql"),
+)
+
+# Trigram indexes serving substring matching and fuzzy (similarity) search of the note text
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL("CREATE INDEX IF NOT EXISTS ix_note_text_trgm ON note USING gin (text gin_trgm_ops)").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_note_corrected_text_trgm ON note USING gin (corrected_text gin_trgm_ops)"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+# On SQLite, keyword search uses an FTS5 table with the same searchable text,
+# kept in sync with the note table by triggers. The trigram tokenizer matches
+# substrings, like the ILIKE search it replaces, and also works for Chinese.
+NOTE_FTS_INSERT = (
+    "INSERT INTO note_fts (rowid, text, corrected_text, translation_text) VALUES "
+    "(new.id, new.text, coalesce(new.corrected_text, ''), coalesce("
+    "(SELECT group_concat(value, ' ') FROM json_tree(new.translation) "
+    "WHERE key IN ('translation', 'explanation', 'sentence') AND type = 'text'), ''));"
+)
+NOTE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5(text, corrected_text, translation_text, tokenize = 'trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS note_fts_insert AFTER INSERT ON note BEGIN {NOTE_FTS_INSERT} END",
+    "CREATE TRIGGER IF NOT EXISTS note_fts_delete AFTER DELETE ON note BEGIN DELETE FROM note_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS note_fts_update AFTER UPDATE OF text, corrected_text, translation ON note "
+    f"BEGIN DELETE FROM note_fts WHERE rowid = old.id; {NOTE_FTS_INSERT} END",
+]
+for statement in NOTE_FTS_DDL:
+    event.listen(Note.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+class NoteNeighbor(SQLModel, table=True):
+    """Precomputed nearest note of a note, for GET /notes/{id}/similar"""
+    __table_args__ = (
+        # Finds the lists a note appears in when it changes or is deleted
+        Index("idx_note_neighbor_neighbor", "neighbor_id"),
+    )
+
+    note_id: int = Field(foreign_key="note.id", primary_key=True)
+    neighbor_id: int = Field(foreign_key="note.id", primary_key=True)
+    distance: float = Field()  # L2 distance between the vectors of the two notes
+
+
+class EnrichmentJob(SQLModel, table=True):
+    """Queued AI enrichment (analysis and embedding) of a note"""
+    __table_args__ = (
+        Index("idx_enrichment_job_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    status: str = Field(default="queued", max_length=20)  # 'queued' | 'running' | 'done' | 'failed'
+    attempts: int = Field(default=0)
+    last_error: str | None = Field(default=None, max_length=500)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    note_id: int = Field(foreign_key="note.id", index=True)
+    note: Note = Relationship(back_populates="enrichment_jobs")
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -175,6 +342,7 @@ class EssayVersion(SQLModel, table=True):
     __table_args__ = (
         Index("idx_essay_version_essay_version", "essay_id", "version_number"),
         Index("idx_essay_version_created", "created_at"),
+        Index("idx_essay_version_analysis_hash", "analysis_hash"),
     )
 
     id: int | None = Field(default=None, primary_key=True)
@@ -183,6 +351,7 @@ class EssayVersion(SQLModel, table=True):
     scores: dict[str, Any] = Field(sa_column=Column(JSON))  # Detailed scores by category
     total_score: int = Field()
     max_score: int = Field()
+    analysis_hash: str | None = Field(default=None, max_length=64)  # Hash of question, content, type and model
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
 
     essay_id: int = Field(foreign_key="essay.id", index=True)
@@ -211,4 +380,34 @@ class SuggestionCard(SQLModel, table=True):
     version_id: int = Field(foreign_key="essayversion.id", index=True)
     version: EssayVersion = Relationship(back_populates="suggestion_cards")
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
\ No newline at end of file
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+# Cache Models
+
+class AnalysisCacheEntry(SQLModel, table=True):
+    """Shared cache of AI text analyses keyed by a hash of text, model and prompt"""
+    __table_args__ = (
+        Index("idx_analysis_cache_created", "created_at"),
+    )
+
+    key: str = Field(primary_key=True, max_length=64)  # sha256 of model, prompt hash and normalized text
+    model: str = Field(max_length=100)
+    result: dict[str, Any] = Field(sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+class EmbeddingCacheEntry(SQLModel, table=True):
+    """Shared cache of embeddings keyed by a hash of model and normalized text"""
+    __table_args__ = (
+        Index("idx_embedding_cache_created", "created_at"),
+    )
+
+    key: str = Field(primary_key=True, max_length=64)  # sha256 of model and normalized text
+    model: str = Field(max_length=150)
+    vector: ndarray = Field(sa_column=Column(Vector(768).with_variant(Float32Vector(), "sqlite"), nullable=False))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
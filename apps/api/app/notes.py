@@ -1,26 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import selectinload, joinedload
 from sqlmodel import Session, select
-from typing import List
-from .db import engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal
+from .db import get_session, release_connection
 from .models import Note, User, Folder
 from .auth import get_current_user
-from .services import note_service, ai_service
-from .schemas import NoteCreate, NoteUpdate, NoteRead
+from .services import note_service, ai_service, enrichment_service, note_neighbor_service
+from .schemas import NoteCreate, NoteUpdate, NoteRead, NoteSearchResult, NotePage, NoteSummary, NoteSummaryPage, NoteFacets, NoteBatchCreate, NoteBatchResponse, NoteEnrichmentRead
 from .crud import note_crud
-from .config import logger
+from .config import settings, logger
 
 router = APIRouter()
 
-def get_session():
-    with Session(engine) as session:
-        yield session
-
 @router.post("/preview", response_model=NoteRead)
-def preview_note(note: NoteCreate, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def preview_note(note: NoteCreate, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     """
     Analyzes the note text and returns a preview of the note without saving it.
     """
-    ai_response = ai_service.analyze_text(note.text)
+    await release_connection(session)
+    ai_response = await ai_service.analyze_text_async(note.text)
 
     note_type = "word"
     note_data = None
@@ -44,34 +43,101 @@ def preview_note(note: NoteCreate, current_user: User = Depends(get_current_user
     )
 
     if note.folder_id:
-        folder = session.get(Folder, note.folder_id)
+        folder = await session.get(Folder, note.folder_id)
         if folder and folder.owner_id == current_user.id:
             preview_note.folder = folder
     
     return preview_note
 
 @router.post("", response_model=NoteRead)
-def create_note(note: NoteCreate, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def create_note(note: NoteCreate, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     """
     Creates a new note by calling the note service.
     """
-    return note_service.create_note_service(session=session, note_in=note, owner=current_user)
+    return await note_service.create_note_service(session=session, note_in=note, owner=current_user)
+
+@router.post("/batch", response_model=NoteBatchResponse)
+async def create_notes_batch(batch: NoteBatchCreate, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    """
+    Creates many notes in one request, e.g. when importing items from a document.
+    Each item gets its own result so partial failures do not abort the batch.
+    """
+    results = await note_service.create_notes_batch_service(session=session, notes_in=batch.items, owner=current_user)
+    created = sum(1 for result in results if result.note is not None)
+    return NoteBatchResponse(created=created, failed=len(results) - created, results=results)
+
+NoteView = Literal["full", "summary"]
+
+def _note_items(*, session: Session, results: list, summary: bool) -> list[NoteSearchResult] | list[NoteSummary]:
+    """
+    Serializes (note, score) pairs, or (summary row, score) pairs with their tag ids.
+    """
+    if summary:
+        tag_ids = note_crud.get_tag_ids(session=session, note_ids=[row.id for row, _ in results])
+        return [
+            NoteSummary.model_validate({**row._mapping, "tag_ids": tag_ids[row.id], "score": score})
+            for row, score in results
+        ]
+    return [NoteSearchResult.model_validate(note, update={"score": score}) for note, score in results]
+
+def _note_page(
+    *, session: Session, owner: User, cursor: str | None, view: NoteView, facets: bool = False, **search_params
+) -> NotePage | NoteSummaryPage:
+    """
+    Runs a note search for one page and wraps it with the cursor of the next page.
+    Totals and facets are only computed for the first page.
+    """
+    summary = view == "summary"
+    try:
+        after = note_crud.decode_cursor(cursor) if cursor else None
+        results, next_position, total, facet_counts = note_crud.search_notes(
+            session=session,
+            owner_id=owner.id,
+            after=after,
+            include_total=cursor is None,
+            include_facets=facets and cursor is None,
+            summary=summary,
+            **search_params
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    page = NoteSummaryPage if summary else NotePage
+    return page(
+        items=_note_items(session=session, results=results, summary=summary),
+        next_cursor=note_crud.encode_cursor(next_position) if next_position else None,
+        total_estimate=total,
+        facets=NoteFacets.model_validate(facet_counts) if facet_counts is not None else None,
+    )
 
-@router.get("", response_model=list[NoteRead])
-def read_notes(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    notes = note_crud.get_notes_by_owner(session=session, owner_id=current_user.id)
-    return notes
+@router.get("", response_model=NotePage | NoteSummaryPage)
+async def read_notes(
+    limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    cursor: str | None = None,
+    view: NoteView = "full",
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Lists the notes of the current user, newest first, one page at a time.
+    With view=summary, notes are returned as compact summaries.
+    """
+    return await session.run_sync(
+        lambda sync_session: _note_page(session=sync_session, owner=current_user, cursor=cursor, view=view, limit=limit)
+    )
 
 @router.get("/count")
-def get_notes_count(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def get_notes_count(current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     """
     Get the total count of notes for the current user.
     """
-    count = note_crud.get_notes_count_by_owner(session=session, owner_id=current_user.id)
+    count = await session.run_sync(
+        lambda sync_session: note_crud.get_notes_count_by_owner(session=sync_session, owner_id=current_user.id)
+    )
     return {"count": count}
 
-@router.get("/search", response_model=list[NoteRead])
-def search_notes_route(
+@router.get("/search", response_model=NotePage | NoteSummaryPage)
+async def search_notes_route(
     q: str | None = None,
     semantic: bool = False,
     similarity: float = 0.5,
@@ -79,68 +145,153 @@ def search_notes_route(
     tags: List[str] = Query(None),
     note_type: str | None = None,
     search_in_content: bool = True,
+    fuzzy: bool = False,
+    facets: bool = False,
+    limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    cursor: str | None = None,
+    view: NoteView = "full",
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
-    Search for notes with advanced filtering.
+    Search for notes with advanced filtering, one page at a time.
+    Results of a query are ordered by their fused keyword and semantic relevance score,
+    other results by creation date. With view=summary, notes are returned as compact summaries.
+    With fuzzy=true, keyword matching tolerates typos (trigram similarity of the note text).
+    With facets=true, the first page also counts all matches per type, folder and tag.
     """
-    # Allow search without a query string if filters are present
-    if not q and not folder_id and not tags and not note_type:
-        # If there's no query and no filters, return all notes for the user
-        return note_crud.get_notes_by_owner(session=session, owner_id=current_user.id)
-
     search_embedding = None
     if q and semantic:
-        search_embedding = ai_service.get_embedding(q)
+        await release_connection(session)
+        search_embedding = await ai_service.get_embedding_async(q)
         if not search_embedding:
             # Non-fatal, semantic search will just be skipped
             logger.warning(f"Could not generate embedding for the search query: {q}")
 
-    notes = note_crud.search_notes(
-        session=session,
-        owner_id=current_user.id,
-        search_query=q,
-        search_embedding=search_embedding,
-        semantic=semantic,
-        similarity=similarity,
-        folder_id=folder_id,
-        tags=tags,
-        note_type=note_type,
-        search_in_content=search_in_content
+    return await session.run_sync(
+        lambda sync_session: _note_page(
+            session=sync_session,
+            owner=current_user,
+            cursor=cursor,
+            view=view,
+            facets=facets,
+            search_query=q,
+            search_embedding=search_embedding,
+            embedding_model=ai_service.embedding_model_name(),
+            semantic=semantic,
+            similarity=similarity,
+            folder_id=folder_id,
+            tags=tags,
+            note_type=note_type,
+            search_in_content=search_in_content,
+            fuzzy=fuzzy,
+            limit=limit
+        )
     )
 
-    return notes
+@router.get("/{note_id}", response_model=NoteRead)
+async def read_note(note_id: int, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    """
+    Get a single note with its full analysis, tags and folder.
+    """
+    note = await session.get(Note, note_id, options=[selectinload(Note.tags), joinedload(Note.folder)])
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if note.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this note")
+    return note
+
+@router.get("/{note_id}/similar", response_model=List[NoteSearchResult] | List[NoteSummary])
+async def read_similar_notes(
+    note_id: int,
+    limit: int = Query(settings.SIMILAR_NOTES_COUNT, ge=1, le=settings.SIMILAR_NOTES_COUNT),
+    view: NoteView = "full",
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Get the notes most similar in meaning to a note, closest first, from the
+    precomputed neighbors of its stored embedding. The score is the similarity (0-1).
+    """
+    note = await session.get(Note, note_id)
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if note.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this note")
+
+    summary = view == "summary"
+
+    def similar_note_items(sync_session: Session):
+        results = note_neighbor_service.similar_notes(session=sync_session, note=note, limit=limit, summary=summary)
+        return _note_items(session=sync_session, results=results, summary=summary)
+
+    return await session.run_sync(similar_note_items)
+
+def _enrichment_read(note: Note, job) -> NoteEnrichmentRead:
+    return NoteEnrichmentRead(
+        note_id=note.id,
+        status=note.enrichment_status,
+        job_status=job.status if job else None,
+        attempts=job.attempts if job else 0,
+        last_error=job.last_error if job else None,
+        next_attempt_at=job.next_attempt_at if job else None,
+    )
+
+@router.get("/{note_id}/enrichment", response_model=NoteEnrichmentRead)
+async def get_note_enrichment(note_id: int, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    """
+    Get the background enrichment status of a note.
+    """
+    note = await session.get(Note, note_id)
+    if not note or note.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    job = await session.run_sync(
+        lambda sync_session: enrichment_service.get_latest_job(session=sync_session, note_id=note_id)
+    )
+    return _enrichment_read(note, job)
+
+@router.post("/{note_id}/enrichment/retry", response_model=NoteEnrichmentRead)
+async def retry_note_enrichment(note_id: int, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    """
+    Queue a new enrichment attempt for a note, e.g. after it failed permanently.
+    """
+    note = await session.get(Note, note_id)
+    if not note or note.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    job = await session.run_sync(lambda sync_session: enrichment_service.retry_note(session=sync_session, note=note))
+    return _enrichment_read(note, job)
 
 @router.delete("/{note_id}", status_code=204)
-def delete_note(note_id: int, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    note = note_crud.get_note(session=session, note_id=note_id)
+async def delete_note(note_id: int, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    note = await session.get(Note, note_id)
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     if note.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this note")
     
-    note_service.delete_note_service(session=session, note=note)
+    await session.run_sync(lambda sync_session: note_service.delete_note_service(session=sync_session, note=note))
     return
 
 @router.put("/{note_id}", response_model=NoteRead)
-def update_note(
+async def update_note(
     note_id: int,
     note_update: NoteUpdate,
     re_analyze: bool = False,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Updates a note by calling the note service.
     """
-    db_note = note_crud.get_note(session=session, note_id=note_id)
+    db_note = await session.get(Note, note_id)
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
     if db_note.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to edit this note")
 
-    return note_service.update_note_service(
+    return await note_service.update_note_service(
         session=session,
         db_note=db_note,
         note_in=note_update,
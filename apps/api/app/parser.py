@@ -19,7 +19,7 @@ async def upload_file_and_extract_items(file: UploadFile = File(...), current_us
              raise HTTPException(status_code=400, detail="The uploaded file contains no text.")
 
         # Step 2: Send the text to the AI to get learning items
-        learning_items = parser_service.extract_learning_items_from_text(extracted_text)
+        learning_items = await parser_service.extract_learning_items_from_text(extracted_text)
         
         # The service returns a dict like {"items": [...]}, which is what we want
         return learning_items
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import field_validator, EmailStr
 import re
@@ -27,6 +27,40 @@ class NoteRead(SQLModel):
     corrected_text: Optional[str] = None
     folder_id: Optional[int] = None
     folder: Optional[FolderRead] = None
+    enrichment_status: str = "done"
+
+class NoteSearchResult(NoteRead):
+    score: Optional[float] = None  # Fused relevance score, None when results are not ranked
+
+class NoteFacets(SQLModel):
+    """Number of matches per note type, folder and tag, capped like total_estimate"""
+    type: Dict[str, int] = {}
+    folder_id: Dict[int, int] = {}
+    tag_id: Dict[int, int] = {}
+    capped: bool = False  # The counts stopped at SEARCH_COUNT_CAP matches and are lower bounds
+
+class NotePage(SQLModel):
+    items: List[NoteSearchResult]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page; None on the last page
+    total_estimate: Optional[int] = None  # Total matches, capped at SEARCH_COUNT_CAP; only on the first page
+    facets: Optional[NoteFacets] = None  # Only on the first page of searches with facets=true
+
+class NoteSummary(SQLModel):
+    """Compact note for list and search screens; GET /notes/{id} returns the full note"""
+    id: int
+    text: str
+    type: str = "word"
+    gloss: Optional[str] = None  # First translation of the AI analysis
+    tag_ids: List[int] = []
+    folder_id: Optional[int] = None
+    enrichment_status: str = "done"
+    score: Optional[float] = None
+
+class NoteSummaryPage(SQLModel):
+    items: List[NoteSummary]
+    next_cursor: Optional[str] = None
+    total_estimate: Optional[int] = None
+    facets: Optional[NoteFacets] = None
 
 
 # --- Note Schemas ---
@@ -36,6 +70,28 @@ class NoteCreate(SQLModel):
     tags: Optional[List[str]] = []
     folder_id: Optional[int] = None
 
+class NoteBatchCreate(SQLModel):
+    items: List[NoteCreate]
+
+class NoteBatchItemResult(SQLModel):
+    index: int
+    text: str
+    note: Optional[NoteRead] = None
+    error: Optional[str] = None
+
+class NoteBatchResponse(SQLModel):
+    created: int
+    failed: int
+    results: List[NoteBatchItemResult]
+
+class NoteEnrichmentRead(SQLModel):
+    note_id: int
+    status: str  # Note enrichment status: 'pending' | 'done' | 'failed'
+    job_status: Optional[str] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[datetime] = None
+
 class NoteUpdate(SQLModel):
     text: Optional[str] = None
     type: Optional[str] = None
@@ -194,6 +250,8 @@ class EssayAnalysisRequest(SQLModel):
     question: str
     content: str
     type: str = Field(max_length=20)  # 'application' | 'continuation'
+    essay_id: Optional[int] = None  # Existing essay to add the analyzed version to
+    title: Optional[str] = Field(default=None, max_length=200)  # Title of a new essay
 
     @field_validator('type')
     @classmethod
@@ -203,6 +261,7 @@ class EssayAnalysisRequest(SQLModel):
         return v
 
 class SuggestionCardData(SQLModel):
+    id: Optional[int] = None  # Set once the card is stored
     card_id: str
     type: str
     priority: str
@@ -213,3 +272,6 @@ class EssayAnalysisResponse(SQLModel):
     total_score: int
     max_score: int
     suggestion_cards: List[SuggestionCardData]
+    essay_id: Optional[int] = None
+    version_id: Optional[int] = None
+    cached: bool = False  # True if an identical earlier analysis was returned
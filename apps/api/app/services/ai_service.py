@@ -1,11 +1,14 @@
+import asyncio
 import json
 import backoff
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from openai import OpenAI, APIError, RateLimitError, APITimeoutError, APIConnectionError
+from openai import OpenAI, AsyncOpenAI, APIError, RateLimitError, APITimeoutError, APIConnectionError
 from pydantic import BaseModel
-from typing import List, Union, Optional
+from typing import AsyncIterator, List, Union, Optional
 
 from ..config import settings, logger
+from . import cache_service, local_embedding_service
 
 # --- Configuration Validation ---
 def validate_ai_config() -> bool:
@@ -33,6 +36,7 @@ def validate_ai_config() -> bool:
 
 # --- Client Initialization ---
 client = None
+async_client = None  # Used by async routes so AI calls do not block the event loop
 if validate_ai_config():
     try:
         client = OpenAI(
@@ -40,12 +44,20 @@ if validate_ai_config():
             base_url=settings.BASE_URL,
             timeout=300.0,
         )
+        async_client = AsyncOpenAI(
+            api_key=settings.API_KEY,
+            base_url=settings.BASE_URL,
+            timeout=300.0,
+        )
         logger.info("AI service client initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize AI service client: {e}")
 else:
     logger.warning("AI service client not initialized due to configuration issues")
 
+# Thread pool for issuing blocking AI calls concurrently from synchronous code
+executor = ThreadPoolExecutor(max_workers=settings.AI_THREAD_POOL_SIZE, thread_name_prefix="ai-service")
+
 # --- Pydantic Models for Structured AI Output ---
 
 class Example(BaseModel):
@@ -166,27 +178,149 @@ The "data" object must contain "translation", "keywords", and "grammar_analysis"
 
 # --- Public Service Functions ---
 
+def embedding_model_name() -> str:
+    """
+    Returns the name of the model that currently produces embeddings.
+    Stored with every note vector so vectors of different models are never compared.
+    """
+    if settings.EMBEDDING_BACKEND == "local":
+        return f"local:{settings.LOCAL_EMBEDDING_MODEL}"
+    return settings.EMBEDDING_MODEL
+
+def _estimate_tokens(text: str) -> int:
+    """
+    Roughly estimates the number of tokens in a text (about 4 characters per token).
+    """
+    return len(text) // 4 + 1
+
+def _batch_indexes(texts: list[str]) -> list[list[int]]:
+    """
+    Splits the indexes of non-empty texts into batches that respect both the
+    item limit and the approximate token limit of a single embeddings request.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+    for idx, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        tokens = _estimate_tokens(text)
+        if current and (
+            len(current) >= settings.EMBEDDING_BATCH_SIZE
+            or current_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
 @backoff.on_exception(backoff.expo, (RateLimitError, APITimeoutError, APIConnectionError), max_tries=3)
-def get_embedding(text: str) -> list[float] | None:
+def _create_embeddings(texts: list[str]) -> list[list[float]]:
     """
-    Generates an embedding for the given text with retry logic.
+    Sends one embeddings request for a list of texts with retry logic.
+    Returns the embeddings in the order of the input texts.
     """
-    if not client:
-        logger.info("AI service is disabled. Skipping embedding generation.")
-        return None
+    response = client.embeddings.create(
+        input=texts,
+        model=settings.EMBEDDING_MODEL,
+    )
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
 
+def _get_local_embeddings(texts: list[str]) -> list[list[float] | None]:
+    """
+    Generates embeddings with the local sentence-transformers backend.
+    """
+    embeddings: list[list[float] | None] = [None] * len(texts)
+    indexes = [idx for idx, text in enumerate(texts) if text and text.strip()]
     try:
-        response = client.embeddings.create(
-            input=text,
-            model=settings.EMBEDDING_MODEL,
-        )
-        return response.data[0].embedding
-    except APIError as e:
-        logger.error(f"OpenAI APIError during embedding generation: {e}")
-        return None
+        local_embeddings = local_embedding_service.backend.embed([texts[idx] for idx in indexes])
     except Exception as e:
-        logger.error(f"An unexpected error occurred during embedding generation: {e}")
-        return None
+        logger.error(f"Error during local embedding generation: {e}")
+        return embeddings
+
+    for idx, embedding in zip(indexes, local_embeddings):
+        embeddings[idx] = embedding
+    return embeddings
+
+def _embedding_cache_keys(texts: list[str]) -> list[str | None]:
+    """
+    Cache keys of the texts under the current embedding model; None for empty texts.
+    """
+    model = embedding_model_name()
+    return [cache_service.embedding_cache_key(text, model) if text and text.strip() else None for text in texts]
+
+def _uncached_texts(texts: list[str], keys: list[str | None], cached: dict[str, list[float]]) -> dict[str, str]:
+    """
+    Texts that still have to be embedded by cache key, each distinct text once.
+    """
+    return {key: text for text, key in zip(texts, keys) if key and key not in cached}
+
+def _merge_embeddings(
+    keys: list[str | None], cached: dict[str, list[float]], computed: dict[str, list[float]]
+) -> list[list[float] | None]:
+    return [(cached.get(key) or computed.get(key)) if key else None for key in keys]
+
+def get_embeddings(texts: list[str]) -> list[list[float] | None]:
+    """
+    Generates embeddings for many texts using as few requests as possible.
+
+    Embeddings are served from the embedding cache where possible. The remaining
+    texts are split into batches sized by EMBEDDING_BATCH_SIZE and
+    EMBEDDING_BATCH_MAX_TOKENS. The result preserves the input order and holds
+    None for every text whose embedding could not be generated.
+    """
+    keys = _embedding_cache_keys(texts)
+    cached = cache_service.get_cached_embeddings([key for key in keys if key])
+    uncached = _uncached_texts(texts, keys, cached)
+
+    computed = {}
+    if uncached:
+        new_embeddings = _get_embeddings_uncached(list(uncached.values()))
+        computed = {key: embedding for key, embedding in zip(uncached, new_embeddings) if embedding is not None}
+        cache_service.store_embeddings(embedding_model_name(), computed)
+
+    return _merge_embeddings(keys, cached, computed)
+
+def _get_embeddings_uncached(texts: list[str]) -> list[list[float] | None]:
+    """
+    Generates embeddings with the configured backend, bypassing the cache.
+    """
+    if settings.EMBEDDING_BACKEND == "local":
+        return _get_local_embeddings(texts)
+
+    embeddings: list[list[float] | None] = [None] * len(texts)
+    if not client:
+        logger.info("AI service is disabled. Skipping embedding generation.")
+        return embeddings
+
+    for batch in _batch_indexes(texts):
+        try:
+            batch_embeddings = _create_embeddings([texts[idx] for idx in batch])
+        except Exception as e:
+            logger.error(f"Error during batched embedding generation for {len(batch)} texts: {e}")
+            if len(batch) == 1:
+                continue
+            # Retry the items one by one so a single bad input does not fail the whole batch
+            for idx in batch:
+                try:
+                    embeddings[idx] = _create_embeddings([texts[idx]])[0]
+                except Exception as item_error:
+                    logger.error(f"Error during embedding generation: {item_error}")
+            continue
+
+        for idx, embedding in zip(batch, batch_embeddings):
+            embeddings[idx] = embedding
+
+    return embeddings
+
+def get_embedding(text: str) -> list[float] | None:
+    """
+    Generates an embedding for the given text with retry logic.
+    """
+    return get_embeddings([text])[0]
 
 @backoff.on_exception(backoff.expo, (RateLimitError, APITimeoutError, APIConnectionError), max_tries=3)
 def call_ai(system_prompt: str, user_prompt: str, model: str | None = None) -> dict | None:
@@ -228,15 +362,31 @@ def call_ai(system_prompt: str, user_prompt: str, model: str | None = None) -> d
         logger.error(f"An unexpected error occurred during AI call: {e}")
         return None
 
-@backoff.on_exception(backoff.expo, (RateLimitError, APITimeoutError, APIConnectionError), max_tries=3)
 def analyze_text(text: str) -> dict | None:
     """
     Analyzes text with retry logic and returns a structured analysis.
+    Results are served from the analysis cache when the same text was already
+    analyzed with the current model and prompt.
     """
     if not client:
         logger.info("AI service is disabled. Skipping text analysis.")
         return None
 
+    cache_key = cache_service.analysis_cache_key(text, settings.AI_MODEL, ANALYSIS_SYSTEM_PROMPT)
+    cached_analysis = cache_service.get_cached_analysis(cache_key)
+    if cached_analysis is not None:
+        return cached_analysis
+
+    analysis = _analyze_text_uncached(text)
+    if analysis:
+        cache_service.store_analysis(cache_key, settings.AI_MODEL, analysis)
+    return analysis
+
+@backoff.on_exception(backoff.expo, (RateLimitError, APITimeoutError, APIConnectionError), max_tries=3)
+def _analyze_text_uncached(text: str) -> dict | None:
+    """
+    Calls the AI model to analyze text and validates the structured response.
+    """
     try:
         completion = client.chat.completions.create(
             model=settings.AI_MODEL,
@@ -267,13 +417,188 @@ def analyze_text(text: str) -> dict | None:
         logger.error(f"An unexpected error occurred during text analysis: {e}")
         return None
 
+# --- Async Service Functions ---
+# Async variants of the functions above for use in `async def` routes.
+
+@backoff.on_exception(backoff.expo, (RateLimitError, APITimeoutError, APIConnectionError), max_tries=3)
+async def _create_embeddings_async(texts: list[str]) -> list[list[float]]:
+    """
+    Sends one embeddings request for a list of texts with retry logic.
+    Returns the embeddings in the order of the input texts.
+    """
+    response = await async_client.embeddings.create(
+        input=texts,
+        model=settings.EMBEDDING_MODEL,
+    )
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+async def get_embeddings_async(texts: list[str]) -> list[list[float] | None]:
+    """
+    Async variant of get_embeddings. Batches are sent concurrently,
+    at most EMBEDDING_MAX_CONCURRENT_REQUESTS at a time.
+    """
+    keys = _embedding_cache_keys(texts)
+    # The shared cache tier is a database lookup, so keep it off the event loop
+    cached = await asyncio.to_thread(cache_service.get_cached_embeddings, [key for key in keys if key])
+    uncached = _uncached_texts(texts, keys, cached)
+
+    computed = {}
+    if uncached:
+        new_embeddings = await _get_embeddings_uncached_async(list(uncached.values()))
+        computed = {key: embedding for key, embedding in zip(uncached, new_embeddings) if embedding is not None}
+        await asyncio.to_thread(cache_service.store_embeddings, embedding_model_name(), computed)
+
+    return _merge_embeddings(keys, cached, computed)
+
+async def _get_embeddings_uncached_async(texts: list[str]) -> list[list[float] | None]:
+    """
+    Async variant of _get_embeddings_uncached.
+    """
+    if settings.EMBEDDING_BACKEND == "local":
+        return await asyncio.to_thread(_get_local_embeddings, texts)
+
+    embeddings: list[list[float] | None] = [None] * len(texts)
+    if not async_client:
+        logger.info("AI service is disabled. Skipping embedding generation.")
+        return embeddings
+
+    semaphore = asyncio.Semaphore(max(1, settings.EMBEDDING_MAX_CONCURRENT_REQUESTS))
+
+    async def embed_batch(batch: list[int]) -> None:
+        async with semaphore:
+            await _embed_batch(batch)
+
+    async def _embed_batch(batch: list[int]) -> None:
+        try:
+            batch_embeddings = await _create_embeddings_async([texts[idx] for idx in batch])
+        except Exception as e:
+            logger.error(f"Error during batched embedding generation for {len(batch)} texts: {e}")
+            if len(batch) == 1:
+                return
+            # Retry the items one by one so a single bad input does not fail the whole batch
+            for idx in batch:
+                try:
+                    embeddings[idx] = (await _create_embeddings_async([texts[idx]]))[0]
+                except Exception as item_error:
+                    logger.error(f"Error during embedding generation: {item_error}")
+            return
+
+        for idx, embedding in zip(batch, batch_embeddings):
+            embeddings[idx] = embedding
+
+    await asyncio.gather(*(embed_batch(batch) for batch in _batch_indexes(texts)))
+    return embeddings
+
+async def get_embedding_async(text: str) -> list[float] | None:
+    """
+    Async variant of get_embedding.
+    """
+    return (await get_embeddings_async([text]))[0]
+
+@backoff.on_exception(backoff.expo, (RateLimitError, APITimeoutError, APIConnectionError), max_tries=3)
+async def call_ai_async(system_prompt: str, user_prompt: str, model: str | None = None) -> dict | None:
+    """
+    Async variant of call_ai.
+    """
+    if not async_client:
+        logger.info("AI service is disabled. Skipping AI call.")
+        return None
+
+    # Use specified model or fall back to default
+    ai_model = model or settings.AI_MODEL
+
+    try:
+        completion = await async_client.chat.completions.create(
+            model=ai_model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            response_format={"type": "json_object"},
+        )
+
+        raw_json_response = completion.choices[0].message.content
+        if not raw_json_response:
+            logger.warning("AI returned an empty response.")
+            return None
+
+        return json.loads(raw_json_response)
+
+    except APIError as e:
+        logger.error(f"OpenAI APIError during AI call: {e}")
+        return None
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to decode JSON from AI response: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during AI call: {e}")
+        return None
+
+async def analyze_text_async(text: str) -> dict | None:
+    """
+    Async variant of analyze_text, sharing the same analysis cache.
+    """
+    if not async_client:
+        logger.info("AI service is disabled. Skipping text analysis.")
+        return None
+
+    cache_key = cache_service.analysis_cache_key(text, settings.AI_MODEL, ANALYSIS_SYSTEM_PROMPT)
+    # The shared cache tier is a database lookup, so keep it off the event loop
+    cached_analysis = await asyncio.to_thread(cache_service.get_cached_analysis, cache_key)
+    if cached_analysis is not None:
+        return cached_analysis
+
+    analysis = await _analyze_text_uncached_async(text)
+    if analysis:
+        await asyncio.to_thread(cache_service.store_analysis, cache_key, settings.AI_MODEL, analysis)
+    return analysis
+
+@backoff.on_exception(backoff.expo, (RateLimitError, APITimeoutError, APIConnectionError), max_tries=3)
+async def _analyze_text_uncached_async(text: str) -> dict | None:
+    """
+    Async variant of _analyze_text_uncached.
+    """
+    try:
+        completion = await async_client.chat.completions.create(
+            model=settings.AI_MODEL,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": text},
+            ],
+            response_format={"type": "json_object"},
+        )
+
+        raw_json_response = completion.choices[0].message.content
+        if not raw_json_response:
+            logger.warning("AI returned an empty response.")
+            return None
+
+        json_response = json.loads(raw_json_response)
+
+        validated_obj = AIAnalysisResponse.model_validate(json_response)
+        return validated_obj.model_dump()
+
+    except APIError as e:
+        logger.error(f"OpenAI APIError during text analysis: {e}")
+        return None
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to decode JSON from AI response: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during text analysis: {e}")
+        return None
+
 # --- Essay Analysis Service ---
 
+ESSAY_SYSTEM_PROMPT = "You are an expert English essay evaluator specializing in exam scoring."
+
 class AIService:
     """Service class for AI-powered essay analysis"""
 
     def __init__(self):
-        self.client = client
+        self.client = async_client
+        # Use essay-specific model if configured, otherwise fall back to default
+        self.model = settings.ESSAY_AI_MODEL or settings.AI_MODEL
 
     async def analyze_essay(self, question: str, content: str, essay_type: str) -> dict:
         """
@@ -290,6 +615,26 @@ class AIService:
         if not self.client:
             raise Exception("AI service is not available")
 
+        analysis_prompt = self._build_analysis_prompt(question, content, essay_type)
+
+        try:
+            result = await call_ai_async(
+                system_prompt=ESSAY_SYSTEM_PROMPT,
+                user_prompt=analysis_prompt,
+                model=self.model
+            )
+
+            if not result:
+                raise Exception("Failed to get AI analysis response")
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Essay analysis failed: {e}")
+            raise
+
+    def _build_analysis_prompt(self, question: str, content: str, essay_type: str) -> str:
+        """Build the user prompt for essay analysis"""
         # Determine scoring criteria based on essay type
         if essay_type == "application":
             max_score = 15
@@ -302,7 +647,7 @@ class AIService:
         json_example = self._get_json_example(essay_type, max_score)
 
         # Create the analysis prompt
-        analysis_prompt = f"""
+        return f"""
         {scoring_prompt}
 
         Essay Question: {question}
@@ -337,23 +682,32 @@ class AIService:
         {json_example}
         """
 
-        try:
-            # Use essay-specific model if configured, otherwise fall back to default
-            essay_model = settings.ESSAY_AI_MODEL or settings.AI_MODEL
-            result = call_ai(
-                system_prompt="You are an expert English essay evaluator specializing in exam scoring.",
-                user_prompt=analysis_prompt,
-                model=essay_model
-            )
-
-            if not result:
-                raise Exception("Failed to get AI analysis response")
+    async def stream_essay_analysis(self, question: str, content: str, essay_type: str) -> AsyncIterator[str]:
+        """
+        Analyze an essay like analyze_essay, but yield the raw JSON response
+        in chunks as the model generates it.
+        """
+        if not self.client:
+            raise Exception("AI service is not available")
 
-            return result
+        analysis_prompt = self._build_analysis_prompt(question, content, essay_type)
 
-        except Exception as e:
-            logger.error(f"Essay analysis failed: {e}")
-            raise
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ESSAY_SYSTEM_PROMPT},
+                {"role": "user", "content": analysis_prompt},
+            ],
+            response_format={"type": "json_object"},
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Stop generating (and paying for) tokens when the client went away
+            await stream.close()
 
     def _get_application_essay_prompt(self) -> str:
         """Get scoring prompt for application essays"""
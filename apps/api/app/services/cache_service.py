@@ -0,0 +1,317 @@
+import copy
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import Session, select
+
+from ..config import settings, logger
+from ..db import engine
+from ..models import AnalysisCacheEntry, EmbeddingCacheEntry
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after a fixed time-to-live.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text for use in cache keys: Unicode NFKC, trimmed, with
+    consecutive whitespace collapsed into a single space.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _prune_table(model, ttl_seconds: int, max_entries: int) -> None:
+    """
+    Deletes expired rows from a shared cache table and evicts the oldest rows
+    once the table grows beyond max_entries.
+    """
+    expired_before = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
+    with Session(engine) as session:
+        session.execute(delete(model).where(model.created_at < expired_before))
+        surplus_keys = (
+            select(model.key)
+            .order_by(model.created_at.desc())
+            .offset(max_entries)
+        )
+        session.execute(delete(model).where(model.key.in_(surplus_keys)))
+        session.commit()
+
+
+def _is_expired(created_at: datetime, ttl_seconds: int) -> bool:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at + timedelta(seconds=ttl_seconds) < datetime.now(timezone.utc)
+
+
+# --- Analysis Cache ---
+
+_analysis_memory_cache = TTLCache(
+    max_entries=settings.ANALYSIS_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS,
+)
+_analysis_writes = 0
+_analysis_writes_lock = threading.Lock()
+
+# Expired and surplus rows are pruned from the shared table after this many writes
+ANALYSIS_CACHE_PRUNE_INTERVAL = 100
+
+
+def analysis_cache_key(text: str, model: str, system_prompt: str) -> str:
+    """
+    Builds a content-addressed cache key from the normalized text, the model and
+    the system prompt, so changing either the prompt or the model invalidates it.
+    """
+    prompt_hash = _sha256(system_prompt)
+    return _sha256(f"{model}\n{prompt_hash}\n{normalize_text(text)}")
+
+
+def get_cached_analysis(key: str) -> dict | None:
+    """
+    Looks up an analysis result in the in-process cache first and in the shared
+    database table second. Returns a copy of the cached result or None.
+    """
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+
+    cached = _analysis_memory_cache.get(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    try:
+        with Session(engine) as session:
+            entry = session.get(AnalysisCacheEntry, key)
+    except SQLAlchemyError as e:
+        logger.warning(f"Analysis cache lookup failed: {e}")
+        return None
+
+    if not entry:
+        return None
+
+    if _is_expired(entry.created_at, settings.ANALYSIS_CACHE_TTL_SECONDS):
+        return None
+
+    _analysis_memory_cache.set(key, entry.result)
+    return copy.deepcopy(entry.result)
+
+
+def store_analysis(key: str, model: str, result: dict) -> None:
+    """
+    Stores an analysis result in both cache tiers. Failures are logged and ignored.
+    """
+    global _analysis_writes
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return
+
+    _analysis_memory_cache.set(key, copy.deepcopy(result))
+
+    try:
+        with Session(engine) as session:
+            session.add(AnalysisCacheEntry(key=key, model=model, result=result))
+            session.commit()
+    except IntegrityError:
+        # Another request stored the same analysis concurrently
+        pass
+    except SQLAlchemyError as e:
+        logger.warning(f"Failed to store analysis in cache: {e}")
+        return
+
+    with _analysis_writes_lock:
+        _analysis_writes += 1
+        should_prune = _analysis_writes % ANALYSIS_CACHE_PRUNE_INTERVAL == 0
+    if should_prune:
+        prune_analysis_cache()
+
+
+def prune_analysis_cache() -> None:
+    """
+    Deletes expired rows from the shared analysis cache and evicts the oldest
+    rows once the table grows beyond ANALYSIS_CACHE_DB_MAX_ENTRIES.
+    """
+    try:
+        _prune_table(AnalysisCacheEntry, settings.ANALYSIS_CACHE_TTL_SECONDS, settings.ANALYSIS_CACHE_DB_MAX_ENTRIES)
+    except SQLAlchemyError as e:
+        logger.warning(f"Failed to prune analysis cache: {e}")
+
+
+# --- Embedding Cache ---
+
+_embedding_memory_cache = TTLCache(
+    max_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+)
+_embedding_stats_lock = threading.Lock()
+_embedding_db_hits = 0
+_embedding_db_misses = 0
+_embedding_writes = 0
+
+# Expired and surplus rows are pruned from the shared table after this many written embeddings
+EMBEDDING_CACHE_PRUNE_INTERVAL = 1000
+
+
+def embedding_cache_key(text: str, model: str) -> str:
+    """
+    Builds a cache key from the model and the normalized text.
+    """
+    return _sha256(f"{model}\n{normalize_text(text)}")
+
+
+def get_cached_embeddings(keys: list[str]) -> dict[str, list[float]]:
+    """
+    Looks up embeddings in the in-process cache first and, if enabled, in the
+    shared database table second. Returns the found embeddings by key.
+    """
+    global _embedding_db_hits, _embedding_db_misses
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return {}
+
+    found: dict[str, list[float]] = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        cached = _embedding_memory_cache.get(key)
+        if cached is not None:
+            found[key] = list(cached)
+        else:
+            missing.append(key)
+
+    if not missing or not settings.EMBEDDING_CACHE_DB_ENABLED:
+        return found
+
+    try:
+        with Session(engine) as session:
+            entries = session.exec(select(EmbeddingCacheEntry).where(EmbeddingCacheEntry.key.in_(missing))).all()
+    except SQLAlchemyError as e:
+        logger.warning(f"Embedding cache lookup failed: {e}")
+        return found
+
+    for entry in entries:
+        if _is_expired(entry.created_at, settings.EMBEDDING_CACHE_TTL_SECONDS):
+            continue
+        vector = [float(value) for value in entry.vector]
+        _embedding_memory_cache.set(entry.key, tuple(vector))
+        found[entry.key] = vector
+
+    with _embedding_stats_lock:
+        db_hits = sum(1 for key in missing if key in found)
+        _embedding_db_hits += db_hits
+        _embedding_db_misses += len(missing) - db_hits
+    return found
+
+
+def store_embeddings(model: str, embeddings: dict[str, list[float]]) -> None:
+    """
+    Stores embeddings by key in both cache tiers. Failures are logged and ignored.
+    """
+    global _embedding_writes
+    if not settings.EMBEDDING_CACHE_ENABLED or not embeddings:
+        return
+
+    for key, vector in embeddings.items():
+        # Tuples keep callers from mutating the cached vector
+        _embedding_memory_cache.set(key, tuple(vector))
+
+    if not settings.EMBEDDING_CACHE_DB_ENABLED:
+        return
+
+    try:
+        with Session(engine) as session:
+            existing_keys = set(session.exec(
+                select(EmbeddingCacheEntry.key).where(EmbeddingCacheEntry.key.in_(list(embeddings)))
+            ).all())
+            session.add_all(
+                EmbeddingCacheEntry(key=key, model=model, vector=vector)
+                for key, vector in embeddings.items()
+                if key not in existing_keys
+            )
+            session.commit()
+    except IntegrityError:
+        # Another process stored some of the same embeddings concurrently
+        pass
+    except SQLAlchemyError as e:
+        logger.warning(f"Failed to store embeddings in cache: {e}")
+        return
+
+    with _embedding_stats_lock:
+        previous_writes = _embedding_writes
+        _embedding_writes += len(embeddings)
+        should_prune = previous_writes // EMBEDDING_CACHE_PRUNE_INTERVAL != _embedding_writes // EMBEDDING_CACHE_PRUNE_INTERVAL
+    if should_prune:
+        prune_embedding_cache()
+
+
+def prune_embedding_cache() -> None:
+    """
+    Deletes expired rows from the shared embedding cache and evicts the oldest
+    rows once the table grows beyond EMBEDDING_CACHE_DB_MAX_ENTRIES.
+    """
+    try:
+        _prune_table(EmbeddingCacheEntry, settings.EMBEDDING_CACHE_TTL_SECONDS, settings.EMBEDDING_CACHE_DB_MAX_ENTRIES)
+    except SQLAlchemyError as e:
+        logger.warning(f"Failed to prune embedding cache: {e}")
+
+
+def cache_stats() -> dict:
+    """
+    Returns entry counts and hit/miss counters of the in-process caches and the
+    shared embedding table.
+    """
+    with _embedding_stats_lock:
+        embedding_db = {"hits": _embedding_db_hits, "misses": _embedding_db_misses}
+    return {
+        "analysis": {"memory": _analysis_memory_cache.stats()},
+        "embedding": {"memory": _embedding_memory_cache.stats(), "db": embedding_db},
+    }
@@ -0,0 +1,259 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from ..config import settings, logger
+from ..db import engine
+from ..models import Note, EnrichmentJob
+from ..crud import note_crud
+from . import ai_service, vector_search_service, note_neighbor_service
+
+# Note enrichment states
+ENRICHMENT_PENDING = "pending"
+ENRICHMENT_DONE = "done"
+ENRICHMENT_FAILED = "failed"
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+def enqueue_note(*, session: Session, note: Note) -> EnrichmentJob | None:
+    """
+    Marks a note as pending and adds an enrichment job for it to the session.
+    The caller commits the transaction and then calls notify_workers().
+
+    Without workers (ENRICHMENT_WORKERS=0) nothing would ever process the job,
+    so the note is marked as failed instead and None is returned.
+    """
+    if settings.ENRICHMENT_WORKERS <= 0:
+        note.enrichment_status = ENRICHMENT_FAILED
+        session.add(note)
+        return None
+    note.enrichment_status = ENRICHMENT_PENDING
+    job = EnrichmentJob(note=note)
+    session.add(note)
+    session.add(job)
+    return job
+
+
+def get_latest_job(*, session: Session, note_id: int) -> EnrichmentJob | None:
+    """
+    Get the most recent enrichment job of a note.
+    """
+    statement = (
+        select(EnrichmentJob)
+        .where(EnrichmentJob.note_id == note_id)
+        .order_by(EnrichmentJob.id.desc())
+        .limit(1)
+    )
+    return session.exec(statement).first()
+
+
+def retry_note(*, session: Session, note: Note) -> EnrichmentJob:
+    """
+    Requeues the enrichment of a note, resetting the attempt counter.
+    """
+    if settings.ENRICHMENT_WORKERS <= 0:
+        raise HTTPException(status_code=503, detail="Background enrichment is disabled.")
+    job = get_latest_job(session=session, note_id=note.id)
+    if job and job.status in (JOB_QUEUED, JOB_RUNNING):
+        return job
+    job = enqueue_note(session=session, note=note)
+    session.commit()
+    session.refresh(job)
+    notify_workers()
+    return job
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff between attempts."""
+    return timedelta(seconds=settings.ENRICHMENT_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+def _claim_next_job() -> int | None:
+    """
+    Atomically claims the next due job and returns its id.
+    The conditional update guarantees that only one worker wins a job, also on
+    databases without SKIP LOCKED support.
+    """
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        candidate_id = session.exec(
+            select(EnrichmentJob.id)
+            .where(EnrichmentJob.status == JOB_QUEUED, EnrichmentJob.next_attempt_at <= now)
+            .order_by(EnrichmentJob.next_attempt_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if candidate_id is None:
+            return None
+
+        result = session.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.id == candidate_id, EnrichmentJob.status == JOB_QUEUED)
+            .values(status=JOB_RUNNING, attempts=EnrichmentJob.attempts + 1, updated_at=now)
+        )
+        session.commit()
+        return candidate_id if result.rowcount == 1 else None
+
+
+def process_job(job_id: int) -> None:
+    """
+    Runs the AI analysis and embedding for the note of a claimed job and writes
+    the results back. Failed attempts are rescheduled with exponential backoff
+    until ENRICHMENT_MAX_ATTEMPTS is reached. If the note text was edited while
+    the AI calls ran, the results are discarded and the job is queued again.
+    """
+    with Session(engine) as session:
+        job = session.get(EnrichmentJob, job_id)
+        if not job:
+            return
+        note = session.get(Note, job.note_id)
+        if not note:
+            job.status = JOB_DONE
+            session.add(job)
+            session.commit()
+            return
+        text = note.text
+
+    error = None
+    ai_response, embedding = None, None
+    if not ai_service.client:
+        error = "AI service is disabled."
+    else:
+        analysis_future = ai_service.executor.submit(ai_service.analyze_text, text)
+        embedding_future = ai_service.executor.submit(ai_service.get_embedding, text)
+        ai_response = analysis_future.result()
+        embedding = embedding_future.result()
+        if ai_response is None and embedding is None:
+            error = "AI analysis and embedding generation failed."
+        elif ai_response is None:
+            error = "AI analysis failed."
+        elif embedding is None:
+            error = "Embedding generation failed."
+
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        job = session.get(EnrichmentJob, job_id)
+        # Lock the note, so an edit cannot commit between the text check and the write
+        note = session.get(Note, job.note_id, with_for_update=True) if job else None
+        if not job or not note:
+            return
+
+        if note.text != text:
+            # The results are for the old text; enrich the current one instead,
+            # without counting this attempt
+            job.status = JOB_QUEUED
+            job.attempts -= 1
+            job.next_attempt_at = now
+            job.updated_at = now
+            session.add(job)
+            session.commit()
+            logger.info(f"Note {note.id} was edited during its enrichment, requeued it.")
+            notify_workers()
+            return
+
+        # Keep whatever succeeded, even if the attempt as a whole has to be retried
+        if ai_response:
+            note.type = ai_response.get("type", "word")
+            note.translation = ai_response.get("data")
+            note.corrected_text = ai_response.get("corrected_text", note.text)
+        if embedding is not None:
+            note_crud.set_note_vector(note=note, vector=embedding)
+            note_neighbor_service.update_note_neighbors(session=session, note=note)
+
+        job.updated_at = now
+        job.last_error = error
+        if error is None:
+            job.status = JOB_DONE
+            note.enrichment_status = ENRICHMENT_DONE
+        elif ai_service.client and job.attempts < settings.ENRICHMENT_MAX_ATTEMPTS:
+            job.status = JOB_QUEUED
+            job.next_attempt_at = now + _retry_delay(job.attempts)
+            logger.warning(f"Enrichment of note {note.id} failed (attempt {job.attempts}), retrying: {error}")
+        else:
+            job.status = JOB_FAILED
+            note.enrichment_status = ENRICHMENT_FAILED
+            logger.error(f"Enrichment of note {note.id} failed permanently: {error}")
+
+        session.add(job)
+        session.add(note)
+        session.commit()
+        vector_search_service.index_note(note)
+
+
+def requeue_stale_jobs() -> None:
+    """
+    Requeues jobs left in the running state by a worker that died, e.g. during a restart.
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.ENRICHMENT_JOB_TIMEOUT_SECONDS)
+    with Session(engine) as session:
+        session.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.status == JOB_RUNNING, EnrichmentJob.updated_at < stale_before)
+            .values(status=JOB_QUEUED)
+        )
+        session.commit()
+
+
+class EnrichmentWorkerPool:
+    """
+    In-process pool of threads that poll the enrichment job table.
+    """
+
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        requeue_stale_jobs()
+        for idx in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"enrichment-worker-{idx}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.workers} enrichment workers.")
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = _claim_next_job()
+                if job_id is not None:
+                    process_job(job_id)
+                    continue
+            except Exception as e:
+                logger.error(f"Enrichment worker error: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+worker_pool = EnrichmentWorkerPool(
+    workers=settings.ENRICHMENT_WORKERS,
+    poll_interval=settings.ENRICHMENT_POLL_INTERVAL_SECONDS,
+)
+
+
+def notify_workers() -> None:
+    """
+    Wakes up the worker pool after new jobs were committed.
+    """
+    worker_pool.notify()
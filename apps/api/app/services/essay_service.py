@@ -0,0 +1,147 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..models import User, Essay, EssayVersion, SuggestionCard
+from ..schemas import EssayAnalysisRequest, EssayAnalysisResponse
+
+
+def essay_analysis_hash(*, question: str, content: str, essay_type: str, model: str) -> str:
+    """
+    Key of an essay analysis. Identical question, content, type and model give
+    the same analysis, so it only has to be generated once.
+    """
+    payload = json.dumps([model, essay_type, question.strip(), content.strip()], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def get_owned_essay(*, session: AsyncSession, essay_id: int, owner: User) -> Essay:
+    """
+    Get an essay, making sure it belongs to the user.
+    """
+    essay = await session.get(Essay, essay_id)
+    if not essay:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Essay not found")
+    if essay.owner_id != owner.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this essay")
+    return essay
+
+
+def _to_analysis_response(version: EssayVersion, cards: list[SuggestionCard], cached: bool) -> EssayAnalysisResponse:
+    return EssayAnalysisResponse(
+        scores=version.scores,
+        total_score=version.total_score,
+        max_score=version.max_score,
+        suggestion_cards=[card.model_dump() for card in cards],
+        essay_id=version.essay_id,
+        version_id=version.id,
+        cached=cached,
+    )
+
+
+async def get_stored_analysis(
+    *, session: AsyncSession, analysis_hash: str, owner: User, essay_id: int | None = None
+) -> EssayAnalysisResponse | None:
+    """
+    Returns a previously stored analysis of the user with the same hash, if any.
+    """
+    statement = (
+        select(EssayVersion)
+        .join(Essay)
+        .where(EssayVersion.analysis_hash == analysis_hash, Essay.owner_id == owner.id)
+        .order_by(EssayVersion.created_at.desc())
+        .limit(1)
+    )
+    if essay_id is not None:
+        statement = statement.where(EssayVersion.essay_id == essay_id)
+    version = (await session.exec(statement)).first()
+    if not version:
+        return None
+
+    cards = (await session.exec(
+        select(SuggestionCard).where(SuggestionCard.version_id == version.id).order_by(SuggestionCard.id)
+    )).all()
+    return _to_analysis_response(version, cards, cached=True)
+
+
+def parse_analysis(analysis_result: dict) -> EssayAnalysisResponse:
+    """
+    Validates the analysis returned by the model. Raises KeyError or a
+    validation error if it is malformed.
+    """
+    return EssayAnalysisResponse(
+        scores=analysis_result["scores"],
+        total_score=analysis_result["total_score"],
+        max_score=analysis_result["max_score"],
+        suggestion_cards=analysis_result["suggestion_cards"],
+    )
+
+
+async def store_analysis(
+    *,
+    session: AsyncSession,
+    analysis_request: EssayAnalysisRequest,
+    analysis: EssayAnalysisResponse,
+    analysis_hash: str,
+    owner: User,
+) -> EssayAnalysisResponse:
+    """
+    Stores an analysis as a new essay version with its suggestion cards in one
+    transaction, creating the essay first when the request does not name one.
+    The analysis is validated by parse_analysis beforehand, so a malformed model
+    response stores nothing.
+    """
+    now = datetime.now(timezone.utc)
+
+    if analysis_request.essay_id is not None:
+        essay = await get_owned_essay(session=session, essay_id=analysis_request.essay_id, owner=owner)
+        latest_version_number = (await session.exec(
+            select(func.max(EssayVersion.version_number)).where(EssayVersion.essay_id == essay.id)
+        )).one()
+        version_number = (latest_version_number or 0) + 1
+        essay.updated_at = now
+    else:
+        essay = Essay(
+            title=(analysis_request.title or "").strip() or f"{analysis_request.type.capitalize()} Essay",
+            question=analysis_request.question,
+            type=analysis_request.type,
+            owner_id=owner.id,
+            created_at=now,
+            updated_at=now,
+        )
+        version_number = 1
+
+    version = EssayVersion(
+        essay=essay,
+        version_number=version_number,
+        content=analysis_request.content,
+        scores=analysis.scores,
+        total_score=analysis.total_score,
+        max_score=analysis.max_score,
+        analysis_hash=analysis_hash,
+        created_at=now,
+    )
+    cards = [
+        SuggestionCard(
+            version=version,
+            card_id=card.card_id,
+            type=card.type,
+            priority=card.priority,
+            data=card.data,
+        )
+        for card in analysis.suggestion_cards
+    ]
+
+    session.add(essay)
+    session.add(version)
+    session.add_all(cards)
+    await session.flush()
+    # Serialize while the generated ids are loaded, before commit expires them
+    response = _to_analysis_response(version, cards, cached=False)
+    await session.commit()
+    return response
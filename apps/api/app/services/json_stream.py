@@ -0,0 +1,88 @@
+import json
+from typing import Any
+
+JSONPath = tuple[str | int, ...]
+
+
+class _Frame:
+    """An object or array that has been opened but not closed yet."""
+
+    def __init__(self, kind: str, start: int, path: JSONPath):
+        self.kind = kind  # "object" or "array"
+        self.start = start
+        self.path = path
+        self.key: str | None = None
+        self.index = 0
+        self.expect_key = True
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON document that arrives in chunks, e.g. streamed model output.
+
+    Every time an object or array is closed, feed() returns it together with its
+    path from the document root, so callers can act on complete sub-values
+    (a score category, a suggestion card) long before the whole document is done.
+    Scalars are only returned as part of their enclosing container.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+
+    def _child_path(self) -> JSONPath:
+        if not self._stack:
+            return ()
+        parent = self._stack[-1]
+        if parent.kind == "object":
+            return parent.path + (parent.key,)
+        return parent.path + (parent.index,)
+
+    def feed(self, chunk: str) -> list[tuple[JSONPath, Any]]:
+        """
+        Adds a chunk of text and returns the containers completed by it, innermost first.
+        """
+        completed = []
+        self.buffer += chunk
+        buffer = self.buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    top = self._stack[-1] if self._stack else None
+                    if top and top.kind == "object" and top.expect_key:
+                        top.key = json.loads(buffer[self._string_start:pos + 1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                kind = "object" if char == "{" else "array"
+                self._stack.append(_Frame(kind=kind, start=pos, path=self._child_path()))
+            elif char in "}]":
+                if not self._stack:
+                    raise ValueError(f"Unexpected '{char}' at offset {pos}")
+                frame = self._stack.pop()
+                completed.append((frame.path, json.loads(buffer[frame.start:pos + 1])))
+            elif char == ":" and self._stack:
+                self._stack[-1].expect_key = False
+            elif char == "," and self._stack:
+                top = self._stack[-1]
+                if top.kind == "object":
+                    top.expect_key = True
+                else:
+                    top.index += 1
+
+        self._pos = len(buffer)
+        return completed
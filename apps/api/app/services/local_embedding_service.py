@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from ..config import settings, logger
+
+# Dimension of Note.vector
+EMBEDDING_DIMENSIONS = 768
+
+
+class LocalEmbeddingBackend:
+    """
+    Computes embeddings on the CPU with a sentence-transformers model.
+
+    Requests from concurrent callers are collected into micro-batches so the
+    model encodes many texts per forward pass instead of one call per request.
+    """
+
+    def __init__(self, model_name: str, workers: int, max_batch_size: int, batch_wait_ms: int):
+        self.model_name = model_name
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.batch_wait_seconds = batch_wait_ms / 1000
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._requests: queue.Queue[tuple[list[str], Future]] = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._threads_lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # Imported lazily because loading torch is slow and only needed for this backend
+                    from sentence_transformers import SentenceTransformer
+
+                    logger.info(f"Loading local embedding model {self.model_name}...")
+                    model = SentenceTransformer(self.model_name, device="cpu")
+                    dimensions = model.get_sentence_embedding_dimension()
+                    if dimensions != EMBEDDING_DIMENSIONS:
+                        raise ValueError(
+                            f"Local embedding model {self.model_name} produces {dimensions}-dimensional "
+                            f"vectors, but notes store {EMBEDDING_DIMENSIONS}-dimensional vectors."
+                        )
+                    self._model = model
+                    logger.info("Local embedding model loaded successfully")
+        return self._model
+
+    def _ensure_workers(self) -> None:
+        with self._threads_lock:
+            if self._threads:
+                return
+            for idx in range(max(1, self.workers)):
+                thread = threading.Thread(target=self._run, name=f"local-embedding-{idx}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def warm_up(self) -> None:
+        """
+        Loads the model and runs one encode so the first request does not pay for it.
+        """
+        self._ensure_workers()
+        self.embed(["warm up"])
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds texts, blocking until their micro-batch has been encoded.
+        """
+        if not texts:
+            return []
+        self._ensure_workers()
+        future: Future = Future()
+        self._requests.put((texts, future))
+        return future.result()
+
+    def _collect_batch(self) -> list[tuple[list[str], Future]]:
+        batch = [self._requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.batch_wait_seconds
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = self._get_model().encode(
+                    texts,
+                    batch_size=self.max_batch_size,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True,
+                )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result([vector.tolist() for vector in vectors[offset:offset + len(request_texts)]])
+                offset += len(request_texts)
+
+
+backend = LocalEmbeddingBackend(
+    model_name=settings.LOCAL_EMBEDDING_MODEL,
+    workers=settings.LOCAL_EMBEDDING_WORKERS,
+    max_batch_size=settings.LOCAL_EMBEDDING_MAX_BATCH_SIZE,
+    batch_wait_ms=settings.LOCAL_EMBEDDING_BATCH_WAIT_MS,
+)
@@ -0,0 +1,151 @@
+from sqlalchemy import delete, insert, or_
+from sqlmodel import Session, select
+
+from ..config import settings
+from ..models import Note, NoteNeighbor
+from ..crud import note_crud
+
+
+def _nearest(session: Session, note_id: int, owner_id: int, vector, embedding_model: str | None) -> list[tuple[int, float]]:
+    return note_crud.get_nearest_notes(
+        session=session,
+        note_id=note_id,
+        owner_id=owner_id,
+        vector=vector,
+        embedding_model=embedding_model,
+        limit=settings.SIMILAR_NOTES_COUNT,
+    )
+
+
+def _lock_lists(session: Session, note_ids) -> None:
+    """
+    Locks the note rows owning the given neighbor lists until the transaction
+    ends, so concurrent writers of the same lists (e.g. an update and an
+    enrichment job re-embedding the same note) run one after another instead of
+    inserting the same rows or trimming a list twice. Each call locks its rows
+    in id order, so writers taking the same set of locks cannot deadlock.
+    """
+    if note_ids:
+        session.exec(
+            select(Note.id).where(Note.id.in_(sorted(set(note_ids)))).order_by(Note.id).with_for_update()
+        ).all()
+
+
+def _insert(session: Session, note_id: int, neighbors: list[tuple[int, float]]) -> None:
+    if neighbors:
+        session.execute(insert(NoteNeighbor), [
+            {"note_id": note_id, "neighbor_id": neighbor_id, "distance": distance}
+            for neighbor_id, distance in neighbors
+        ])
+
+
+def _insert_reverse(session: Session, note_id: int, neighbors: list[tuple[int, float]]) -> None:
+    """
+    Adds a note to the lists of its nearest notes where it is closer than their
+    farthest entry, dropping that entry from full lists.
+    """
+    if not neighbors:
+        return
+    lists: dict[int, list[tuple[float, int]]] = {neighbor_id: [] for neighbor_id, _ in neighbors}
+    current = session.exec(
+        select(NoteNeighbor.note_id, NoteNeighbor.neighbor_id, NoteNeighbor.distance)
+        .where(NoteNeighbor.note_id.in_(list(lists)))
+    ).all()
+    for list_note_id, neighbor_id, distance in current:
+        lists[list_note_id].append((distance, neighbor_id))
+
+    rows = []
+    for neighbor_id, distance in neighbors:
+        entries = lists[neighbor_id]
+        if len(entries) >= settings.SIMILAR_NOTES_COUNT:
+            farthest_distance, farthest_id = max(entries)
+            if distance >= farthest_distance:
+                continue
+            session.execute(
+                delete(NoteNeighbor)
+                .where(NoteNeighbor.note_id == neighbor_id, NoteNeighbor.neighbor_id == farthest_id)
+            )
+        rows.append({"note_id": neighbor_id, "neighbor_id": note_id, "distance": distance})
+    if rows:
+        session.execute(insert(NoteNeighbor), rows)
+
+
+def _remove(session: Session, note_id: int) -> list[int]:
+    """
+    Deletes the list of a note and its entries in other lists. Returns the ids
+    of the notes whose lists lost an entry.
+    """
+    listed_by = session.exec(select(NoteNeighbor.note_id).where(NoteNeighbor.neighbor_id == note_id)).all()
+    session.execute(
+        delete(NoteNeighbor).where(or_(NoteNeighbor.note_id == note_id, NoteNeighbor.neighbor_id == note_id))
+    )
+    return list(listed_by)
+
+
+def refresh_neighbors(*, session: Session, note_ids: list[int]) -> None:
+    """
+    Recomputes the lists of the given notes from scratch. The caller commits.
+    """
+    if not note_ids:
+        return
+    _lock_lists(session, note_ids)
+    session.execute(delete(NoteNeighbor).where(NoteNeighbor.note_id.in_(note_ids)))
+    notes = session.exec(
+        select(Note.id, Note.owner_id, Note.vector, Note.embedding_model)
+        .where(Note.id.in_(note_ids), Note.vector.is_not(None))
+    ).all()
+    for note_id, owner_id, vector, embedding_model in notes:
+        _insert(session, note_id, _nearest(session, note_id, owner_id, vector, embedding_model))
+
+
+def update_note_neighbors(*, session: Session, note: Note) -> None:
+    """
+    Updates the precomputed neighbor lists after the vector of a flushed note
+    was set or changed. The caller commits.
+
+    The note gets a fresh list of its nearest notes and is added to their lists
+    where it is close enough; reverse neighbors are approximated by the note's
+    own nearest notes, like in other incrementally built k-NN graphs. Lists that
+    contained the note's previous vector are recomputed.
+
+    The rows of the note and of every list it changes are locked first.
+    """
+    _lock_lists(session, [note.id])
+    listed_by = _remove(session, note.id)
+    if note.vector is not None:
+        neighbors = _nearest(session, note.id, note.owner_id, note.vector, note.embedding_model)
+        _lock_lists(session, [*listed_by, *(neighbor_id for neighbor_id, _ in neighbors)])
+        _insert(session, note.id, neighbors)
+        recomputed = set(listed_by)
+        _insert_reverse(session, note.id, [
+            (neighbor_id, distance) for neighbor_id, distance in neighbors if neighbor_id not in recomputed
+        ])
+    refresh_neighbors(session=session, note_ids=listed_by)
+
+
+def remove_note_neighbors(*, session: Session, note_id: int) -> list[int]:
+    """
+    Deletes the neighbor rows of a note before the note itself is deleted.
+    Returns the notes whose lists should be refreshed once the note is gone.
+    """
+    return _remove(session, note_id)
+
+
+def similar_notes(*, session: Session, note: Note, limit: int, summary: bool = False) -> list[tuple[Note, float]]:
+    """
+    Get the notes most similar to a note, closest first, with their similarity.
+
+    Reads the precomputed list of the note. Notes without one, e.g. embedded
+    before the lists existed, are compared against the other notes directly.
+    """
+    if note.vector is None:
+        return []
+    neighbors = session.exec(
+        select(NoteNeighbor.neighbor_id, NoteNeighbor.distance)
+        .where(NoteNeighbor.note_id == note.id)
+        .order_by(NoteNeighbor.distance, NoteNeighbor.neighbor_id)
+        .limit(limit)
+    ).all()
+    if not neighbors:
+        neighbors = _nearest(session, note.id, note.owner_id, note.vector, note.embedding_model)[:limit]
+    return note_crud.get_similar_notes(session=session, neighbors=list(neighbors), summary=summary)
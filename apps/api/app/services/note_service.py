@@ -1,14 +1,63 @@
+import asyncio
+from typing import List
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException
-from ..models import Note, User, Folder
-from ..schemas import NoteCreate, NoteUpdate
-from . import ai_service, tag_service
+from ..models import Note, User, Folder, Tag
+from ..schemas import NoteCreate, NoteUpdate, NoteRead, NoteBatchItemResult
+from . import ai_service, tag_service, enrichment_service, vector_search_service, note_neighbor_service
 from ..crud import note_crud
+from ..db import release_connection
+from ..config import settings
 
-def create_note_service(*, session: Session, note_in: NoteCreate, owner: User) -> Note:
+def _enrich_in_background() -> bool:
+    return settings.NOTE_ENRICHMENT_MODE == "background"
+
+def _enrichment_incomplete(ai_response: dict | None, embedding: list[float] | None) -> bool:
+    """
+    Whether a synchronous enrichment failed and should be retried by the background workers.
+    """
+    return ai_service.client is not None and (ai_response is None or embedding is None)
+
+async def _analyze_and_embed(text: str) -> tuple[dict | None, list[float] | None]:
+    """
+    Runs the AI analysis and the embedding of a text concurrently.
+    """
+    ai_response, embedding = await asyncio.gather(
+        ai_service.analyze_text_async(text), ai_service.get_embedding_async(text)
+    )
+    return ai_response, embedding
+
+async def create_note_service(*, session: AsyncSession, note_in: NoteCreate, owner: User) -> NoteRead:
     """
     Business logic for creating a note.
+
+    In background enrichment mode the note is saved right away and an
+    enrichment job fills in the AI fields later. In sync mode the AI analysis
+    and the embedding run first, without a database connection, and a failed
+    enrichment is also queued so the note can still be completed, or marked as
+    failed if no enrichment workers run.
     """
+    background = _enrich_in_background()
+    ai_response, embedding = None, None
+    if not background:
+        await release_connection(session)
+        ai_response, embedding = await _analyze_and_embed(note_in.text)
+
+    return await session.run_sync(lambda sync_session: _save_note(
+        session=sync_session, note_in=note_in, owner=owner,
+        ai_response=ai_response, embedding=embedding, background=background
+    ))
+
+def _save_note(
+    *,
+    session: Session,
+    note_in: NoteCreate,
+    owner: User,
+    ai_response: dict | None,
+    embedding: list[float] | None,
+    background: bool
+) -> NoteRead:
     # Determine the folder for the note
     folder_id = note_in.folder_id
     if not folder_id:
@@ -19,8 +68,10 @@ def create_note_service(*, session: Session, note_in: NoteCreate, owner: User) -
             raise HTTPException(status_code=400, detail="Default folder not found for user.")
         folder_id = default_folder.id
 
-    # Get AI analysis
-    ai_response = ai_service.analyze_text(note_in.text)
+    # Get or create tags
+    tags = tag_service.get_or_create_tags_db(db=session, owner=owner, tag_names=note_in.tags)
+
+    # Apply the AI analysis
     note_type = "word"
     note_data = None
     corrected_text = note_in.text
@@ -29,12 +80,6 @@ def create_note_service(*, session: Session, note_in: NoteCreate, owner: User) -
         note_data = ai_response.get("data")
         corrected_text = ai_response.get("corrected_text", note_in.text)
 
-    # Get or create tags
-    tags = tag_service.get_or_create_tags_db(db=session, owner=owner, tag_names=note_in.tags)
-    
-    # Get embedding
-    embedding = ai_service.get_embedding(note_in.text)
-
     db_note = Note(
         text=note_in.text,
         corrected_text=corrected_text,
@@ -42,49 +87,248 @@ def create_note_service(*, session: Session, note_in: NoteCreate, owner: User) -
         translation=note_data,
         owner_id=owner.id,
         folder_id=folder_id,
-        tags=tags,
-        vector=embedding
+        tags=tags
     )
+    note_crud.set_note_vector(note=db_note, vector=embedding)
     
     created_note = note_crud.create_note_db(session=session, note=db_note)
+    if created_note.vector is not None:
+        note_neighbor_service.update_note_neighbors(session=session, note=created_note)
+    enqueued = False
+    if background or _enrichment_incomplete(ai_response, embedding):
+        enqueued = enrichment_service.enqueue_note(session=session, note=created_note) is not None
     session.commit()
+    if enqueued:
+        enrichment_service.notify_workers()
     session.refresh(created_note)
-    return created_note
+    vector_search_service.index_note(created_note)
+    return NoteRead.model_validate(created_note)
+
+async def create_notes_batch_service(
+    *, session: AsyncSession, notes_in: List[NoteCreate], owner: User
+) -> List[NoteBatchItemResult]:
+    """
+    Business logic for creating many notes at once.
+
+    Items are validated first, then AI analysis runs concurrently (capped by
+    NOTE_BATCH_CONCURRENCY) while the embeddings are requested in batches
+    through ai_service.get_embeddings_async. Tags and folders are resolved once
+    for the whole batch, and all notes are inserted in a single transaction.
+    Invalid items are reported per item instead of failing the whole batch. In
+    background enrichment mode the AI calls are skipped and an enrichment job is
+    queued per note.
+    """
+    results, valid_indexes, folders_by_id, default_folder = await session.run_sync(
+        lambda sync_session: _validate_batch(session=sync_session, notes_in=notes_in, owner=owner)
+    )
+    if not valid_indexes:
+        return results
+
+    texts = [notes_in[idx].text for idx in valid_indexes]
+    background = _enrich_in_background()
+    if background:
+        analyses = [None] * len(texts)
+        embeddings = [None] * len(texts)
+    else:
+        await release_connection(session)
+        semaphore = asyncio.Semaphore(max(1, settings.NOTE_BATCH_CONCURRENCY))
+
+        async def analyze(text: str) -> dict | None:
+            async with semaphore:
+                return await ai_service.analyze_text_async(text)
 
-def update_note_service(*, session: Session, db_note: Note, note_in: NoteUpdate, re_analyze: bool) -> Note:
+        *analyses, embeddings = await asyncio.gather(
+            *(analyze(text) for text in texts), ai_service.get_embeddings_async(texts)
+        )
+
+    return await session.run_sync(lambda sync_session: _save_notes_batch(
+        session=sync_session, notes_in=notes_in, owner=owner, results=results,
+        valid_indexes=valid_indexes, folders_by_id=folders_by_id, default_folder=default_folder,
+        analyses=analyses, embeddings=embeddings, background=background
+    ))
+
+def _validate_batch(
+    *, session: Session, notes_in: List[NoteCreate], owner: User
+) -> tuple[List[NoteBatchItemResult], List[int], dict[int, Folder], Folder | None]:
+    """
+    Checks every item of a batch and resolves the folders they reference.
+    Returns the per-item results, the indexes of the valid items and the folders.
+    """
+    if not notes_in:
+        raise HTTPException(status_code=400, detail="The batch contains no notes.")
+    if len(notes_in) > settings.NOTE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.NOTE_BATCH_MAX_ITEMS} notes."
+        )
+
+    results = [NoteBatchItemResult(index=idx, text=note_in.text) for idx, note_in in enumerate(notes_in)]
+
+    # Resolve every folder referenced by the batch in a single query
+    requested_folder_ids = {note_in.folder_id for note_in in notes_in if note_in.folder_id}
+    folder_filter = Folder.name == "default"
+    if requested_folder_ids:
+        folder_filter = folder_filter | Folder.id.in_(requested_folder_ids)
+    folders = session.exec(select(Folder).where(Folder.owner_id == owner.id, folder_filter)).all()
+    folders_by_id = {folder.id: folder for folder in folders}
+    default_folder = next((folder for folder in folders if folder.name == "default"), None)
+
+    valid_indexes = []
+    for idx, note_in in enumerate(notes_in):
+        if not note_in.text.strip():
+            results[idx].error = "Note text must not be empty."
+        elif len(note_in.text) > 2000:
+            results[idx].error = "Note text must be at most 2000 characters."
+        elif note_in.folder_id and note_in.folder_id not in folders_by_id:
+            results[idx].error = "Folder not found."
+        elif not note_in.folder_id and not default_folder:
+            results[idx].error = "Default folder not found for user."
+        else:
+            valid_indexes.append(idx)
+
+    return results, valid_indexes, folders_by_id, default_folder
+
+def _save_notes_batch(
+    *,
+    session: Session,
+    notes_in: List[NoteCreate],
+    owner: User,
+    results: List[NoteBatchItemResult],
+    valid_indexes: List[int],
+    folders_by_id: dict[int, Folder],
+    default_folder: Folder | None,
+    analyses: List[dict | None],
+    embeddings: List[list[float] | None],
+    background: bool
+) -> List[NoteBatchItemResult]:
+    # Get or create all tags of the batch at once
+    tag_names = list(dict.fromkeys(
+        name for idx in valid_indexes for name in (notes_in[idx].tags or [])
+    ))
+    tags = tag_service.get_or_create_tags_db(db=session, owner=owner, tag_names=tag_names)
+    tags_by_name = {tag.name.lower(): tag for tag in tags}
+
+    db_notes: List[tuple[int, Note]] = []
+    for idx, ai_response, embedding in zip(valid_indexes, analyses, embeddings):
+        note_in = notes_in[idx]
+        note_type = "word"
+        note_data = None
+        corrected_text = note_in.text
+        if ai_response:
+            note_type = ai_response.get("type", "word")
+            note_data = ai_response.get("data")
+            corrected_text = ai_response.get("corrected_text", note_in.text)
+
+        note_tags: List[Tag] = []
+        for name in note_in.tags or []:
+            tag = tags_by_name[name.lower()]
+            if tag not in note_tags:
+                note_tags.append(tag)
+
+        folder = folders_by_id[note_in.folder_id] if note_in.folder_id else default_folder
+        db_notes.append((idx, Note(
+            text=note_in.text,
+            corrected_text=corrected_text,
+            type=note_type,
+            translation=note_data,
+            owner_id=owner.id,
+            folder_id=folder.id,
+            folder=folder,
+            tags=note_tags
+        )))
+        note_crud.set_note_vector(note=db_notes[-1][1], vector=embedding)
+
+    session.add_all([note for _, note in db_notes])
+    enqueued = False
+    for (_, note), ai_response, embedding in zip(db_notes, analyses, embeddings):
+        if background or _enrichment_incomplete(ai_response, embedding):
+            if enrichment_service.enqueue_note(session=session, note=note) is not None:
+                enqueued = True
+    session.flush()
+    for _, note in db_notes:
+        if note.vector is not None:
+            note_neighbor_service.update_note_neighbors(session=session, note=note)
+
+    # Serialize before committing so the response does not reload every note
+    for idx, note in db_notes:
+        results[idx].note = NoteRead.model_validate(note)
+    vectors = [(note.id, note.vector, note.embedding_model) for _, note in db_notes]
+
+    session.commit()
+    if enqueued:
+        enrichment_service.notify_workers()
+    if settings.VECTOR_INDEX_MEMORY_ENABLED:
+        for note_id, vector, embedding_model in vectors:
+            vector_search_service.vector_index.update_note(
+                owner_id=owner.id, note_id=note_id, vector=vector, embedding_model=embedding_model
+            )
+    return results
+
+async def update_note_service(*, session: AsyncSession, db_note: Note, note_in: NoteUpdate, re_analyze: bool) -> NoteRead:
     """
     Business logic for updating a note.
+
+    A changed text is embedded again, and with `re_analyze` also analyzed again,
+    before the note is written, so no database connection is held meanwhile.
     """
+    ai_response, embedding = None, None
     if re_analyze and note_in.text:
-        ai_response = ai_service.analyze_text(note_in.text)
-        update_data = {
+        await release_connection(session)
+        ai_response, embedding = await _analyze_and_embed(note_in.text)
+    elif note_in.text is not None:
+        await release_connection(session)
+        embedding = await ai_service.get_embedding_async(note_in.text)
+
+    return await session.run_sync(lambda sync_session: _update_note(
+        session=sync_session, db_note=db_note, note_in=note_in, re_analyze=re_analyze,
+        ai_response=ai_response, embedding=embedding
+    ))
+
+def _update_note(
+    *,
+    session: Session,
+    db_note: Note,
+    note_in: NoteUpdate,
+    re_analyze: bool,
+    ai_response: dict | None,
+    embedding: list[float] | None
+) -> NoteRead:
+    if re_analyze and note_in.text:
+        update_payload = NoteUpdate.model_validate({
             "text": note_in.text,
-            "type": "word",
-            "translation": None,
-            "corrected_text": note_in.text,
             "tags": note_in.tags,
             "folder_id": note_in.folder_id
-        }
-        if ai_response:
-            update_data["type"] = ai_response.get("type", "word")
-            update_data["translation"] = ai_response.get("data")
-            update_data["corrected_text"] = ai_response.get("corrected_text", note_in.text)
-        
-        update_payload = NoteUpdate.model_validate(update_data)
+        })
         updated_note = note_crud.update_note_db(session=session, db_note=db_note, note_in=update_payload)
+
+        updated_note.type = "word"
+        updated_note.translation = None
+        updated_note.corrected_text = note_in.text
+        if ai_response:
+            updated_note.type = ai_response.get("type", "word")
+            updated_note.translation = ai_response.get("data")
+            updated_note.corrected_text = ai_response.get("corrected_text", note_in.text)
+        note_crud.set_note_vector(note=updated_note, vector=embedding)
+        note_neighbor_service.update_note_neighbors(session=session, note=updated_note)
     else:
         updated_note = note_crud.update_note_db(session=session, db_note=db_note, note_in=note_in)
         if note_in.text is not None:
             updated_note.corrected_text = updated_note.text
-            updated_note.vector = ai_service.get_embedding(updated_note.text)
+            note_crud.set_note_vector(note=updated_note, vector=embedding)
+            note_neighbor_service.update_note_neighbors(session=session, note=updated_note)
 
     session.commit()
     session.refresh(updated_note)
-    return updated_note
+    vector_search_service.index_note(updated_note)
+    return NoteRead.model_validate(updated_note)
 
 def delete_note_service(*, session: Session, note: Note) -> None:
     """
     Business logic for deleting a note.
     """
+    owner_id, note_id = note.owner_id, note.id
+    listed_by = note_neighbor_service.remove_note_neighbors(session=session, note_id=note_id)
     note_crud.delete_note_db(session=session, note=note)
-    session.commit()
\ No newline at end of file
+    note_neighbor_service.refresh_neighbors(session=session, note_ids=listed_by)
+    session.commit()
+    vector_search_service.unindex_note(owner_id=owner_id, note_id=note_id)
\ No newline at end of file
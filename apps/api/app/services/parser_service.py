@@ -1,3 +1,4 @@
+import asyncio
 import io
 from fastapi import UploadFile, HTTPException
 
@@ -42,16 +43,19 @@ async def extract_text_from_file(file: UploadFile) -> str:
     filename = file.filename.lower()
 
     if filename.endswith(".pdf"):
-        return _extract_text_from_pdf(file_stream)
+        extractor = _extract_text_from_pdf
     elif filename.endswith(".docx"):
-        return _extract_text_from_docx(file_stream)
+        extractor = _extract_text_from_docx
     elif filename.endswith(".pptx"):
-        return _extract_text_from_pptx(file_stream)
+        extractor = _extract_text_from_pptx
     elif filename.endswith((".txt", ".md")):
-        return _extract_text_from_txt(file_stream)
+        extractor = _extract_text_from_txt
     else:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.filename}")
 
+    # Document parsing is CPU-bound, so run it in a worker thread instead of the event loop
+    return await asyncio.to_thread(extractor, file_stream)
+
 from . import ai_service
 from pydantic import BaseModel, Field
 from typing import List
@@ -90,11 +94,11 @@ Analyze the user-provided text and extract a list of all noteworthy items.
 **Now, analyze the following text and provide the JSON output:**
 """
 
-def extract_learning_items_from_text(text: str) -> dict:
+async def extract_learning_items_from_text(text: str) -> dict:
     """
     Sends the extracted text to an AI service to get a list of learning items (words, phrases, sentences).
     """
-    json_response = ai_service.call_ai(
+    json_response = await ai_service.call_ai_async(
         system_prompt=AI_PARSER_PROMPT,
         user_prompt=text
     )
@@ -1,27 +1,37 @@
 from fastapi import HTTPException
-from sqlmodel import Session, select, func
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 from typing import List
 from datetime import datetime, timezone
 
 from ..models import PracticeList, PracticeListItem, Note, User
 from ..schemas import PracticeListCreate, PracticeListUpdate, PracticeListRead, PracticeListDetail, PracticeListItemCreate, PracticeListReorderRequest
 
-def create_practice_list_service(*, session: Session, practice_list_in: PracticeListCreate, owner: User) -> PracticeListRead:
+def with_notes(statement):
+    """
+    Loads the notes of the selected practice list items with their tags and
+    folder, which item responses include. An async session cannot load them lazily.
+    """
+    return statement.options(
+        selectinload(PracticeListItem.note).options(selectinload(Note.tags), joinedload(Note.folder))
+    )
+
+async def create_practice_list_service(*, session: AsyncSession, practice_list_in: PracticeListCreate, owner: User) -> PracticeListRead:
     db_practice_list = PracticeList.model_validate(practice_list_in, update={"owner_id": owner.id})
     session.add(db_practice_list)
     try:
-        session.commit()
-        session.refresh(db_practice_list)
+        await session.commit()
+        await session.refresh(db_practice_list)
         result = PracticeListRead.model_validate(db_practice_list)
         result.item_count = 0
         return result
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409, detail="A practice list with this name already exists.")
 
-def get_practice_lists_service(*, session: Session, owner: User) -> List[PracticeListRead]:
+async def get_practice_lists_service(*, session: AsyncSession, owner: User) -> List[PracticeListRead]:
     item_count_subquery = (
         select(PracticeListItem.practice_list_id, func.count(PracticeListItem.id).label("count"))
         .group_by(PracticeListItem.practice_list_id)
@@ -35,7 +45,7 @@ def get_practice_lists_service(*, session: Session, owner: User) -> List[Practic
         .order_by(PracticeList.created_at.desc())
     )
     
-    results = session.exec(statement).all()
+    results = (await session.exec(statement)).all()
     
     practice_lists = []
     for practice_list, count in results:
@@ -45,26 +55,22 @@ def get_practice_lists_service(*, session: Session, owner: User) -> List[Practic
     
     return practice_lists
 
-def get_practice_list_details_service(*, session: Session, practice_list_id: int, owner: User) -> PracticeListDetail:
-    practice_list = session.get(PracticeList, practice_list_id)
+async def get_practice_list_details_service(*, session: AsyncSession, practice_list_id: int, owner: User) -> PracticeListDetail:
+    practice_list = await session.get(PracticeList, practice_list_id)
     if not practice_list or practice_list.owner_id != owner.id:
         raise HTTPException(status_code=404, detail="Practice list not found")
     
-    items = session.exec(
-        select(PracticeListItem)
-        .options(selectinload(PracticeListItem.note))
+    items = (await session.exec(
+        with_notes(select(PracticeListItem))
         .where(PracticeListItem.practice_list_id == practice_list_id)
         .order_by(PracticeListItem.order_index)
-    ).all()
-    
-    result = PracticeListDetail.model_validate(practice_list)
-    result.item_count = len(items)
-    result.items = items
+    )).all()
     
-    return result
+    # Built from the columns, as validating the model would read its unloaded items
+    return PracticeListDetail(**practice_list.model_dump(), item_count=len(items), items=items)
 
-def update_practice_list_service(*, session: Session, practice_list_id: int, practice_list_in: PracticeListUpdate, owner: User) -> PracticeListRead:
-    practice_list = session.get(PracticeList, practice_list_id)
+async def update_practice_list_service(*, session: AsyncSession, practice_list_id: int, practice_list_in: PracticeListUpdate, owner: User) -> PracticeListRead:
+    practice_list = await session.get(PracticeList, practice_list_id)
     if not practice_list or practice_list.owner_id != owner.id:
         raise HTTPException(status_code=404, detail="Practice list not found")
 
@@ -76,45 +82,45 @@ def update_practice_list_service(*, session: Session, practice_list_id: int, pra
     session.add(practice_list)
     
     try:
-        session.commit()
-        session.refresh(practice_list)
-        item_count = session.exec(
+        await session.commit()
+        await session.refresh(practice_list)
+        item_count = (await session.exec(
             select(func.count(PracticeListItem.id))
             .where(PracticeListItem.practice_list_id == practice_list_id)
-        ).scalar_one_or_none() or 0
+        )).one()
         
         result = PracticeListRead.model_validate(practice_list)
         result.item_count = item_count
         return result
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=409, detail="A practice list with this name already exists.")
 
-def delete_practice_list_service(*, session: Session, practice_list_id: int, owner: User):
-    practice_list = session.get(PracticeList, practice_list_id)
+async def delete_practice_list_service(*, session: AsyncSession, practice_list_id: int, owner: User):
+    practice_list = await session.get(PracticeList, practice_list_id)
     if not practice_list or practice_list.owner_id != owner.id:
         raise HTTPException(status_code=404, detail="Practice list not found")
     
-    session.delete(practice_list)
-    session.commit()
+    await session.delete(practice_list)
+    await session.commit()
     return
 
-def add_items_to_list_service(*, session: Session, practice_list_id: int, item_create: PracticeListItemCreate, owner: User) -> List[PracticeListItem]:
-    practice_list = session.get(PracticeList, practice_list_id)
+async def add_items_to_list_service(*, session: AsyncSession, practice_list_id: int, item_create: PracticeListItemCreate, owner: User) -> List[PracticeListItem]:
+    practice_list = await session.get(PracticeList, practice_list_id)
     if not practice_list or practice_list.owner_id != owner.id:
         raise HTTPException(status_code=404, detail="Practice list not found")
 
     existing_note_ids = set(
-        session.exec(
+        (await session.exec(
             select(PracticeListItem.note_id)
             .where(PracticeListItem.practice_list_id == practice_list_id)
-        ).all()
+        )).all()
     )
     
-    max_order = session.exec(
+    max_order = (await session.exec(
         select(func.max(PracticeListItem.order_index))
         .where(PracticeListItem.practice_list_id == practice_list_id)
-    ).first() or -1
+    )).first() or -1
     
     # Filter out note_ids that are already in the list
     new_note_ids = [note_id for note_id in item_create.note_ids if note_id not in existing_note_ids]
@@ -123,10 +129,10 @@ def add_items_to_list_service(*, session: Session, practice_list_id: int, item_c
         return []
     
     # Fetch all notes at once to avoid N+1 query
-    valid_notes = session.exec(
+    valid_notes = (await session.exec(
         select(Note.id)
         .where(Note.id.in_(new_note_ids), Note.owner_id == owner.id)
-    ).all()
+    )).all()
     
     valid_note_ids = set(valid_notes)
     
@@ -146,42 +152,45 @@ def add_items_to_list_service(*, session: Session, practice_list_id: int, item_c
     if added_items:
         practice_list.updated_at = datetime.now(timezone.utc)
         session.add(practice_list)
-        session.commit()
-        for item in added_items:
-            session.refresh(item)
+        await session.commit()
+        added_items = (await session.exec(
+            with_notes(select(PracticeListItem))
+            .where(PracticeListItem.id.in_([item.id for item in added_items]))
+            .order_by(PracticeListItem.order_index)
+        )).all()
     
     return added_items
 
-def remove_item_from_list_service(*, session: Session, practice_list_id: int, item_id: int, owner: User):
-    item = session.exec(
+async def remove_item_from_list_service(*, session: AsyncSession, practice_list_id: int, item_id: int, owner: User):
+    item = (await session.exec(
         select(PracticeListItem)
         .join(PracticeList)
         .where(PracticeListItem.id == item_id, PracticeList.owner_id == owner.id, PracticeListItem.practice_list_id == practice_list_id)
-    ).first()
+    )).first()
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found in the specified practice list.")
         
-    practice_list = session.get(PracticeList, practice_list_id)
+    practice_list = await session.get(PracticeList, practice_list_id)
     practice_list.updated_at = datetime.now(timezone.utc)
 
-    session.delete(item)
+    await session.delete(item)
     session.add(practice_list)
-    session.commit()
+    await session.commit()
     return
 
-def reorder_list_items_service(*, session: Session, practice_list_id: int, reorder_request: PracticeListReorderRequest, owner: User):
-    practice_list = session.get(PracticeList, practice_list_id)
+async def reorder_list_items_service(*, session: AsyncSession, practice_list_id: int, reorder_request: PracticeListReorderRequest, owner: User):
+    practice_list = await session.get(PracticeList, practice_list_id)
     if not practice_list or practice_list.owner_id != owner.id:
         raise HTTPException(status_code=404, detail="Practice list not found")
     
     # Fetch all items to be reordered in one query to ensure they belong to the user and list
-    items_to_reorder = session.exec(
+    items_to_reorder = (await session.exec(
         select(PracticeListItem).where(
             PracticeListItem.id.in_(reorder_request.item_ids),
             PracticeListItem.practice_list_id == practice_list_id
         )
-    ).all()
+    )).all()
 
     item_map = {item.id: item for item in items_to_reorder}
 
@@ -195,5 +204,5 @@ def reorder_list_items_service(*, session: Session, practice_list_id: int, reord
     
     practice_list.updated_at = datetime.now(timezone.utc)
     session.add(practice_list)
-    session.commit()
+    await session.commit()
     return
@@ -1,6 +1,7 @@
 from typing import List
 from sqlalchemy import func
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from ..models import Tag, User
 from .color_service import generate_color_from_string
 
@@ -62,9 +63,9 @@ def get_or_create_tags_db(db: Session, owner: User, tag_names: List[str]) -> Lis
             
     return tags_to_return
 
-def get_tags_by_owner(*, db: Session, owner_id: int) -> List[Tag]:
+async def get_tags_by_owner(*, db: AsyncSession, owner_id: int) -> List[Tag]:
     """
     Get all tags for a specific user.
     """
     statement = select(Tag).where(Tag.owner_id == owner_id).order_by(Tag.name)
-    return db.exec(statement).all()
\ No newline at end of file
+    return (await db.exec(statement)).all()
\ No newline at end of file
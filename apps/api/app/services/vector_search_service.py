@@ -0,0 +1,315 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from sqlmodel import Session, select
+
+from ..config import settings
+from ..models import Note
+
+
+def _nearest_positions(distances: np.ndarray, max_distance: float, limit: int) -> np.ndarray:
+    """
+    Returns the positions of the at most `limit` smallest distances below max_distance, smallest first.
+    """
+    candidates = np.flatnonzero(distances < max_distance)
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(distances[candidates], limit)[:limit]]
+    return candidates[np.argsort(distances[candidates], kind="stable")]
+
+
+def _nearest_ids(
+    ids: np.ndarray, distances: np.ndarray, max_distance: float, limit: int
+) -> list[int]:
+    """
+    Returns the ids of the at most `limit` closest vectors within max_distance, closest first.
+    """
+    return ids[_nearest_positions(distances, max_distance, limit)].tolist()
+
+
+def nearest_notes(
+    *,
+    session: Session,
+    filters: list,
+    search_embedding: list[float],
+    embedding_model: str | None,
+    max_distance: float,
+    limit: int,
+) -> list[int]:
+    """
+    Finds the notes nearest to the embedding on databases without pgvector.
+    Returns note ids, closest first.
+    """
+    return [
+        note_id for note_id, _ in nearest_note_distances(
+            session=session,
+            filters=filters,
+            search_embedding=search_embedding,
+            embedding_model=embedding_model,
+            max_distance=max_distance,
+            limit=limit,
+        )
+    ]
+
+
+def nearest_note_distances(
+    *,
+    session: Session,
+    filters: list,
+    search_embedding: list[float],
+    embedding_model: str | None,
+    max_distance: float,
+    limit: int,
+) -> list[tuple[int, float]]:
+    """
+    Finds the notes nearest to the embedding on databases without pgvector.
+
+    The float32 vectors of the matching notes are stacked into one matrix, so
+    the distances to all of them come from a single matrix-vector product.
+    Returns (note id, distance) pairs, closest first.
+    """
+    rows = session.exec(
+        select(Note.id, Note.vector).where(
+            *filters,
+            # Only compare against vectors produced by the same model as the query embedding
+            Note.embedding_model == embedding_model,
+            Note.vector.is_not(None),
+        )
+    ).all()
+    if not rows:
+        return []
+
+    ids = np.fromiter((note_id for note_id, _ in rows), dtype=np.int64, count=len(rows))
+    matrix = np.stack([vector for _, vector in rows])
+    query = np.asarray(search_embedding, dtype=np.float32)
+
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b
+    squared = np.einsum("ij,ij->i", matrix, matrix) + query @ query - 2 * (matrix @ query)
+    distances = np.sqrt(np.maximum(squared, 0))
+    positions = _nearest_positions(distances, max_distance, limit)
+    return list(zip(ids[positions].tolist(), distances[positions].tolist()))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class _OwnerVectors:
+    """
+    The normalized vectors of one user's notes. Rows live in a buffer that grows
+    like a list, so adding a note does not copy the whole matrix.
+    """
+
+    def __init__(self, model: str, ids: np.ndarray, matrix: np.ndarray):
+        self.model = model
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.size = len(ids)
+        capacity = max(16, self.size)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.ids[:self.size] = ids
+        self.matrix = np.zeros((capacity, matrix.shape[1] if self.size else 0), dtype=np.float32)
+        if self.size:
+            self.matrix[:self.size] = _normalize(matrix)
+        self.positions = {int(note_id): idx for idx, note_id in enumerate(ids)}
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.matrix.nbytes
+
+    def upsert(self, note_id: int, vector: np.ndarray) -> None:
+        vector = _normalize(np.asarray(vector, dtype=np.float32))
+        if self.matrix.shape[1] != len(vector):
+            if self.size:
+                return  # A vector of another dimension cannot come from the same model
+            self.matrix = np.zeros((len(self.ids), len(vector)), dtype=np.float32)
+
+        idx = self.positions.get(note_id)
+        if idx is None:
+            if self.size == len(self.ids):
+                capacity = 2 * len(self.ids)
+                self.ids = np.resize(self.ids, capacity)
+                matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+                matrix[:self.size] = self.matrix[:self.size]
+                self.matrix = matrix
+            idx = self.size
+            self.size += 1
+            self.positions[note_id] = idx
+            self.ids[idx] = note_id
+        self.matrix[idx] = vector
+
+    def remove(self, note_id: int) -> None:
+        idx = self.positions.pop(note_id, None)
+        if idx is None:
+            return
+        # Move the last row into the gap
+        last = self.size - 1
+        if idx != last:
+            moved_id = int(self.ids[last])
+            self.ids[idx] = moved_id
+            self.matrix[idx] = self.matrix[last]
+            self.positions[moved_id] = idx
+        self.size = last
+
+
+class VectorIndex:
+    """
+    In-process index of the normalized note vectors of recently active users.
+
+    The vectors of a user are loaded from Note.vector on their first semantic
+    search, kept up to date by the note services after every committed write,
+    and reloaded after ttl_seconds to pick up writes of other processes. Users
+    that searched least recently are evicted once the matrices exceed the
+    memory budget.
+    """
+
+    def __init__(self, memory_budget_bytes: int, ttl_seconds: int):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.ttl_seconds = ttl_seconds
+        self._owners: OrderedDict[int, _OwnerVectors] = OrderedDict()
+        # Bumped on every change of a user's notes, so a load that overlapped one is not kept
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _load(self, session: Session, owner_id: int, model: str) -> _OwnerVectors:
+        rows = session.exec(
+            select(Note.id, Note.vector).where(
+                Note.owner_id == owner_id,
+                Note.embedding_model == model,
+                Note.vector.is_not(None),
+            )
+        ).all()
+        ids = np.fromiter((note_id for note_id, _ in rows), dtype=np.int64, count=len(rows))
+        matrix = np.stack([np.asarray(vector, dtype=np.float32) for _, vector in rows]) if rows else np.zeros((0, 0), dtype=np.float32)
+        self.loads += 1
+        return _OwnerVectors(model=model, ids=ids, matrix=matrix)
+
+    def _evict(self) -> None:
+        total = sum(owner.nbytes for owner in self._owners.values())
+        # The most recently used user is kept even if it exceeds the budget alone
+        while total > self.memory_budget_bytes and len(self._owners) > 1:
+            _, evicted = self._owners.popitem(last=False)
+            total -= evicted.nbytes
+
+    def _changed(self, owner_id: int) -> None:
+        with self._lock:
+            self._generations[owner_id] = self._generations.get(owner_id, 0) + 1
+
+    def _get(self, session: Session, owner_id: int, model: str) -> _OwnerVectors:
+        with self._lock:
+            owner = self._owners.get(owner_id)
+            if owner and owner.model == model and time.monotonic() - owner.loaded_at < self.ttl_seconds:
+                self._owners.move_to_end(owner_id)
+                return owner
+            generation = self._generations.get(owner_id, 0)
+
+        owner = self._load(session, owner_id, model)
+        with self._lock:
+            # A note changed while loading, and the load may have missed it. Use the
+            # vectors for this search only; the next search loads them again.
+            if self._generations.get(owner_id, 0) != generation:
+                return owner
+            self._owners[owner_id] = owner
+            self._owners.move_to_end(owner_id)
+            self._evict()
+        return owner
+
+    def nearest(
+        self,
+        *,
+        session: Session,
+        owner_id: int,
+        search_embedding: list[float],
+        embedding_model: str | None,
+        max_distance: float,
+        limit: int,
+        candidate_ids: list[int] | None = None,
+    ) -> list[int]:
+        """
+        Returns the ids of the user's notes nearest to the embedding, closest
+        first. `candidate_ids` restricts the search to the notes matching the
+        folder, type and tag filters.
+        """
+        if embedding_model is None:
+            return []
+        owner = self._get(session, owner_id, embedding_model)
+        query = _normalize(np.asarray(search_embedding, dtype=np.float32))
+        with owner.lock:
+            if not owner.size or owner.matrix.shape[1] != len(query):
+                return []
+            ids = owner.ids[:owner.size]
+            # For unit vectors |a - b|^2 = 2 - 2 a.b
+            similarities = owner.matrix[:owner.size] @ query
+            distances = np.sqrt(np.maximum(2 - 2 * similarities, 0))
+            if candidate_ids is not None:
+                distances[~np.isin(ids, np.asarray(candidate_ids, dtype=np.int64))] = np.inf
+            return _nearest_ids(ids.copy(), distances, max_distance, limit)
+
+    def update_note(self, *, owner_id: int, note_id: int, vector, embedding_model: str | None) -> None:
+        """
+        Applies a committed change of a note's vector, if the user is loaded.
+        """
+        self._changed(owner_id)
+        with self._lock:
+            owner = self._owners.get(owner_id)
+        if owner is None:
+            return
+        with owner.lock:
+            if vector is None or embedding_model != owner.model:
+                owner.remove(note_id)
+            else:
+                owner.upsert(note_id, vector)
+        with self._lock:
+            self._evict()
+
+    def remove_note(self, *, owner_id: int, note_id: int) -> None:
+        """
+        Removes a deleted note, if the user is loaded.
+        """
+        self._changed(owner_id)
+        with self._lock:
+            owner = self._owners.get(owner_id)
+        if owner is None:
+            return
+        with owner.lock:
+            owner.remove(note_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._owners.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._owners),
+                "vectors": sum(owner.size for owner in self._owners.values()),
+                "bytes": sum(owner.nbytes for owner in self._owners.values()),
+                "loads": self.loads,
+            }
+
+
+vector_index = VectorIndex(
+    memory_budget_bytes=settings.VECTOR_INDEX_MEMORY_BUDGET_MB * 1024 * 1024,
+    ttl_seconds=settings.VECTOR_INDEX_MEMORY_TTL_SECONDS,
+)
+
+
+def index_note(note: Note) -> None:
+    """
+    Updates the in-memory index after a note was committed.
+    """
+    if settings.VECTOR_INDEX_MEMORY_ENABLED:
+        vector_index.update_note(
+            owner_id=note.owner_id, note_id=note.id, vector=note.vector, embedding_model=note.embedding_model
+        )
+
+
+def unindex_note(*, owner_id: int, note_id: int) -> None:
+    """
+    Removes a note from the in-memory index after its deletion was committed.
+    """
+    if settings.VECTOR_INDEX_MEMORY_ENABLED:
+        vector_index.remove_note(owner_id=owner_id, note_id=note_id)
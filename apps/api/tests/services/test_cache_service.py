@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.config import settings
+from app.services import cache_service
+from app.services.cache_service import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used_entry():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" becomes the least recently used entry
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1}
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=10, ttl_seconds=5)
+    cache.set("a", 1)
+
+    now[0] += 6
+
+    assert cache.get("a") is None
+
+
+def test_analysis_cache_key_normalizes_text():
+    key = cache_service.analysis_cache_key("resilience", "model", "prompt")
+
+    assert cache_service.analysis_cache_key("  resilience\n", "model", "prompt") == key
+    assert cache_service.analysis_cache_key("ｒｅｓｉｌｉｅｎｃｅ", "model", "prompt") == key
+
+
+def test_analysis_cache_key_changes_with_model_and_prompt():
+    key = cache_service.analysis_cache_key("resilience", "model", "prompt")
+
+    assert cache_service.analysis_cache_key("resilience", "other-model", "prompt") != key
+    assert cache_service.analysis_cache_key("resilience", "model", "new prompt") != key
+
+
+def test_embeddings_round_trip_through_the_database_tier(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(cache_service, "engine", engine)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DB_ENABLED", True)
+    monkeypatch.setattr(cache_service, "_embedding_memory_cache", TTLCache(max_entries=10, ttl_seconds=60))
+    key = cache_service.embedding_cache_key("resilience", "model")
+    vector = [i / 768 for i in range(768)]
+
+    cache_service.store_embeddings("model", {key: vector})
+    # A fresh in-process tier forces the lookup to read the stored row
+    monkeypatch.setattr(cache_service, "_embedding_memory_cache", TTLCache(max_entries=10, ttl_seconds=60))
+
+    found = cache_service.get_cached_embeddings([key])
+
+    assert list(found) == [key]
+    assert found[key] == pytest.approx(vector)
+    with Session(engine) as session:
+        stored = session.exec(text("SELECT typeof(vector), length(vector) FROM embeddingcacheentry")).one()
+    assert tuple(stored) == ("blob", 768 * 4)  # Packed float32 like Note.vector
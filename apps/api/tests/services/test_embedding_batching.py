@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.services import ai_service, cache_service
+
+
+class FakeEmbeddings:
+    """Records every embeddings request and returns one-dimensional vectors."""
+
+    def __init__(self, failing_text: str | None = None):
+        self.requests: list[list[str]] = []
+        self.failing_text = failing_text
+
+    def create(self, input, model):
+        self.requests.append(list(input))
+        if self.failing_text in input:
+            raise ValueError("invalid input")
+        # Return the data out of order to make sure the service sorts by index
+        data = [SimpleNamespace(index=idx, embedding=[float(len(text))]) for idx, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+@pytest.fixture(autouse=True)
+def embedding_cache(monkeypatch):
+    # Every test starts with an empty in-process cache and no shared tier
+    cache = cache_service.TTLCache(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(cache_service, "_embedding_memory_cache", cache)
+    monkeypatch.setattr(cache_service.settings, "EMBEDDING_CACHE_DB_ENABLED", False)
+    return cache
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    def install(**kwargs):
+        embeddings = FakeEmbeddings(**kwargs)
+        monkeypatch.setattr(ai_service, "client", SimpleNamespace(embeddings=embeddings))
+        monkeypatch.setattr(ai_service.settings, "EMBEDDING_BATCH_SIZE", 2)
+        monkeypatch.setattr(ai_service.settings, "EMBEDDING_BATCH_MAX_TOKENS", 20000)
+        return embeddings
+    return install
+
+
+def test_get_embeddings_batches_by_item_limit_and_preserves_order(fake_embeddings):
+    embeddings = fake_embeddings()
+
+    result = ai_service.get_embeddings(["a", "bb", "ccc", "", "dddd"])
+
+    assert embeddings.requests == [["a", "bb"], ["ccc", "dddd"]]
+    assert result == [[1.0], [2.0], [3.0], None, [4.0]]
+
+
+def test_get_embeddings_batches_by_token_limit(fake_embeddings, monkeypatch):
+    embeddings = fake_embeddings()
+    monkeypatch.setattr(ai_service.settings, "EMBEDDING_BATCH_MAX_TOKENS", 30)
+
+    ai_service.get_embeddings(["x" * 80, "y" * 80])
+
+    assert embeddings.requests == [["x" * 80], ["y" * 80]]
+
+
+def test_get_embeddings_reports_per_item_failures(fake_embeddings):
+    embeddings = fake_embeddings(failing_text="bad")
+
+    result = ai_service.get_embeddings(["ok", "bad"])
+
+    assert embeddings.requests == [["ok", "bad"], ["ok"], ["bad"]]
+    assert result == [[2.0], None]
+
+
+def test_get_embedding_uses_batched_api(fake_embeddings):
+    embeddings = fake_embeddings()
+
+    assert ai_service.get_embedding("hello") == [5.0]
+    assert embeddings.requests == [["hello"]]
+
+
+def test_get_embeddings_serves_repeated_texts_from_cache(fake_embeddings, embedding_cache):
+    embeddings = fake_embeddings()
+
+    assert ai_service.get_embeddings(["hello", "world"]) == [[5.0], [5.0]]
+    assert ai_service.get_embeddings(["world", " hello ", "new"]) == [[5.0], [5.0], [3.0]]
+
+    # Only texts missing from the cache are sent, normalized duplicates included
+    assert embeddings.requests == [["hello", "world"], ["new"]]
+    assert embedding_cache.stats()["hits"] == 2
+
+
+def test_get_embeddings_does_not_cache_failures(fake_embeddings):
+    embeddings = fake_embeddings(failing_text="bad")
+
+    ai_service.get_embeddings(["bad"])
+    ai_service.get_embeddings(["bad"])
+
+    assert embeddings.requests == [["bad"], ["bad"]]
+
+
+def test_get_embeddings_async_batches_and_preserves_order(monkeypatch):
+    embeddings = FakeEmbeddings()
+
+    class AsyncEmbeddings:
+        async def create(self, input, model):
+            return embeddings.create(input=input, model=model)
+
+    monkeypatch.setattr(ai_service, "async_client", SimpleNamespace(embeddings=AsyncEmbeddings()))
+    monkeypatch.setattr(ai_service.settings, "EMBEDDING_BATCH_SIZE", 2)
+
+    result = asyncio.run(ai_service.get_embeddings_async(["a", "bb", "ccc"]))
+
+    assert sorted(embeddings.requests) == [["a", "bb"], ["ccc"]]
+    assert result == [[1.0], [2.0], [3.0]]
+
+
+def test_get_embeddings_async_caps_concurrent_requests(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    class AsyncEmbeddings:
+        async def create(self, input, model):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return FakeEmbeddings().create(input=input, model=model)
+
+    monkeypatch.setattr(ai_service, "async_client", SimpleNamespace(embeddings=AsyncEmbeddings()))
+    monkeypatch.setattr(ai_service.settings, "EMBEDDING_BATCH_SIZE", 1)
+    monkeypatch.setattr(ai_service.settings, "EMBEDDING_MAX_CONCURRENT_REQUESTS", 2)
+
+    result = asyncio.run(ai_service.get_embeddings_async([str(i) for i in range(6)]))
+
+    assert len(result) == 6 and all(result)
+    assert max_in_flight == 2
@@ -0,0 +1,62 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.config import settings
+from app.models import Note, EnrichmentJob
+from app.services import ai_service, enrichment_service
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_results_for_edited_text_are_discarded_and_the_job_requeued(monkeypatch):
+    engine = _engine()
+    monkeypatch.setattr(enrichment_service, "engine", engine)
+    monkeypatch.setattr(enrichment_service, "notify_workers", lambda: None)
+    monkeypatch.setattr(ai_service, "client", object())
+    monkeypatch.setattr(ai_service, "get_embedding", lambda text: [0.0] * 768)
+
+    def analyze_text(text):
+        # The user edits the note while the model is still analyzing the old text
+        with Session(engine) as session:
+            note = session.get(Note, 1)
+            note.text, note.corrected_text = "new text", "new text"
+            session.add(note)
+            session.commit()
+        return {"type": "sentence", "data": {"old": True}, "corrected_text": text}
+
+    monkeypatch.setattr(ai_service, "analyze_text", analyze_text)
+
+    with Session(engine) as session:
+        session.add(Note(id=1, text="old text", type="word", owner_id=1, enrichment_status="pending"))
+        session.add(EnrichmentJob(id=1, note_id=1, status="running", attempts=1))
+        session.commit()
+
+    enrichment_service.process_job(1)
+
+    with Session(engine) as session:
+        note, job = session.get(Note, 1), session.get(EnrichmentJob, 1)
+        assert (note.text, note.corrected_text, note.translation) == ("new text", "new text", None)
+        assert note.enrichment_status == "pending"
+        assert (job.status, job.attempts) == ("queued", 0)
+
+
+def test_notes_are_marked_failed_instead_of_queued_without_workers(monkeypatch):
+    monkeypatch.setattr(settings, "ENRICHMENT_WORKERS", 0)
+    with Session(_engine()) as session:
+        note = Note(id=1, text="text", type="word", owner_id=1)
+        session.add(note)
+
+        assert enrichment_service.enqueue_note(session=session, note=note) is None
+        session.commit()
+        assert note.enrichment_status == "failed"
+        assert session.get(EnrichmentJob, 1) is None
+
+        with pytest.raises(HTTPException) as error:
+            enrichment_service.retry_note(session=session, note=note)
+        assert error.value.status_code == 503
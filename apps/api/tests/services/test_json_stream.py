@@ -0,0 +1,42 @@
+import json
+
+from app.services.json_stream import IncrementalJSONParser
+
+
+DOCUMENT = {
+    "scores": {
+        "Plot Coherence": {"score": 4, "max": 7, "grade": "C", "feedback": "Says \"ok\", {not} [json]"},
+        "Language Expression": {"score": 3, "max": 6, "grade": "C", "feedback": "Fine."},
+    },
+    "total_score": 7,
+    "max_score": 25,
+    "suggestion_cards": [
+        {"card_id": "vocab_1", "type": "vocabulary", "priority": "high", "data": {"original": "a\\b"}},
+        {"card_id": "lang_1", "type": "language", "priority": "low", "data": {}},
+    ],
+}
+
+
+def test_parser_reports_completed_containers_with_paths():
+    parser = IncrementalJSONParser()
+    text = json.dumps(DOCUMENT, indent=2)
+
+    # Feed a few characters at a time, like a token stream
+    completed = []
+    for offset in range(0, len(text), 3):
+        completed.extend(parser.feed(text[offset:offset + 3]))
+
+    by_path = dict(completed)
+    assert by_path[("scores", "Plot Coherence")] == DOCUMENT["scores"]["Plot Coherence"]
+    assert by_path[("suggestion_cards", 1)] == DOCUMENT["suggestion_cards"][1]
+    assert by_path[("suggestion_cards", 0, "data")] == {"original": "a\\b"}
+    assert by_path[()] == DOCUMENT
+    assert parser.buffer == text
+
+
+def test_parser_emits_items_as_soon_as_they_close():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"scores": {"A": {"score": 1}') == [(("scores", "A"), {"score": 1})]
+    assert parser.feed(', "B": {"sc') == []
+    assert parser.feed('ore": 2}}') == [(("scores", "B"), {"score": 2}), (("scores",), {"A": {"score": 1}, "B": {"score": 2}})]
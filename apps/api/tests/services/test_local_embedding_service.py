@@ -0,0 +1,56 @@
+import threading
+import numpy as np
+
+from app.services.local_embedding_service import LocalEmbeddingBackend
+
+
+class FakeModel:
+    """Encodes each text as a vector holding its length and records every call."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def encode(self, texts, batch_size, normalize_embeddings, convert_to_numpy):
+        self.calls.append(list(texts))
+        return np.array([[float(len(text))] for text in texts])
+
+
+def make_backend(**kwargs) -> tuple[LocalEmbeddingBackend, FakeModel]:
+    options = {"model_name": "fake", "workers": 1, "max_batch_size": 64, "batch_wait_ms": 50}
+    options.update(kwargs)
+    backend = LocalEmbeddingBackend(**options)
+    model = FakeModel()
+    backend._model = model
+    return backend, model
+
+
+def test_embed_returns_vectors_in_input_order():
+    backend, _ = make_backend(batch_wait_ms=0)
+
+    assert backend.embed(["a", "bbb", "cc"]) == [[1.0], [3.0], [2.0]]
+
+
+def test_concurrent_requests_are_encoded_in_one_batch():
+    backend, model = make_backend(batch_wait_ms=200)
+    results = {}
+
+    def embed(text):
+        results[text] = backend.embed([text])
+
+    threads = [threading.Thread(target=embed, args=("x" * length,)) for length in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"x" * length: [[float(length)]] for length in range(1, 5)}
+    assert len(model.calls) < 4
+
+
+def test_batches_respect_max_batch_size():
+    backend, model = make_backend(max_batch_size=2, batch_wait_ms=0)
+
+    backend.embed(["a", "b"])
+    backend.embed(["c"])
+
+    assert all(len(call) <= 2 for call in model.calls)
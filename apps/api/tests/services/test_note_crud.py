@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.config import settings
+from app.crud import note_crud
+from app.models import Note
+
+
+class _HNSWSession:
+    """
+    Emulates an HNSW scan on PostgreSQL without iterative scans: the index yields
+    only the hnsw.ef_search nearest vectors of all users, and the WHERE clause
+    and LIMIT are applied to those candidates.
+    """
+
+    def __init__(self, notes, query, extversion="0.8.0"):
+        self.notes = notes  # (id, owner_id, vector)
+        self.query = np.asarray(query)
+        self.extversion = extversion
+        self.ef_search = None
+        self.iterative_scan = None
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=postgresql.dialect())
+
+    def execute(self, statement, params=None):
+        if params is None:  # The pgvector version lookup
+            return SimpleNamespace(scalar=lambda: self.extversion)
+        self.ef_search = int(params["ef_search"])
+        self.iterative_scan = params.get("iterative_scan")
+
+    def exec(self, statement):
+        where = statement.compile(dialect=postgresql.dialect()).params
+        candidates = sorted(self.notes, key=lambda note: np.linalg.norm(note[2] - self.query))[:self.ef_search]
+        rows = [
+            SimpleNamespace(id=note_id, distance=float(np.linalg.norm(vector - self.query)))
+            for note_id, owner_id, vector in candidates
+            if owner_id == where["owner_id_1"] and note_id != where["id_1"]
+        ]
+        return SimpleNamespace(all=lambda: rows[:statement._limit])
+
+
+@pytest.fixture(autouse=True)
+def pgvector_version(monkeypatch):
+    # Every test reads the pgvector version of its own fake database
+    monkeypatch.setattr(note_crud, "_pgvector_version", None)
+
+
+def test_other_owners_nearer_vectors_do_not_crowd_out_nearest_notes(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_ITERATIVE_SCAN", "off")
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_EF_SEARCH", 1)
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_OVERFETCH", 4)
+    axes = np.eye(768, dtype=np.float32)
+    # Owner 2's notes all lie nearer to the query than owner 1's
+    notes = [(10 + idx, 2, axes[0] + 0.1 * idx * axes[1]) for idx in range(3)]
+    notes += [(1, 1, axes[0]), (2, 1, axes[0] + axes[2]), (3, 1, axes[0] + 2 * axes[2])]
+    session = _HNSWSession(notes, query=axes[0] + 0.05 * axes[1])
+
+    nearest = note_crud.get_nearest_notes(
+        session=session, note_id=1, owner_id=1, vector=axes[0], embedding_model="m", limit=2
+    )
+
+    assert [note_id for note_id, _ in nearest] == [2, 3]
+    assert session.ef_search == 8
+
+
+def test_unfiltered_semantic_search_over_fetches_for_the_owner_filter(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_ITERATIVE_SCAN", "off")
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_EF_SEARCH", 1)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_MEMORY_ENABLED", False)
+    session = _HNSWSession([], query=np.zeros(768))
+
+    note_crud._semantic_ranks(
+        session=session,
+        owner_id=1,
+        filters=[Note.owner_id == 1],
+        filtered=False,
+        search_embedding=[0.0] * 768,
+        embedding_model="m",
+        max_distance=1.0,
+    )
+
+    assert session.ef_search == settings.VECTOR_SEARCH_LIMIT * settings.VECTOR_SEARCH_OVERFETCH
+
+
+@pytest.mark.parametrize(("extversion", "iterative_scan", "ef_search"), [
+    ("0.8.0", "relaxed_order", 20),
+    ("0.7.4", None, 4 * 20),  # Over-fetches instead
+])
+def test_iterative_scans_are_only_enabled_from_pgvector_0_8(monkeypatch, extversion, iterative_scan, ef_search):
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_ITERATIVE_SCAN", "relaxed_order")
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_EF_SEARCH", 1)
+    monkeypatch.setattr(settings, "VECTOR_SEARCH_OVERFETCH", 4)
+    axes = np.eye(768, dtype=np.float32)
+    session = _HNSWSession([(1, 1, axes[0])], query=axes[0], extversion=extversion)
+
+    note_crud.get_nearest_notes(
+        session=session, note_id=2, owner_id=1, vector=axes[0], embedding_model="m", limit=20
+    )
+
+    assert session.iterative_scan == iterative_scan
+    assert session.ef_search == ef_search
+
+
+@pytest.mark.parametrize("search_query", ["h", "he"])
+def test_fuzzy_queries_shorter_than_a_trigram_use_substring_matching(monkeypatch, search_query):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "SEARCH_FULLTEXT_MIN_LENGTH", 1)
+    with Session(engine) as session:
+        session.add(Note(id=1, text="hello", type="word", owner_id=1))
+        session.add(Note(id=2, text="world", type="word", owner_id=1))
+        session.commit()
+
+        results, *_ = note_crud.search_notes(
+            session=session, owner_id=1, search_query=search_query, fuzzy=True
+        )
+
+    assert [note.id for note, _ in results] == [1]
+
+
+@pytest.mark.parametrize(("count_cap", "capped"), [(3, True), (4, False)])
+def test_facet_counts_report_when_they_reach_the_count_cap(monkeypatch, count_cap, capped):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "SEARCH_COUNT_CAP", count_cap)
+    with Session(engine) as session:
+        session.add_all(Note(id=idx, text=f"note {idx}", type="word", owner_id=1) for idx in range(1, 4))
+        session.commit()
+
+        *_, facets = note_crud.search_notes(session=session, owner_id=1, include_facets=True)
+
+    assert facets["type"] == {"word": 3}
+    assert facets["capped"] is capped
@@ -0,0 +1,77 @@
+import numpy as np
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.config import settings
+from app.models import Note, NoteNeighbor
+from app.services import note_neighbor_service
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _lists(session):
+    lists = {}
+    rows = session.exec(select(NoteNeighbor).order_by(NoteNeighbor.note_id, NoteNeighbor.distance)).all()
+    for row in rows:
+        lists.setdefault(row.note_id, []).append(row.neighbor_id)
+    return lists
+
+
+def test_neighbor_lists_follow_created_and_deleted_notes(monkeypatch):
+    monkeypatch.setattr(settings, "SIMILAR_NOTES_COUNT", 2)
+    axes = np.eye(768, dtype=np.float32)
+    # Notes 1-4 lie ever farther from the first axis
+    vectors = {note_id: axes[0] + 0.5 * note_id * axes[note_id] for note_id in range(1, 5)}
+
+    with Session(_engine()) as session:
+        for note_id, vector in vectors.items():
+            note = Note(id=note_id, text=str(note_id), type="word", owner_id=1, vector=vector, embedding_model="m")
+            session.add(note)
+            session.flush()
+            note_neighbor_service.update_note_neighbors(session=session, note=note)
+        session.add(Note(id=5, text="other owner", type="word", owner_id=2, vector=axes[0], embedding_model="m"))
+        session.commit()
+
+        assert _lists(session) == {1: [2, 3], 2: [1, 3], 3: [1, 2], 4: [1, 2]}
+
+        listed_by = note_neighbor_service.remove_note_neighbors(session=session, note_id=1)
+        session.delete(session.get(Note, 1))
+        session.flush()
+        note_neighbor_service.refresh_neighbors(session=session, note_ids=listed_by)
+        session.commit()
+
+        assert _lists(session) == {2: [3, 4], 3: [2, 4], 4: [2, 3]}
+        similar = note_neighbor_service.similar_notes(session=session, note=session.get(Note, 2), limit=1)
+        assert [(note.id, round(score, 3)) for note, score in similar] == [(3, 0.099)]
+
+
+def test_updates_lock_every_list_they_change(monkeypatch):
+    monkeypatch.setattr(settings, "SIMILAR_NOTES_COUNT", 2)
+    axes = np.eye(768, dtype=np.float32)
+    locked = []
+    lock_lists = note_neighbor_service._lock_lists
+
+    def record_lock(session, note_ids):
+        locked.append(sorted(set(note_ids)))
+        lock_lists(session, note_ids)
+
+    with Session(_engine()) as session:
+        for note_id in range(1, 4):
+            note = Note(id=note_id, text=str(note_id), type="word", owner_id=1, vector=axes[note_id], embedding_model="m")
+            session.add(note)
+            session.flush()
+            note_neighbor_service.update_note_neighbors(session=session, note=note)
+        session.commit()
+        monkeypatch.setattr(note_neighbor_service, "_lock_lists", record_lock)
+
+        note = session.get(Note, 1)
+        note.vector = axes[1] + axes[2]
+        session.flush()
+        note_neighbor_service.update_note_neighbors(session=session, note=note)
+
+    # The note's own list first, then the lists that listed it or now list it
+    assert locked[:2] == [[1], [2, 3]]
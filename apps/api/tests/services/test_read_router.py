@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine
+from starlette.requests import Request
+
+from app import db
+from app.db import ReadReplica, ReadRouter
+
+
+def _replica(lag):
+    replica = ReadReplica(create_engine("sqlite://"), create_async_engine("sqlite+aiosqlite://"))
+    replica.lag = lag
+    return replica
+
+
+def _request(cookies: str = "", method: str = "GET") -> Request:
+    return Request({"type": "http", "method": method, "headers": [(b"cookie", cookies.encode())] if cookies else []})
+
+
+def test_read_router_skips_lagging_and_unreachable_replicas():
+    healthy = [_replica(0.0), _replica(1.5)]
+    router = ReadRouter(replicas=[_replica(30.0), healthy[0], _replica(None), healthy[1]], max_lag_seconds=2, check_interval_seconds=60)
+
+    replicas = {router.read_replica() for _ in range(8)}
+    assert replicas == set(healthy)
+
+    router = ReadRouter(replicas=[_replica(30.0), _replica(None)], max_lag_seconds=2, check_interval_seconds=60)
+    assert router.read_replica() is None
+
+
+def test_unreachable_replica_has_no_lag():
+    replica = _replica(0.0)  # The lag query fails on SQLite
+    assert replica.measure_lag() is None
+    assert replica.lag is None
+
+
+def test_writes_and_recent_writers_use_the_primary(monkeypatch):
+    replica = _replica(0.0)
+    monkeypatch.setattr(db, "read_router", ReadRouter(replicas=[replica], max_lag_seconds=2, check_interval_seconds=60))
+    monkeypatch.setattr(db.settings, "DATABASE_READ_STICKY_SECONDS", 5.0)
+
+    async def session_engine(request):
+        sessions = db.get_session(request)
+        session = await anext(sessions)
+        await sessions.aclose()
+        return session.bind
+
+    def engine(request):
+        return asyncio.run(session_engine(request))
+
+    assert engine(_request()) is replica.async_engine
+    assert engine(_request(method="POST")) is db.async_engine
+    assert engine(_request(f"{db.LAST_WRITE_COOKIE}={time.time() - 1}")) is db.async_engine
+    assert engine(_request(f"{db.LAST_WRITE_COOKIE}={time.time() - 60}")) is replica.async_engine
+    assert engine(_request(f"{db.LAST_WRITE_COOKIE}=garbage")) is replica.async_engine
@@ -0,0 +1,125 @@
+import numpy as np
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Note
+from app.services import vector_search_service
+from app.services.vector_search_service import VectorIndex
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_nearest_notes_orders_by_distance_and_skips_other_models():
+    axes = np.eye(768, dtype=np.float32)
+    with Session(_engine()) as session:
+        session.add_all([
+            Note(id=1, text="near", type="word", owner_id=1, vector=_unit(axes[0] + 0.1 * axes[1]), embedding_model="m"),
+            Note(id=2, text="nearer", type="word", owner_id=1, vector=axes[0], embedding_model="m"),
+            Note(id=3, text="far", type="word", owner_id=1, vector=axes[2], embedding_model="m"),
+            Note(id=4, text="other model", type="word", owner_id=1, vector=axes[0], embedding_model="other"),
+            Note(id=5, text="other owner", type="word", owner_id=2, vector=axes[0], embedding_model="m"),
+        ])
+        session.commit()
+
+        nearest = vector_search_service.nearest_notes(
+            session=session,
+            filters=[Note.owner_id == 1],
+            search_embedding=axes[0].tolist(),
+            embedding_model="m",
+            max_distance=1.0,
+            limit=10,
+        )
+
+    assert nearest == [2, 1]
+
+
+def test_vector_index_loads_lazily_and_applies_updates():
+    axes = np.eye(768, dtype=np.float32)
+    index = VectorIndex(memory_budget_bytes=10 * 1024 * 1024, ttl_seconds=600)
+    with Session(_engine()) as session:
+        session.add_all([
+            Note(id=1, text="a", type="word", owner_id=1, vector=axes[0], embedding_model="m"),
+            Note(id=2, text="b", type="word", owner_id=1, vector=axes[1], embedding_model="m"),
+        ])
+        session.commit()
+
+        def nearest(**kwargs):
+            return index.nearest(
+                session=session, owner_id=1, search_embedding=axes[0].tolist(),
+                embedding_model="m", max_distance=2.0, limit=10, **kwargs
+            )
+
+        assert nearest() == [1, 2]
+        assert nearest(candidate_ids=[2]) == [2]
+
+        index.update_note(owner_id=1, note_id=3, vector=axes[0] * 3, embedding_model="m")
+        index.update_note(owner_id=1, note_id=2, vector=axes[0] + axes[1], embedding_model="m")
+        index.remove_note(owner_id=1, note_id=1)
+        index.update_note(owner_id=1, note_id=4, vector=axes[0], embedding_model="other")
+
+        assert nearest() == [3, 2]
+        assert index.loads == 1
+
+
+def test_vector_index_evicts_least_recently_used_user():
+    axes = np.eye(768, dtype=np.float32)
+    # Room for the minimal buffer of one user only
+    index = VectorIndex(memory_budget_bytes=16 * (768 * 4 + 8), ttl_seconds=600)
+    with Session(_engine()) as session:
+        session.add_all([
+            Note(id=1, text="a", type="word", owner_id=1, vector=axes[0], embedding_model="m"),
+            Note(id=2, text="b", type="word", owner_id=2, vector=axes[0], embedding_model="m"),
+        ])
+        session.commit()
+
+        for owner_id in (1, 2, 1):
+            index.nearest(
+                session=session, owner_id=owner_id, search_embedding=axes[0].tolist(),
+                embedding_model="m", max_distance=1.0, limit=10,
+            )
+
+    assert index.loads == 3
+    assert index.stats()["users"] == 1
+
+
+def test_vector_index_does_not_keep_a_load_that_overlapped_a_change():
+    axes = np.eye(768, dtype=np.float32)
+    index = VectorIndex(memory_budget_bytes=10 * 1024 * 1024, ttl_seconds=600)
+    load = index._load
+
+    def load_while_a_note_is_deleted(session, owner_id, model):
+        owner = load(session, owner_id, model)
+        # Another request commits the deletion after the vectors were read
+        index.remove_note(owner_id=owner_id, note_id=1)
+        return owner
+
+    with Session(_engine()) as session:
+        session.add_all([
+            Note(id=1, text="a", type="word", owner_id=1, vector=axes[0], embedding_model="m"),
+            Note(id=2, text="b", type="word", owner_id=1, vector=axes[1], embedding_model="m"),
+        ])
+        session.commit()
+
+        def nearest():
+            return index.nearest(
+                session=session, owner_id=1, search_embedding=axes[0].tolist(),
+                embedding_model="m", max_distance=2.0, limit=10
+            )
+
+        index._load = load_while_a_note_is_deleted
+        nearest()
+        index._load = load
+        session.delete(session.get(Note, 1))
+        session.commit()
+
+        assert nearest() == [2]
+        assert index.loads == 2
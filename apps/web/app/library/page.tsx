@@ -1,7 +1,7 @@
 "use client";
 
 import { useState, useEffect } from "react";
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery, useQuery } from "@tanstack/react-query";
 import { Settings2 } from "lucide-react"; // Using an icon for the trigger
 import { useAuth } from "@/contexts/AuthContext";
 import { NoteList } from "@/components/features/NoteList";
@@ -23,7 +23,7 @@ import {
   PopoverTrigger,
 } from "@/components/ui/popover";
 import { notesApi, foldersApi, tagsApi } from "@/lib/api";
-import type { Note, Folder, Tag } from "@/types/notes";
+import type { Folder, Tag, NotePage } from "@/types/notes";
 
 // A custom hook for debouncing a value
 function useDebounce<T>(value: T, delay: number): T {
@@ -51,6 +51,7 @@ export default function LibraryPage() {
   const [selectedTags, setSelectedTags] = useState<string[]>([]);
   const [noteType, setNoteType] = useState<string>("");
   const [searchInContent, setSearchInContent] = useState(true);
+  const [isFuzzySearch, setIsFuzzySearch] = useState(false);
 
   const debouncedSearchQuery = useDebounce(searchQuery, 300);
   const debouncedSimilarity = useDebounce(similarity, 200);
@@ -63,13 +64,28 @@ export default function LibraryPage() {
     tags: selectedTags,
     note_type: noteType && noteType !== 'all' ? noteType : undefined,
     search_in_content: searchInContent,
+    fuzzy: isFuzzySearch,
+    facets: true,
   };
 
-  const { data: notes, isLoading } = useQuery<Note[]>({
+  const {
+    data: notePages,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery<NotePage>({
     queryKey: ["notes", "search", searchParams],
-    queryFn: () => notesApi.search(searchParams),
+    queryFn: ({ pageParam }) => notesApi.search({ ...searchParams, cursor: pageParam as string | undefined }),
+    initialPageParam: undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
     enabled: isAuthenticated,
   });
+  const notes = notePages?.pages.flatMap((page) => page.items);
+  // Match counts per filter value, returned with the first page
+  const facets = notePages?.pages[0]?.facets;
+  const withCount = (label: string, count: number | undefined) =>
+    facets ? `${label} (${count ?? 0}${facets.capped ? "+" : ""})` : label;
   
   const { data: folders = [] } = useQuery<Folder[]>({
     queryKey: ["folders"],
@@ -108,7 +124,7 @@ export default function LibraryPage() {
               <SelectItem value="all">All Folders</SelectItem>
               {folders.map((folder) => (
                 <SelectItem key={folder.id} value={String(folder.id)}>
-                  {folder.name}
+                  {withCount(folder.name, facets?.folder_id[folder.id])}
                 </SelectItem>
               ))}
             </SelectContent>
@@ -125,9 +141,9 @@ export default function LibraryPage() {
             </SelectTrigger>
             <SelectContent>
               <SelectItem value="all">All Types</SelectItem>
-              <SelectItem value="word">Word</SelectItem>
-              <SelectItem value="sentence">Sentence</SelectItem>
-              <SelectItem value="phrase">Phrase</SelectItem>
+              <SelectItem value="word">{withCount("Word", facets?.type.word)}</SelectItem>
+              <SelectItem value="sentence">{withCount("Sentence", facets?.type.sentence)}</SelectItem>
+              <SelectItem value="phrase">{withCount("Phrase", facets?.type.phrase)}</SelectItem>
             </SelectContent>
           </Select>
         </div>
@@ -149,6 +165,14 @@ export default function LibraryPage() {
               />
               <Label htmlFor="search-content-toggle">Search Content</Label>
             </div>
+            <div className="flex items-center space-x-2">
+              <Switch
+                id="fuzzy-search-toggle"
+                checked={isFuzzySearch}
+                onCheckedChange={setIsFuzzySearch}
+              />
+              <Label htmlFor="fuzzy-search-toggle">Typo Tolerant</Label>
+            </div>
             {isSemanticSearch && (
               <Popover>
                 <PopoverTrigger asChild>
@@ -180,6 +204,13 @@ export default function LibraryPage() {
         isLoading={isLoading}
         totalNotes={notesCount?.count || 0}
       />
+      {hasNextPage && (
+        <div className="mt-6 flex justify-center">
+          <Button variant="outline" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+            {isFetchingNextPage ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
\ No newline at end of file
@@ -93,7 +93,7 @@ export default function PracticeListDetailPage() {
       
       // Filter out notes already in the list
       const existingNoteIds = new Set(list?.items.map(item => item.note_id) || []);
-      const filteredResults = results.filter((note: Note) => !existingNoteIds.has(note.id));
+      const filteredResults = results.items.filter((note: Note) => !existingNoteIds.has(note.id));
       
       setSearchResults(filteredResults);
     } catch {
@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useMutation, useQuery } from "@tanstack/react-query";
 import { useAuth } from "@/contexts/AuthContext";
 import api, { essayApi } from "@/lib/api";
@@ -23,11 +23,11 @@ import {
   SelectValue,
 } from "@/components/ui/select";
 import { toast } from "sonner";
-import { EssayAnalysisRequest, EssayAnalysisResponse, Essay } from "@/types/notes";
+import { EssayAnalysisRequest, EssayAnalysisResponse, Essay, ScoreDetail, SuggestionCardData } from "@/types/notes";
 import { ScoreBar } from "./essay/ScoreBar";
 import { SuggestionPanel } from "./essay/SuggestionPanel";
 import { AnalysisProgress } from "./essay/AnalysisProgress";
-import { Loader2, FileText, Sparkles, Save } from "lucide-react";
+import { Loader2, FileText, Sparkles, CheckCircle2 } from "lucide-react";
 
 interface EssayAnalysisProps {
   initialEssayId?: number;
@@ -40,6 +40,9 @@ export function EssayAnalysis({ initialEssayId, initialContent }: EssayAnalysisP
   const [content, setContent] = useState(initialContent || "");
   const [essayType, setEssayType] = useState<"application" | "continuation">("application");
   const [analysisResult, setAnalysisResult] = useState<EssayAnalysisResponse | null>(null);
+  const [partialScores, setPartialScores] = useState<Record<string, ScoreDetail>>({});
+  const [partialSuggestions, setPartialSuggestions] = useState<SuggestionCardData[]>([]);
+  const analysisAbortRef = useRef<AbortController | null>(null);
   const [currentEssay, setCurrentEssay] = useState<Essay | null>(null);
   const [currentModel, setCurrentModel] = useState<string | undefined>(undefined);
   const [isLoadingEssay, setIsLoadingEssay] = useState(false);
@@ -100,52 +103,52 @@ export function EssayAnalysis({ initialEssayId, initialContent }: EssayAnalysisP
     mutationFn: async (data: EssayAnalysisRequest) => {
       // Set current model from configuration
       setCurrentModel(configData?.essay_model || "AI Model");
-      return await essayApi.analyze(data);
+      setPartialScores({});
+      setPartialSuggestions([]);
+
+      // Show scores and suggestions as soon as the model has produced them
+      const controller = new AbortController();
+      analysisAbortRef.current = controller;
+      return await essayApi.analyzeStream(
+        data,
+        {
+          onScore: (category, score) =>
+            setPartialScores((prev) => ({ ...prev, [category]: score })),
+          onSuggestion: (suggestion) =>
+            setPartialSuggestions((prev) => [...prev, suggestion]),
+        },
+        controller.signal
+      );
     },
-    onSuccess: (data: EssayAnalysisResponse) => {
+    onSuccess: async (data: EssayAnalysisResponse) => {
       setAnalysisResult(data);
       setCurrentModel(undefined);
-      toast.success("Essay analysis completed!");
+      toast.success(data.cached ? "Loaded the existing analysis of this essay" : "Essay analysis completed!");
+
+      // The analysis is stored as a version, creating the essay if needed;
+      // reload the essay so its version list includes it
+      if (data.essay_id) {
+        setCurrentEssay(await essayApi.get(data.essay_id));
+      }
     },
     onError: (error: any) => {
       setCurrentModel(undefined);
-      toast.error(error.response?.data?.detail || "Analysis failed, please try again");
-    },
-  });
-
-  const saveVersionMutation = useMutation({
-    mutationFn: async () => {
-      if (!analysisResult) {
-        throw new Error("No analysis result to save");
+      if (error.name === "AbortError") {
+        return;
       }
-
-      // Create essay if it doesn't exist
-      let essay = currentEssay;
-      if (!essay) {
-        essay = await essayApi.create({
-          title: title.trim() || `${essayType} Essay`,
-          question: question.trim(),
-          type: essayType,
-        });
-        setCurrentEssay(essay);
-      }
-
-      // Create version
-      return await essayApi.createVersion(essay.id!, {
-        content: content.trim(),
-        scores: analysisResult.scores,
-        total_score: analysisResult.total_score,
-        max_score: analysisResult.max_score,
-      });
+      toast.error(error.message || "Analysis failed, please try again");
     },
-    onSuccess: () => {
-      toast.success("Essay version saved successfully!");
-    },
-    onError: (error: any) => {
-      toast.error(error.response?.data?.detail || "Failed to save essay version");
+    onSettled: () => {
+      analysisAbortRef.current = null;
     },
   });
 
+  // The analysis endpoint already stored the analyzed content as a version
+  const savedVersionId = analysisResult?.version_id;
+  const savedVersion = savedVersionId
+    ? currentEssay?.versions?.find((version) => version.id === savedVersionId)
+    : undefined;
+
   const handleAnalyze = () => {
     if (!question.trim() || !content.trim()) {
       toast.error("Please fill in both question and essay content");
@@ -156,6 +159,8 @@ export function EssayAnalysis({ initialEssayId, initialContent }: EssayAnalysisP
       question: question.trim(),
       content: content.trim(),
       type: essayType,
+      essay_id: currentEssay?.id,
+      title: title.trim() || undefined,
     });
   };
 
@@ -168,17 +173,8 @@ export function EssayAnalysis({ initialEssayId, initialContent }: EssayAnalysisP
     setCurrentEssay(null);
   };
 
-  const handleSaveVersion = () => {
-    if (!analysisResult) {
-      toast.error("Please analyze the essay first");
-      return;
-    }
-    saveVersionMutation.mutate();
-  };
-
   const handleCancelAnalysis = () => {
-    // Note: We cannot actually cancel an ongoing HTTP request
-    // But we can reset the state to let the user know the operation was cancelled
+    analysisAbortRef.current?.abort();
     setCurrentModel(undefined);
     toast.info("Analysis cancelled");
   };
@@ -302,24 +298,11 @@ export function EssayAnalysis({ initialEssayId, initialContent }: EssayAnalysisP
                     </>
                   )}
                 </Button>
-                {analysisResult && (
-                  <Button 
-                    variant="outline" 
-                    onClick={handleSaveVersion}
-                    disabled={saveVersionMutation.isPending}
-                  >
-                    {saveVersionMutation.isPending ? (
-                      <>
-                        <Loader2 className="mr-2 h-4 w-4 animate-spin" />
-                        Saving...
-                      </>
-                    ) : (
-                      <>
-                        <Save className="mr-2 h-4 w-4" />
-                        Save Version
-                      </>
-                    )}
-                  </Button>
+                {savedVersionId && (
+                  <span className="flex items-center text-sm text-muted-foreground">
+                    <CheckCircle2 className="mr-2 h-4 w-4 text-green-600" />
+                    {savedVersion ? `Saved as version ${savedVersion.version_number}` : "Saved"}
+                  </span>
                 )}
                 <Button variant="outline" onClick={handleReset}>
                   Reset
@@ -340,6 +323,23 @@ export function EssayAnalysis({ initialEssayId, initialContent }: EssayAnalysisP
             />
           )}
 
+          {/* Show partial results while the analysis is streaming */}
+          {analyzeEssayMutation.isPending && Object.keys(partialScores).length > 0 && (
+            <ScoreBar
+              scores={partialScores}
+              totalScore={Object.values(partialScores).reduce((sum, detail) => sum + detail.score, 0)}
+              maxScore={essayType === "application" ? 15 : 25}
+              essayType={essayType}
+            />
+          )}
+          {analyzeEssayMutation.isPending && partialSuggestions.length > 0 && (
+            <SuggestionPanel
+              suggestions={partialSuggestions}
+              content={content}
+              onContentChange={setContent}
+            />
+          )}
+
           {/* Show analysis results */}
           {analysisResult && !analyzeEssayMutation.isPending ? (
             <>
@@ -9,7 +9,7 @@ import { Input } from '@/components/ui/input';
 import { ScrollArea } from '@/components/ui/scroll-area';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter, DialogDescription } from '@/components/ui/dialog';
 import { toast } from 'sonner';
-import { Note } from '@/types/notes';
+import { NoteBatchResponse } from '@/types/notes';
 
 interface EditableItem {
   id: number;
@@ -63,14 +63,19 @@ export function ImportReviewer({ items, open, onOpenChange }: ImportReviewerProp
     );
   };
 
-  const batchCreateMutation = useMutation<Note[], Error, { text: string }[]>({
+  const batchCreateMutation = useMutation<NoteBatchResponse, Error, { text: string }[]>({
       mutationFn: async (notesToCreate) => {
-          const promises = notesToCreate.map(note => api.post('/notes', { text: note.text, tags: [] }));
-          const responses = await Promise.all(promises);
-          return responses.map(res => res.data);
+          const response = await api.post('/notes/batch', {
+              items: notesToCreate.map(note => ({ text: note.text, tags: [] })),
+          });
+          return response.data;
       },
-      onSuccess: (createdNotes) => {
-          toast.success(`${createdNotes.length} notes imported successfully!`);
+      onSuccess: (batchResult) => {
+          if (batchResult.failed > 0) {
+              toast.warning(`${batchResult.created} notes imported, ${batchResult.failed} failed.`);
+          } else {
+              toast.success(`${batchResult.created} notes imported successfully!`);
+          }
           queryClient.invalidateQueries({ queryKey: ['notes'] });
           onOpenChange(false);
       },
@@ -1,7 +1,7 @@
 import axios, { InternalAxiosRequestConfig } from 'axios';
 import { toast } from 'sonner';
 import { getCookie } from 'cookies-next';
-import { PracticeList, PracticeListDetail, PracticeListCreate, PracticeListUpdate, PracticeListItem, ReviewResult, Essay, EssayVersion, EssayAnalysisRequest, EssayAnalysisResponse } from "@/types/notes";
+import { PracticeList, PracticeListDetail, PracticeListCreate, PracticeListUpdate, PracticeListItem, ReviewResult, Essay, EssayVersion, EssayAnalysisRequest, EssayAnalysisResponse, EssayAnalysisStreamHandlers, NotePage, NoteSearchResult } from "@/types/notes";
 
 const api = axios.create({
   baseURL: '/api', // All requests will be prefixed with /api
@@ -11,22 +11,27 @@ const api = axios.create({
   timeout: 300000,
 });
 
+const getAuthToken = (): string | undefined => {
+  // Try multiple ways to get the token
+  let token = getCookie('auth_token');
+
+  // If getCookie doesn't work, try document.cookie
+  if (!token && typeof document !== 'undefined') {
+    const cookieValue = document.cookie
+      .split('; ')
+      .find(row => row.startsWith('auth_token='))
+      ?.split('=')[1];
+    token = cookieValue;
+  }
+
+  return token && typeof token === 'string' ? token : undefined;
+};
+
 // Add a request interceptor to include the auth token
 api.interceptors.request.use(
   (config: InternalAxiosRequestConfig) => {
-    // Try multiple ways to get the token
-    let token = getCookie('auth_token');
-    
-    // If getCookie doesn't work, try document.cookie
-    if (!token && typeof document !== 'undefined') {
-      const cookieValue = document.cookie
-        .split('; ')
-        .find(row => row.startsWith('auth_token='))
-        ?.split('=')[1];
-      token = cookieValue;
-    }
-    
-    if (token && typeof token === 'string') {
+    const token = getAuthToken();
+    if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
     
@@ -116,7 +121,11 @@ export const notesApi = {
     tags?: string[];
     note_type?: string;
     search_in_content?: boolean;
-  }) => {
+    fuzzy?: boolean;
+    facets?: boolean;
+    limit?: number;
+    cursor?: string;
+  }): Promise<NotePage> => {
     const searchParams = new URLSearchParams();
     if (params.q) {
       searchParams.append('q', params.q);
@@ -139,6 +148,18 @@ export const notesApi = {
     if (params.search_in_content !== undefined) {
       searchParams.append('search_in_content', String(params.search_in_content));
     }
+    if (params.fuzzy) {
+      searchParams.append('fuzzy', 'true');
+    }
+    if (params.facets) {
+      searchParams.append('facets', 'true');
+    }
+    if (params.limit !== undefined) {
+      searchParams.append('limit', String(params.limit));
+    }
+    if (params.cursor) {
+      searchParams.append('cursor', params.cursor);
+    }
     
     const queryString = searchParams.toString();
     const response = await api.get(`/notes/search?${queryString}`);
@@ -158,6 +179,12 @@ export const notesApi = {
     const response = await api.get('/notes/count');
     return response.data;
   },
+
+  getSimilar: async (noteId: number, limit?: number): Promise<NoteSearchResult[]> => {
+    const query = limit !== undefined ? `?limit=${limit}` : '';
+    const response = await api.get(`/notes/${noteId}/similar${query}`);
+    return response.data;
+  },
 };
 
 export const foldersApi = {
@@ -246,6 +273,68 @@ export const essayApi = {
     return response.data;
   },
 
+  // Streams scores and suggestions as server-sent events while the analysis is generated.
+  // Uses fetch because axios cannot read a response body incrementally in the browser.
+  analyzeStream: async (
+    data: EssayAnalysisRequest,
+    handlers: EssayAnalysisStreamHandlers = {},
+    signal?: AbortSignal
+  ): Promise<EssayAnalysisResponse> => {
+    const token = getAuthToken();
+    const response = await fetch("/api/essays/analyze/stream", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(data),
+      signal,
+    });
+
+    if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({}));
+      throw new Error(error.detail || "Analysis failed, please try again");
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = "message";
+        let payload = "";
+        for (const line of rawEvent.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) payload += line.slice(6);
+        }
+        const eventData = payload ? JSON.parse(payload) : null;
+
+        if (event === "score") {
+          const { category, ...score } = eventData;
+          handlers.onScore?.(category, score);
+        } else if (event === "suggestion") {
+          handlers.onSuggestion?.(eventData);
+        } else if (event === "complete") {
+          return eventData;
+        } else if (event === "error") {
+          throw new Error(eventData?.detail || "Analysis failed, please try again");
+        }
+      }
+    }
+
+    throw new Error("Analysis stream ended unexpectedly");
+  },
+
   // CRUD operations
   create: async (data: { title: string; question: string; type: string }): Promise<Essay> => {
     const response = await api.post("/essays", data);
@@ -22,6 +22,38 @@ export interface Note {
   tags: Tag[];
   folder_id?: number;
   folder?: Folder;
+  enrichment_status?: "pending" | "done" | "failed";
+}
+
+export interface NoteSearchResult extends Note {
+  score?: number | null;
+}
+
+export interface NoteFacets {
+  type: Record<string, number>;
+  folder_id: Record<string, number>;
+  tag_id: Record<string, number>;
+  capped: boolean; // Counts stopped at the server's count cap and are lower bounds
+}
+
+export interface NotePage {
+  items: NoteSearchResult[];
+  next_cursor: string | null;
+  total_estimate: number | null;
+  facets?: NoteFacets | null;
+}
+
+export interface NoteBatchItemResult {
+  index: number;
+  text: string;
+  note: Note | null;
+  error: string | null;
+}
+
+export interface NoteBatchResponse {
+  created: number;
+  failed: number;
+  results: NoteBatchItemResult[];
 }
 
 export interface User {
@@ -124,6 +156,8 @@ export interface EssayAnalysisRequest {
   question: string;
   content: string;
   type: "application" | "continuation";
+  essay_id?: number;
+  title?: string;
 }
 
 export interface EssayAnalysisResponse {
@@ -131,11 +165,20 @@ export interface EssayAnalysisResponse {
   total_score: number;
   max_score: number;
   suggestion_cards: SuggestionCardData[];
+  essay_id?: number | null;
+  version_id?: number | null;
+  cached?: boolean;
 }
 
 export interface SuggestionCardData {
+  id?: number | null;
   card_id: string;
   type: "vocabulary" | "language" | "rewrite";
   priority: "high" | "medium" | "low";
   data: Record<string, any>;
-}
\ No newline at end of file
+}
+
+export interface EssayAnalysisStreamHandlers {
+  onScore?: (category: string, score: ScoreDetail) => void;
+  onSuggestion?: (suggestion: SuggestionCardData) => void;
+}